@@ -0,0 +1,150 @@
+"""Asyncio counterparts of the `data` helpers.
+
+Neither pyodbc nor sqlite3 has a non-blocking API, so each coroutine
+here runs the synchronous helper from `data` (or any blocking callable,
+via `run`) on a bounded thread pool and awaits the result. The event
+loop stays free while the database works, and coroutines can be
+combined with ``asyncio.gather``::
+
+    accounts, txns = await asyncio.gather(
+        adata.fetch('SELECT ... FROM Account WHERE AccountId = ?', (42,)),
+        adata.fetch('SELECT ... FROM [Transaction] WHERE AccountId = ?', (42,)))
+
+Connections still come from the shared pool (`db.get_pool()`), so
+pooling, timing (`instrument`) and cache invalidation behave exactly as
+for synchronous calls. The number of calls running at once is capped by
+an `asyncio.Semaphore` per event loop (`MAX_CONCURRENCY`, by default the
+pool's `max_size`); calls beyond it wait on the loop without occupying a
+thread or a connection, so gathering thousands of queries is safe. A
+`stream` keeps its slot until it is exhausted or closed, so open streams
+count against the same limit for as long as they are open.
+"""
+
+import asyncio
+import functools
+import itertools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import data
+from db import get_pool
+
+# Calls allowed to run at once; None means the connection pool's max_size.
+MAX_CONCURRENCY = None
+
+_executor = None
+_limit = None
+_semaphores = weakref.WeakKeyDictionary()   # event loop -> Semaphore
+_lock = threading.Lock()
+
+
+def _pool_executor():
+    global _executor, _limit
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _limit = MAX_CONCURRENCY or get_pool().max_size
+                _executor = ThreadPoolExecutor(_limit, thread_name_prefix='adata')
+    return _executor
+
+
+def _semaphore():
+    loop = asyncio.get_running_loop()
+    sem = _semaphores.get(loop)
+    if sem is None:
+        sem = _semaphores[loop] = asyncio.Semaphore(_limit)
+    return sem
+
+
+async def run(fn, *args, **kwargs):
+    """Run the blocking callable `fn(*args, **kwargs)` on the pool and return its result.
+
+    Use this for synchronous operations without an async counterpart,
+    e.g. ``await adata.run(posting.post, account_id, emp_id, amount)``.
+    """
+    _pool_executor()
+    async with _semaphore():
+        return await _call(fn, *args, **kwargs)
+
+
+async def _call(fn, *args, **kwargs):
+    # the caller holds a semaphore slot
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_pool_executor(), functools.partial(fn, *args, **kwargs))
+
+
+async def execute(query, params=()):
+    """Async `data.execute`."""
+    return await run(data.execute, query, params)
+
+
+async def insert(query, params=()):
+    """Async `data.insert`; returns the new identity value."""
+    return await run(data.insert, query, params)
+
+
+async def fetch(query, params=()):
+    """Async `data.fetch`; returns all rows."""
+    return await run(data.fetch, query, params)
+
+
+async def fetch_result(query, params=()):
+    """Async `data.fetch_result`; returns a `data.ResultSet`."""
+    return await run(data.fetch_result, query, params)
+
+
+async def delete_many(delete_sql, keys, chunk_size=data.DELETE_CHUNK_SIZE):
+    """Async `data.delete_many`; returns the keys deleted."""
+    return await run(data.delete_many, delete_sql, list(keys), chunk_size)
+
+
+async def stream(query, params=(), chunk_size=data.STREAM_CHUNK_SIZE):
+    """Async iterator over the rows of a query (see `data.stream`).
+
+    Rows are pulled from a worker thread `chunk_size` at a time. The
+    stream holds one of the `MAX_CONCURRENCY` slots, and its pooled
+    connection, from the first row until the iteration finishes or the
+    iterator is closed; further calls and streams wait for a free slot.
+    Breaking out of an ``async for`` leaves the closing to the event
+    loop's finalizer, so close it explicitly when stopping early::
+
+        rows = adata.stream('SELECT ...')
+        try:
+            async for row in rows:
+                ...
+        finally:
+            await rows.aclose()
+
+    A task that keeps `MAX_CONCURRENCY` streams open and then awaits
+    another call waits forever, so consume streams before starting more.
+    """
+    _pool_executor()
+    async with _semaphore():
+        rows = data.stream(query, params, chunk_size)
+        take = lambda: list(itertools.islice(rows, chunk_size))
+        pending = None
+        try:
+            while True:
+                # shielded: a cancelled consumer must not abandon a fetch
+                # that is still running on the generator
+                pending = asyncio.ensure_future(_call(take))
+                chunk = await asyncio.shield(pending)
+                if not chunk:
+                    return
+                for row in chunk:
+                    yield row
+        finally:
+            if pending is not None and not pending.done():
+                await asyncio.wait([pending])
+            # the generator returns its connection when closed
+            await asyncio.shield(_call(rows.close))
+
+
+def shutdown(wait=True):
+    """Stop the worker threads; later calls start a new pool."""
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -3,16 +3,42 @@
 This module builds a simple GUI to manage Departments, Branches,
 Employees, Customers, Accounts and Transactions. Each entity has
 create/read/update/delete handlers that use the `data` helpers.
+
+Tabs are built and loaded on first use: only the visible tab is
+created before the window appears, and the others are built one at a
+time in the background afterwards. Run with ``--startup-timing`` (or
+``BANK_STARTUP_TIMING=1``) to print import, UI build and first-paint
+times.
 """
 
+import os
+import sys
+import time
+from functools import partial
+
+_started = time.perf_counter()
+STARTUP_TIMING = '--startup-timing' in sys.argv or bool(os.environ.get('BANK_STARTUP_TIMING'))
+
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from ttkbootstrap import Style
 import tkinter.font as tkfont
+import cache
+import instrument
+import queries
 from db import get_connection
-from data import execute, fetch
-from helpers import make_form, make_table, _format_cell, _make_edit_dialog, delete_selected, tree_sort
-
+from helpers import make_form, make_table, _format_cell, _make_edit_dialog, delete_selected, BusyIndicator, LazyTabs, render_rows, cancel_render
+from paging import PageQuery
+from posting import amend, cancel, cancel_many, post
+from statement import Statement, write_csv, write_text
+import reports
+import search
+import snapshots
+import datetime
+from validation import clean_account, clean_customer, clean_transaction
+from worker import DBExecutor
+
+_imported = time.perf_counter()
 
 # ------------------- UI SETUP -------------------
 
@@ -68,31 +94,6 @@ def _add_button_hover(btn, style_name='TButton'):
     btn.bind('<Leave>', on_leave)
 
 
-def animate_insert_rows(table, rows, delay=12):
-    """Insert rows into a treeview one-by-one to create a subtle animation.
-
-    Args:
-        table: ttk.Treeview instance.
-        rows: iterable of tuples to insert as `values`.
-        delay: milliseconds between inserting rows.
-    """
-    # ensure table is empty before animation
-    table.delete(*table.get_children())
-
-    rows = list(rows)
-
-    def _insert(i=0):
-        if i >= len(rows):
-            return
-        vals = rows[i]
-        # preserve existing tag logic (odd/even)
-        table.insert('', 'end', values=vals, tags=('odd' if i % 2 else 'even',))
-        table.after(delay, _insert, i + 1)
-
-    # kick off animation
-    table.after(0, _insert, 0)
-
-
 def mkbtn(parent, text, command=None, boot='primary'):
     """Create a ttkbootstrap-style button and attach hover behavior.
 
@@ -113,12 +114,39 @@ notebook.pack(fill="both", expand=True, padx=10, pady=10)
 import helpers
 helpers.root = root
 
+# Database calls run on worker threads; results come back on the Tk loop
+db_executor = DBExecutor(root, on_error=lambda e: messagebox.showerror('Database error', str(e)))
+helpers.executor = db_executor
+
+# tab contents are created on first selection (see the RUN section)
+tabs = LazyTabs(notebook)
+
+
+def run_db(busy, fn, *args, on_done=None, error_title='Error'):
+    """Run a blocking data call off the UI thread.
+
+    `on_done(result)` runs on the UI thread once `fn(*args)` returns;
+    errors are reported in a message box titled `error_title`. `busy` is
+    the tab's `BusyIndicator`, shown while the call is outstanding.
+    """
+    db_executor.submit(fn, *args, on_done=on_done, busy=busy,
+                       on_error=lambda e: messagebox.showerror(error_title, str(e)))
+
+def fill_table(table, rows, status=None, on_done=None):
+    """Replace the contents of a plain (unpaged) table with `rows`.
+
+    Large results are rendered progressively (`helpers.render_rows`);
+    `status`, a label, shows how many rows are in so far.
+    """
+    progress = None
+    if status is not None:
+        progress = lambda shown, total: status.config(text=f"Showing {shown:,} of {total:,} rows...")
+    return render_rows(table, rows, on_progress=progress, on_done=on_done)
+
 # =================== DEPARTMENT ===================
 
 dept_tab = ttk.Frame(notebook)
-notebook.add(dept_tab, text="Department")
-
-dept_fields = make_form(dept_tab, ["Dept Code", "Description"])
+dept_busy = BusyIndicator(dept_tab)
 
 def add_department():
     """Insert a new department using values from the form.
@@ -133,46 +161,40 @@ def add_department():
     if not code or not desc:
         messagebox.showerror("Validation error", "Dept Code and Description are required.")
         return
-    try:
-        # execute parameterized insert to avoid SQL injection
-        execute(
-            "INSERT INTO Department (DeptCode, Description) VALUES (?,?)",
-            (code, desc)
-        )
-        # refresh UI and clear inputs on success
-        load_departments()
+    def _done(_):
+        # show the new row and clear inputs on success
+        dept_table.pager.refresh([code])
         dept_fields["Dept Code"].delete(0, tk.END)
         dept_fields["Description"].delete(0, tk.END)
         messagebox.showinfo("Success", "Department added.")
-    except Exception as e:
-        # show error message returned from DB layer
-        messagebox.showerror("Error adding department", str(e))
+    # execute parameterized insert to avoid SQL injection
+    run_db(dept_busy, queries.run, 'department.insert', (code, desc), on_done=_done, error_title="Error adding department")
+
+dept_query = PageQuery("Department", ("DeptCode", "Description"), "DeptCode")
 
-mkbtn(dept_tab, "Add", command=add_department, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+def build_department_tab():
+    """Create the Department form, buttons and table."""
+    global dept_fields, dept_table
+    dept_fields = make_form(dept_tab, ["Dept Code", "Description"])
+    mkbtn(dept_tab, "Add", command=add_department, boot='success').pack(pady=(0,6), padx=10, anchor='w')
 
-btn_frame = ttk.Frame(dept_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+    btn_frame = ttk.Frame(dept_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
 
-mkbtn(btn_frame, "Edit", command=lambda: edit_department(), boot='info').pack(side='left')
-mkbtn(btn_frame, "Delete", command=lambda: delete_department(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, "Delete Selected", command=lambda: delete_selected(dept_table, 'DELETE FROM Department WHERE DeptCode = ?', 1, False, load_departments), boot='outline-danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, "Edit", command=lambda: edit_department(), boot='info').pack(side='left')
+    mkbtn(btn_frame, "Delete", command=lambda: delete_department(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, "Delete Selected", command=lambda: delete_selected(dept_table, partial(queries.delete_many, 'department.delete'), 1, False, load_departments), boot='outline-danger').pack(side='left', padx=6)
 
-dept_table = make_table(dept_tab, ("Code","Desc"), ("Dept Code","Description"), with_select=True)
+    dept_table = make_table(dept_tab, ("Code","Desc"), ("Dept Code","Description"), with_select=True, source=dept_query, busy=dept_busy)
 
 def load_departments():
     """Load department rows from the database into the treeview.
 
-    Clears the table then fetches DeptCode and Description and inserts
-    each row. Adds a selection checkbox column indicator if the table
-    was created with `with_select=True`.
+    Clears the table and loads the first page of DeptCode/Description
+    rows; further pages are fetched as the user scrolls. The paged
+    table adds the selection checkbox cell to each row.
     """
-    dept_table.delete(*dept_table.get_children())
-    for i, r in enumerate(fetch("SELECT DeptCode, Description FROM Department")):
-        vals = tuple(_format_cell(x) for x in r)
-        # if the table has a selection column, prefix a checkbox symbol
-        if dept_table['columns'] and dept_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        dept_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    dept_table.pager.reload()
 
 def delete_department():
     """Delete the selected department after user confirmation.
@@ -184,18 +206,15 @@ def delete_department():
     if not sel:
         messagebox.showwarning('Select row', 'Select a department to delete.')
         return
-    vals_full = dept_table.item(sel[0], 'values')
-    # drop the selection column value, if present
-    vals = vals_full[1:]
+    # native values of the selected row (without the selection column)
+    vals = dept_table.pager.row(sel[0])
     code = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete department {code}?'):
         return
-    try:
-        execute('DELETE FROM Department WHERE DeptCode = ?', (code,))
-        load_departments()
+    def _done(_):
+        dept_table.pager.remove([code])
         messagebox.showinfo('Deleted', 'Department deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    run_db(dept_busy, queries.run, 'department.delete', (code,), on_done=_done, error_title='Error')
 
 def edit_department():
     """Open an edit dialog for the selected department and save changes.
@@ -208,31 +227,30 @@ def edit_department():
     if not sel:
         messagebox.showwarning('Select row', 'Select a department to edit.')
         return
-    vals_full = dept_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = dept_table.pager.row(sel[0])
     orig_code = vals[0]
 
-    def _save(data):
+    def _save(data, close):
         new_code = data['Dept Code']
         desc = data['Description']
         # simple validation
         if not new_code or not desc:
             raise ValueError('Both fields required')
         # perform update and refresh UI
-        execute('UPDATE Department SET DeptCode=?, Description=? WHERE DeptCode=?', (new_code, desc, orig_code))
-        load_departments()
-        messagebox.showinfo('Saved', 'Department updated.')
+        def _done(_):
+            close()
+            dept_table.pager.refresh([orig_code, new_code])
+            messagebox.showinfo('Saved', 'Department updated.')
+        run_db(dept_busy, queries.run, 'department.update', (new_code, desc, orig_code), on_done=_done, error_title='Edit error')
 
     _make_edit_dialog('Edit Department', ['Dept Code','Description'], vals, _save)
 
-load_departments()
+tabs.add(dept_tab, "Department", build_department_tab, load_departments)
 
 # =================== BRANCH ===================
 
 branch_tab = ttk.Frame(notebook)
-notebook.add(branch_tab, text="Branch")
-
-branch_fields = make_form(branch_tab, ["Branch Code", "Email", "Phone"])
+branch_busy = BusyIndicator(branch_tab)
 
 def add_branch():
     """Insert a new branch from the branch form fields.
@@ -246,37 +264,33 @@ def add_branch():
     if not code or not email:
         messagebox.showerror("Validation error", "Branch Code and Email are required.")
         return
-    try:
-        execute(
-            "INSERT INTO Branch (BranchCode, Email, Phone) VALUES (?,?,?)",
-            (code, email, phone)
-        )
-        load_branches()
+    def _done(new_id):
+        branch_table.pager.refresh([new_id])
         branch_fields["Branch Code"].delete(0, tk.END)
         branch_fields["Email"].delete(0, tk.END)
         branch_fields["Phone"].delete(0, tk.END)
         messagebox.showinfo("Success", "Branch added.")
-    except Exception as e:
-        messagebox.showerror("Error adding branch", str(e))
+    run_db(branch_busy, queries.run, 'branch.insert', (code, email, phone), on_done=_done, error_title="Error adding branch")
+
+branch_query = PageQuery("Branch", ("BranchId", "BranchCode", "Email", "Phone"), "BranchId")
 
-mkbtn(branch_tab, "Add", command=add_branch, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+def build_branch_tab():
+    """Create the Branch form, buttons and table."""
+    global branch_fields, branch_table
+    branch_fields = make_form(branch_tab, ["Branch Code", "Email", "Phone"])
+    mkbtn(branch_tab, "Add", command=add_branch, boot='success').pack(pady=(0,6), padx=10, anchor='w')
 
-btn_frame = ttk.Frame(branch_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
-mkbtn(btn_frame, 'Edit', command=lambda: edit_branch(), boot='info').pack(side='left')
-mkbtn(btn_frame, 'Delete', command=lambda: delete_branch(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(branch_table, 'DELETE FROM Branch WHERE BranchId = ?', 1, True, load_branches), boot='outline-danger').pack(side='left', padx=6)
+    btn_frame = ttk.Frame(branch_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+    mkbtn(btn_frame, 'Edit', command=lambda: edit_branch(), boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Delete', command=lambda: delete_branch(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(branch_table, partial(queries.delete_many, 'branch.delete'), 1, True, load_branches), boot='outline-danger').pack(side='left', padx=6)
 
-branch_table = make_table(branch_tab, ("ID","Code","Email","Phone"), ("ID","Code","Email","Phone"), with_select=True)
+    branch_table = make_table(branch_tab, ("ID","Code","Email","Phone"), ("ID","Code","Email","Phone"), with_select=True, source=branch_query, busy=branch_busy)
 
 def load_branches():
     """Populate the branch treeview with rows from the Branch table."""
-    branch_table.delete(*branch_table.get_children())
-    for i, r in enumerate(fetch("SELECT BranchId, BranchCode, Email, Phone FROM Branch")):
-        vals = tuple(_format_cell(x) for x in r)
-        if branch_table['columns'] and branch_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        branch_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    branch_table.pager.reload()
 
 def delete_branch():
     """Delete selected branch after confirmation."""
@@ -284,17 +298,14 @@ def delete_branch():
     if not sel:
         messagebox.showwarning('Select row', 'Select a branch to delete.')
         return
-    vals_full = branch_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = branch_table.pager.row(sel[0])
     bid = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete branch {bid}?'):
         return
-    try:
-        execute('DELETE FROM Branch WHERE BranchId = ?', (int(bid),))
-        load_branches()
+    def _done(_):
+        branch_table.pager.remove([bid])
         messagebox.showinfo('Deleted', 'Branch deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    run_db(branch_busy, queries.run, 'branch.delete', (bid,), on_done=_done, error_title='Error')
 
 def edit_branch():
     """Open edit dialog for branch and apply updates when saved."""
@@ -302,30 +313,29 @@ def edit_branch():
     if not sel:
         messagebox.showwarning('Select row', 'Select a branch to edit.')
         return
-    vals_full = branch_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = branch_table.pager.row(sel[0])
     bid = vals[0]
 
-    def _save(data):
+    def _save(data, close):
         code = data['Branch Code']
         email = data['Email']
         phone = data['Phone']
         if not code or not email:
             raise ValueError('Branch Code and Email required')
-        execute('UPDATE Branch SET BranchCode=?, Email=?, Phone=? WHERE BranchId=?', (code, email, phone, int(bid)))
-        load_branches()
-        messagebox.showinfo('Saved', 'Branch updated.')
+        def _done(_):
+            close()
+            branch_table.pager.refresh([bid])
+            messagebox.showinfo('Saved', 'Branch updated.')
+        run_db(branch_busy, queries.run, 'branch.update', (code, email, phone, bid), on_done=_done, error_title='Edit error')
 
     _make_edit_dialog('Edit Branch', ['Branch Code','Email','Phone'], vals[1:], _save)
 
-load_branches()
+tabs.add(branch_tab, "Branch", build_branch_tab, load_branches)
 
 # =================== EMPLOYEE ===================
 
 emp_tab = ttk.Frame(notebook)
-notebook.add(emp_tab, text="Employee")
-
-emp_fields = make_form(emp_tab, ["Dept Code", "Branch ID", "Email"])
+emp_busy = BusyIndicator(emp_tab)
 
 def add_employee():
     """Add a new employee; validate and insert then refresh table."""
@@ -340,37 +350,33 @@ def add_employee():
     except Exception:
         messagebox.showerror("Validation error", "Branch ID must be an integer.")
         return
-    try:
-        execute(
-            "INSERT INTO Employee (DeptCode, BranchId, Email) VALUES (?,?,?)",
-            (dept, branch_id, email)
-        )
-        load_employees()
+    def _done(new_id):
+        emp_table.pager.refresh([new_id])
         emp_fields["Dept Code"].delete(0, tk.END)
         emp_fields["Branch ID"].delete(0, tk.END)
         emp_fields["Email"].delete(0, tk.END)
         messagebox.showinfo("Success", "Employee added.")
-    except Exception as e:
-        messagebox.showerror("Error adding employee", str(e))
+    run_db(emp_busy, queries.run, 'employee.insert', (dept, branch_id, email), on_done=_done, error_title="Error adding employee")
 
-mkbtn(emp_tab, "Add", command=add_employee, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+emp_query = PageQuery("Employee", ("EmpId", "DeptCode", "BranchId", "Email"), "EmpId")
 
-btn_frame = ttk.Frame(emp_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
-mkbtn(btn_frame, 'Edit', command=lambda: edit_employee(), boot='info').pack(side='left')
-mkbtn(btn_frame, 'Delete', command=lambda: delete_employee(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(emp_table, 'DELETE FROM Employee WHERE EmpId = ?', 1, True, load_employees), boot='outline-danger').pack(side='left', padx=6)
+def build_employee_tab():
+    """Create the Employee form, buttons and table."""
+    global emp_fields, emp_table
+    emp_fields = make_form(emp_tab, ["Dept Code", "Branch ID", "Email"])
+    mkbtn(emp_tab, "Add", command=add_employee, boot='success').pack(pady=(0,6), padx=10, anchor='w')
 
-emp_table = make_table(emp_tab, ("ID","Dept","Branch","Email"), ("ID","Dept","Branch","Email"), with_select=True)
+    btn_frame = ttk.Frame(emp_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+    mkbtn(btn_frame, 'Edit', command=lambda: edit_employee(), boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Delete', command=lambda: delete_employee(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(emp_table, partial(queries.delete_many, 'employee.delete'), 1, True, load_employees), boot='outline-danger').pack(side='left', padx=6)
+
+    emp_table = make_table(emp_tab, ("ID","Dept","Branch","Email"), ("ID","Dept","Branch","Email"), with_select=True, source=emp_query, busy=emp_busy)
 
 def load_employees():
     """Fetch employees and display them in the employees treeview."""
-    emp_table.delete(*emp_table.get_children())
-    for i, r in enumerate(fetch("SELECT EmpId, DeptCode, BranchId, Email FROM Employee")):
-        vals = tuple(_format_cell(x) for x in r)
-        if emp_table['columns'] and emp_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        emp_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    emp_table.pager.reload()
 
 def delete_employee():
     """Delete the selected employee record after confirmation."""
@@ -378,17 +384,14 @@ def delete_employee():
     if not sel:
         messagebox.showwarning('Select row', 'Select an employee to delete.')
         return
-    vals_full = emp_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = emp_table.pager.row(sel[0])
     eid = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete employee {eid}?'):
         return
-    try:
-        execute('DELETE FROM Employee WHERE EmpId = ?', (int(eid),))
-        load_employees()
+    def _done(_):
+        emp_table.pager.remove([eid])
         messagebox.showinfo('Deleted', 'Employee deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    run_db(emp_busy, queries.run, 'employee.delete', (eid,), on_done=_done, error_title='Error')
 
 def edit_employee():
     """Edit selected employee via dialog and update DB on save."""
@@ -396,11 +399,10 @@ def edit_employee():
     if not sel:
         messagebox.showwarning('Select row', 'Select an employee to edit.')
         return
-    vals_full = emp_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = emp_table.pager.row(sel[0])
     eid = vals[0]
 
-    def _save(data):
+    def _save(data, close):
         dept = data['Dept Code']
         branch = data['Branch ID']
         email = data['Email']
@@ -410,58 +412,54 @@ def edit_employee():
             branch_id = int(branch)
         except Exception:
             raise ValueError('Branch ID must be integer')
-        execute('UPDATE Employee SET DeptCode=?, BranchId=?, Email=? WHERE EmpId=?', (dept, branch_id, email, int(eid)))
-        load_employees()
-        messagebox.showinfo('Saved', 'Employee updated.')
+        def _done(_):
+            close()
+            emp_table.pager.refresh([eid])
+            messagebox.showinfo('Saved', 'Employee updated.')
+        run_db(emp_busy, queries.run, 'employee.update', (dept, branch_id, email, eid), on_done=_done, error_title='Edit error')
 
     _make_edit_dialog('Edit Employee', ['Dept Code','Branch ID','Email'], vals[1:], _save)
 
-load_employees()
+tabs.add(emp_tab, "Employee", build_employee_tab, load_employees)
 
 # =================== CUSTOMER ===================
 
 cust_tab = ttk.Frame(notebook)
-notebook.add(cust_tab, text="Customer")
-
-cust_fields = make_form(cust_tab, ["SSN", "Job"])
+cust_busy = BusyIndicator(cust_tab)
 
 def add_customer():
     """Create a new customer record from the customer form."""
-    ssn = cust_fields["SSN"].get().strip()
-    job = cust_fields["Job"].get().strip()
-    if not ssn:
-        messagebox.showerror("Validation error", "SSN is required.")
-        return
     try:
-        execute(
-            "INSERT INTO Customer (SSN, Job, IsActive) VALUES (?,?,1)",
-            (ssn, job)
-        )
-        load_customers()
+        ssn, job = clean_customer(cust_fields["SSN"].get(), cust_fields["Job"].get())
+    except ValueError as e:
+        messagebox.showerror("Validation error", str(e))
+        return
+    def _done(new_id):
+        cust_table.pager.refresh([new_id])
         cust_fields["SSN"].delete(0, tk.END)
         cust_fields["Job"].delete(0, tk.END)
         messagebox.showinfo("Success", "Customer added.")
-    except Exception as e:
-        messagebox.showerror("Error adding customer", str(e))
+    run_db(cust_busy, queries.run, 'customer.insert', (ssn, job), on_done=_done, error_title="Error adding customer")
 
-mkbtn(cust_tab, "Add", command=add_customer, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+cust_query = PageQuery("Customer", ("CustomerId", "SSN", "Job"), "CustomerId")
 
-btn_frame = ttk.Frame(cust_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
-mkbtn(btn_frame, 'Edit', command=lambda: edit_customer(), boot='info').pack(side='left')
-mkbtn(btn_frame, 'Delete', command=lambda: delete_customer(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(cust_table, 'DELETE FROM Customer WHERE CustomerId = ?', 1, True, load_customers), boot='outline-danger').pack(side='left', padx=6)
+def build_customer_tab():
+    """Create the Customer form, buttons and table."""
+    global cust_fields, cust_table
+    cust_fields = make_form(cust_tab, ["SSN", "Job"])
+    mkbtn(cust_tab, "Add", command=add_customer, boot='success').pack(pady=(0,6), padx=10, anchor='w')
 
-cust_table = make_table(cust_tab, ("ID","SSN","Job"), ("ID","SSN","Job"), with_select=True)
+    btn_frame = ttk.Frame(cust_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+    mkbtn(btn_frame, 'Edit', command=lambda: edit_customer(), boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Delete', command=lambda: delete_customer(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(cust_table, partial(queries.delete_many, 'customer.delete'), 1, True, load_customers), boot='outline-danger').pack(side='left', padx=6)
+
+    cust_table = make_table(cust_tab, ("ID","SSN","Job"), ("ID","SSN","Job"), with_select=True, source=cust_query, busy=cust_busy)
 
 def load_customers():
     """Refresh the customers list displayed in the UI."""
-    cust_table.delete(*cust_table.get_children())
-    for i, r in enumerate(fetch("SELECT CustomerId, SSN, Job FROM Customer")):
-        vals = tuple(_format_cell(x) for x in r)
-        if cust_table['columns'] and cust_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        cust_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    cust_table.pager.reload()
 
 def delete_customer():
     """Delete the selected customer from the database."""
@@ -469,17 +467,14 @@ def delete_customer():
     if not sel:
         messagebox.showwarning('Select row', 'Select a customer to delete.')
         return
-    vals_full = cust_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = cust_table.pager.row(sel[0])
     cid = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete customer {cid}?'):
         return
-    try:
-        execute('DELETE FROM Customer WHERE CustomerId = ?', (int(cid),))
-        load_customers()
+    def _done(_):
+        cust_table.pager.remove([cid])
         messagebox.showinfo('Deleted', 'Customer deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    run_db(cust_busy, queries.run, 'customer.delete', (cid,), on_done=_done, error_title='Error')
 
 def edit_customer():
     """Edit selected customer using the helper dialog and save updates."""
@@ -487,82 +482,64 @@ def edit_customer():
     if not sel:
         messagebox.showwarning('Select row', 'Select a customer to edit.')
         return
-    vals_full = cust_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = cust_table.pager.row(sel[0])
     cid = vals[0]
 
-    def _save(data):
-        ssn = data['SSN']
-        job = data['Job']
-        if not ssn:
-            raise ValueError('SSN required')
-        execute('UPDATE Customer SET SSN=?, Job=? WHERE CustomerId=?', (ssn, job, int(cid)))
-        load_customers()
-        messagebox.showinfo('Saved', 'Customer updated.')
+    def _save(data, close):
+        ssn, job = clean_customer(data['SSN'], data['Job'])
+        def _done(_):
+            close()
+            cust_table.pager.refresh([cid])
+            messagebox.showinfo('Saved', 'Customer updated.')
+        run_db(cust_busy, queries.run, 'customer.update', (ssn, job, cid), on_done=_done, error_title='Edit error')
 
     _make_edit_dialog('Edit Customer', ['SSN','Job'], vals[1:], _save)
 
-load_customers()
+tabs.add(cust_tab, "Customer", build_customer_tab, load_customers)
 
 # =================== ACCOUNT ===================
 
 acc_tab = ttk.Frame(notebook)
-notebook.add(acc_tab, text="Account")
-
-acc_fields = make_form(acc_tab, ["IBAN","Customer ID","Branch ID","Balance"])
+acc_busy = BusyIndicator(acc_tab)
 
 def add_account():
     """Add a new account after validating IDs and balance."""
-    iban = acc_fields["IBAN"].get().strip()
-    cust = acc_fields["Customer ID"].get().strip()
-    branch = acc_fields["Branch ID"].get().strip()
-    bal = acc_fields["Balance"].get().strip()
-    if not iban or not cust or not branch:
-        messagebox.showerror("Validation error", "IBAN, Customer ID and Branch ID are required.")
-        return
     try:
-        cust_id = int(cust)
-        branch_id = int(branch)
-    except Exception:
-        messagebox.showerror("Validation error", "Customer ID and Branch ID must be integers.")
+        iban, cust_id, branch_id, balance = clean_account(
+            acc_fields["IBAN"].get(), acc_fields["Customer ID"].get(),
+            acc_fields["Branch ID"].get(), acc_fields["Balance"].get())
+    except ValueError as e:
+        messagebox.showerror("Validation error", str(e))
         return
-    try:
-        balance = float(bal) if bal else 0.0
-    except Exception:
-        messagebox.showerror("Validation error", "Balance must be a number.")
-        return
-    try:
-        execute(
-            "INSERT INTO Account (IBAN, CustomerId, BranchId, Balance) VALUES (?,?,?,?)",
-            (iban, cust_id, branch_id, balance)
-        )
-        load_accounts()
+    def _done(new_id):
+        acc_table.pager.refresh([new_id])
         acc_fields["IBAN"].delete(0, tk.END)
         acc_fields["Customer ID"].delete(0, tk.END)
         acc_fields["Branch ID"].delete(0, tk.END)
         acc_fields["Balance"].delete(0, tk.END)
         messagebox.showinfo("Success", "Account added.")
-    except Exception as e:
-        messagebox.showerror("Error adding account", str(e))
+    run_db(acc_busy, queries.run, 'account.insert', (iban, cust_id, branch_id, balance), on_done=_done, error_title="Error adding account")
+
+acc_query = PageQuery("Account", ("AccountId", "IBAN", "CustomerId", "BranchId", "Balance"), "AccountId")
 
-mkbtn(acc_tab, "Add", command=add_account, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+def build_account_tab():
+    """Create the Account form, buttons and table."""
+    global acc_fields, acc_table
+    acc_fields = make_form(acc_tab, ["IBAN","Customer ID","Branch ID","Balance"])
+    mkbtn(acc_tab, "Add", command=add_account, boot='success').pack(pady=(0,6), padx=10, anchor='w')
 
-btn_frame = ttk.Frame(acc_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
-mkbtn(btn_frame, 'Edit', command=lambda: edit_account(), boot='info').pack(side='left')
-mkbtn(btn_frame, 'Delete', command=lambda: delete_account(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(acc_table, 'DELETE FROM Account WHERE AccountId = ?', 1, True, load_accounts), boot='outline-danger').pack(side='left', padx=6)
+    btn_frame = ttk.Frame(acc_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+    mkbtn(btn_frame, 'Edit', command=lambda: edit_account(), boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Delete', command=lambda: delete_account(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(acc_table, partial(queries.delete_many, 'account.delete'), 1, True, load_accounts), boot='outline-danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Statement', command=lambda: export_statement(), boot='outline-primary').pack(side='left', padx=6)
 
-acc_table = make_table(acc_tab, ("ID","IBAN","Cust","Branch","Balance"), ("ID","IBAN","Cust","Branch","Balance"), with_select=True)
+    acc_table = make_table(acc_tab, ("ID","IBAN","Cust","Branch","Balance"), ("ID","IBAN","Cust","Branch","Balance"), with_select=True, source=acc_query, busy=acc_busy)
 
 def load_accounts():
     """Load accounts into the account treeview."""
-    acc_table.delete(*acc_table.get_children())
-    for i, r in enumerate(fetch("SELECT AccountId, IBAN, CustomerId, BranchId, Balance FROM Account")):
-        vals = tuple(_format_cell(x) for x in r)
-        if acc_table['columns'] and acc_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        acc_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    acc_table.pager.reload()
 
 def delete_account():
     """Delete the selected account record from the DB."""
@@ -570,156 +547,424 @@ def delete_account():
     if not sel:
         messagebox.showwarning('Select row', 'Select an account to delete.')
         return
-    vals_full = acc_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = acc_table.pager.row(sel[0])
     aid = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete account {aid}?'):
         return
-    try:
-        execute('DELETE FROM Account WHERE AccountId = ?', (int(aid),))
-        load_accounts()
+    def _done(_):
+        acc_table.pager.remove([aid])
         messagebox.showinfo('Deleted', 'Account deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    run_db(acc_busy, queries.run, 'account.delete', (aid,), on_done=_done, error_title='Error')
+
+def export_statement():
+    """Write a statement with running balances for the selected account."""
+    sel = acc_table.selection()
+    if not sel:
+        messagebox.showwarning('Select row', 'Select an account for the statement.')
+        return
+    aid = acc_table.pager.key(sel[0])
+    path = filedialog.asksaveasfilename(title=f'Statement for account {aid}', defaultextension='.txt',
+                                        initialfile=f'statement_{aid}.txt',
+                                        filetypes=[('Text', '*.txt'), ('CSV', '*.csv')])
+    if not path:
+        return
+    write = write_csv if path.lower().endswith('.csv') else write_text
+    def _write():
+        # streams the transactions; runs on the DB executor
+        st = Statement(aid)
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            write(st, fh)
+        return st
+    def _done(st):
+        messagebox.showinfo('Statement', f'{st.count} transactions written to {path}.\n'
+                                         f'Opening {st.opening_balance:,.2f}, closing {st.closing_balance:,.2f}.')
+    run_db(acc_busy, _write, on_done=_done, error_title='Statement error')
 
 def edit_account():
-    """Edit the selected account; validate inputs and update DB."""
+    """Edit the selected account's IBAN, customer and branch.
+
+    The balance is not editable; it changes only through postings.
+    """
     sel = acc_table.selection()
     if not sel:
         messagebox.showwarning('Select row', 'Select an account to edit.')
         return
-    vals_full = acc_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = acc_table.pager.row(sel[0])
     aid = vals[0]
 
-    def _save(data):
-        iban = data['IBAN']
-        cust = data['Customer ID']
-        branch = data['Branch ID']
-        bal = data['Balance']
-        if not iban or not cust or not branch:
-            raise ValueError('IBAN, Customer ID and Branch ID required')
-        try:
-            cust_id = int(cust)
-            branch_id = int(branch)
-            balance = float(bal) if bal else 0.0
-        except Exception:
-            raise ValueError('IDs must be integers and balance a number')
-        execute('UPDATE Account SET IBAN=?, CustomerId=?, BranchId=?, Balance=? WHERE AccountId=?', (iban, cust_id, branch_id, balance, int(aid)))
-        load_accounts()
-        messagebox.showinfo('Saved', 'Account updated.')
+    def _save(data, close):
+        iban, cust_id, branch_id, _ = clean_account(
+            data['IBAN'], data['Customer ID'], data['Branch ID'], '')
+        def _done(_):
+            close()
+            acc_table.pager.refresh([aid])
+            messagebox.showinfo('Saved', 'Account updated.')
+        run_db(acc_busy, queries.run, 'account.update', (iban, cust_id, branch_id, aid), on_done=_done, error_title='Edit error')
 
-    _make_edit_dialog('Edit Account', ['IBAN','Customer ID','Branch ID','Balance'], vals[1:], _save)
+    _make_edit_dialog('Edit Account', ['IBAN','Customer ID','Branch ID'], vals[1:4], _save)
 
-load_accounts()
+tabs.add(acc_tab, "Account", build_account_tab, load_accounts)
 
 # =================== TRANSACTION ===================
 
 txn_tab = ttk.Frame(notebook)
-notebook.add(txn_tab, text="Transaction")
-
-txn_fields = make_form(txn_tab, ["Account ID","Employee ID","Amount"])
+txn_busy = BusyIndicator(txn_tab)
 
 def add_txn():
-    """Create a transaction: validate, insert with current date, and refresh."""
-    acc = txn_fields["Account ID"].get().strip()
-    emp = txn_fields["Employee ID"].get().strip()
-    amt = txn_fields["Amount"].get().strip()
-    if not acc or not emp or not amt:
-        messagebox.showerror("Validation error", "Account ID, Employee ID and Amount are required.")
-        return
+    """Post a transaction: validate, apply it to the account balance, and refresh."""
     try:
-        acc_id = int(acc)
-        emp_id = int(emp)
-    except Exception:
-        messagebox.showerror("Validation error", "Account ID and Employee ID must be integers.")
+        acc_id, emp_id, amount = clean_transaction(
+            txn_fields["Account ID"].get(), txn_fields["Employee ID"].get(), txn_fields["Amount"].get())
+    except ValueError as e:
+        messagebox.showerror("Validation error", str(e))
         return
-    try:
-        amount = float(amt)
-    except Exception:
-        messagebox.showerror("Validation error", "Amount must be a number.")
-        return
-    try:
-        # Insert the transaction; SQL Server GETDATE() will set timestamp
-        execute(
-            "INSERT INTO [Transaction] (AccountId, EmpId, Amount, TransactionDate) VALUES (?,?,?,GETDATE())",
-            (acc_id, emp_id, amount)
-        )
-        load_txns()
+    def _done(balance):
+        txn_table.pager.load_newer()
+        if tabs.built(acc_tab):
+            acc_table.pager.refresh([acc_id])
         txn_fields["Account ID"].delete(0, tk.END)
         txn_fields["Employee ID"].delete(0, tk.END)
         txn_fields["Amount"].delete(0, tk.END)
-        messagebox.showinfo("Success", "Transaction added.")
-    except Exception as e:
-        messagebox.showerror("Error adding transaction", str(e))
-
-mkbtn(txn_tab, "Add", command=add_txn, boot='success').pack(pady=(0,6), padx=10, anchor='w')
-btn_frame = ttk.Frame(txn_tab)
-btn_frame.pack(anchor='w', padx=10, pady=(0,6))
-
-mkbtn(btn_frame, 'Edit', command=lambda: edit_txn(), boot='info').pack(side='left')
-mkbtn(btn_frame, 'Delete', command=lambda: delete_txn(), boot='danger').pack(side='left', padx=6)
-mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(txn_table, 'DELETE FROM [Transaction] WHERE TransactionId = ?', 1, True, load_txns), boot='outline-danger').pack(side='left', padx=6)
-
-txn_table = make_table(txn_tab, ("ID","Acc","Emp","Amount","Date"), ("ID","Acc","Emp","Amount","Date"), with_select=True)
+        messagebox.showinfo("Success", f"Transaction added. New balance: {balance}")
+    # Insert the transaction and update Account.Balance in one DB transaction
+    run_db(txn_busy, post, acc_id, emp_id, amount, on_done=_done, error_title="Error adding transaction")
+
+# hot rows by default; "Include history" adds the archived months (archive.py)
+TXN_TABLE = "[Transaction]"
+TXN_HISTORY = "TransactionHistory"
+txn_query = PageQuery(TXN_TABLE, ("TransactionId", "AccountId", "EmpId", "Amount", "TransactionDate"), "TransactionId")
+
+def build_transaction_tab():
+    """Create the Transaction form, buttons and table."""
+    global txn_fields, txn_table, txn_history
+    txn_fields = make_form(txn_tab, ["Account ID","Employee ID","Amount"])
+    mkbtn(txn_tab, "Add", command=add_txn, boot='success').pack(pady=(0,6), padx=10, anchor='w')
+    btn_frame = ttk.Frame(txn_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(0,6))
+
+    mkbtn(btn_frame, 'Edit', command=lambda: edit_txn(), boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Delete', command=lambda: delete_txn(), boot='danger').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Delete Selected', command=lambda: delete_selected(txn_table, cancel_many, 1, True, load_txns), boot='outline-danger').pack(side='left', padx=6)
+    txn_history = tk.BooleanVar(value=False)
+    ttk.Checkbutton(btn_frame, text='Include history', variable=txn_history, command=toggle_txn_history).pack(side='left', padx=(12,0))
+
+    txn_table = make_table(txn_tab, ("ID","Acc","Emp","Amount","Date"), ("ID","Acc","Emp","Amount","Date"), with_select=True, source=txn_query, busy=txn_busy)
 
 def load_txns():
     """Populate the transaction list from the Transaction table."""
-    txn_table.delete(*txn_table.get_children())
-    for i, r in enumerate(fetch("SELECT TransactionId, AccountId, EmpId, Amount, TransactionDate FROM [Transaction]")):
-        vals = tuple(_format_cell(x) for x in r)
-        if txn_table['columns'] and txn_table['columns'][0] == '_sel':
-            vals = ('☐',) + vals
-        txn_table.insert("", "end", values=vals, tags=('odd' if i%2 else 'even',))
+    txn_table.pager.reload()
+
+def toggle_txn_history():
+    """List archived transactions too, or only the hot Transaction table."""
+    txn_query.table = TXN_HISTORY if txn_history.get() else TXN_TABLE
+    load_txns()
 
 def delete_txn():
-    """Delete the selected transaction entry after confirmation."""
+    """Cancel the selected transaction after confirmation, reversing it on the balance."""
     sel = txn_table.selection()
     if not sel:
         messagebox.showwarning('Select row', 'Select a transaction to delete.')
         return
-    vals_full = txn_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = txn_table.pager.row(sel[0])
     tid = vals[0]
     if not messagebox.askyesno('Confirm', f'Delete transaction {tid}?'):
         return
-    try:
-        execute('DELETE FROM [Transaction] WHERE TransactionId = ?', (int(tid),))
-        load_txns()
-        messagebox.showinfo('Deleted', 'Transaction deleted.')
-    except Exception as e:
-        messagebox.showerror('Error', str(e))
+    def _done(balance):
+        txn_table.pager.remove([tid])
+        if tabs.built(acc_tab):
+            acc_table.pager.refresh([vals[1]])
+        messagebox.showinfo('Deleted', f'Transaction deleted. New balance: {balance}')
+    run_db(txn_busy, cancel, tid, on_done=_done, error_title='Error')
 
 def edit_txn():
-    """Edit a transaction: validate inputs, update DB and refresh list."""
+    """Edit a transaction: validate inputs, move the change onto the balances and refresh."""
     sel = txn_table.selection()
     if not sel:
         messagebox.showwarning('Select row', 'Select a transaction to edit.')
         return
-    vals_full = txn_table.item(sel[0], 'values')
-    vals = vals_full[1:]
+    vals = txn_table.pager.row(sel[0])
     tid = vals[0]
 
-    def _save(data):
-        acc = data['Account ID']
-        emp = data['Employee ID']
-        amt = data['Amount']
-        if not acc or not emp or not amt:
-            raise ValueError('All fields required')
-        try:
-            acc_id = int(acc)
-            emp_id = int(emp)
-            amount = float(amt)
-        except Exception:
-            raise ValueError('IDs must be integers and amount a number')
-        execute('UPDATE [Transaction] SET AccountId=?, EmpId=?, Amount=? WHERE TransactionId=?', (acc_id, emp_id, amount, int(tid)))
-        load_txns()
-        messagebox.showinfo('Saved', 'Transaction updated.')
+    def _save(data, close):
+        acc_id, emp_id, amount = clean_transaction(data['Account ID'], data['Employee ID'], data['Amount'])
+        def _done(balance):
+            close()
+            txn_table.pager.refresh([tid])
+            if tabs.built(acc_tab):
+                acc_table.pager.refresh(sorted({vals[1], acc_id}))
+            messagebox.showinfo('Saved', f'Transaction updated. New balance: {balance}')
+        run_db(txn_busy, amend, tid, acc_id, emp_id, amount, on_done=_done, error_title='Edit error')
 
     _make_edit_dialog('Edit Transaction', ['Account ID','Employee ID','Amount'], vals[1:4], _save)
 
-load_txns()
+tabs.add(txn_tab, "Transaction", build_transaction_tab, load_txns)
+
+# =================== SEARCH ===================
+
+search_tab = ttk.Frame(notebook)
+search_busy = BusyIndicator(search_tab)
+
+SEARCH_KINDS = {"Any": None, "SSN": 'ssn', "IBAN": 'iban', "Customer ID": 'customer', "Account ID": 'account'}
+
+def run_search(refresh=False):
+    """Look up a customer by SSN, IBAN or ID and show their accounts and recent transactions."""
+    text = search_field.get().strip()
+    if not text:
+        messagebox.showerror('Validation error', 'Enter an SSN, IBAN, customer ID or account ID.')
+        return
+    kind = SEARCH_KINDS[search_kind.get()]
+    cancel_render(search_acc_table)
+    cancel_render(search_txn_table)
+    def _done(profile):
+        if profile is None:
+            search_summary.config(text=f"No customer matches {text!r}.")
+            fill_table(search_acc_table, ())
+            fill_table(search_txn_table, ())
+            return
+        cid, ssn, gender, reg_date, active, job, income = profile.customer
+        source = 'cached' if profile.cached else f'{profile.seconds * 1000:.0f} ms'
+        search_summary.config(text=(
+            f"Customer {cid}  |  SSN {ssn}  |  {job or '-'}  |  income {income or '-'}  |  "
+            f"registered {_format_cell(reg_date) or '-'}  |  {'active' if active else 'inactive'}  |  "
+            f"matched by {profile.matched_by} ({source})"))
+        fill_table(search_acc_table, profile.accounts)
+        fill_table(search_txn_table, profile.transactions)
+    run_db(search_busy, search.lookup, text, kind, search.RECENT_TRANSACTIONS, refresh,
+           on_done=_done, error_title='Search error')
+
+def build_search_tab():
+    """Create the search box, customer summary and result tables."""
+    global search_field, search_kind, search_summary, search_acc_table, search_txn_table
+    bar = ttk.Frame(search_tab)
+    bar.pack(anchor='w', padx=10, pady=(8, 0))
+    ttk.Label(bar, text="SSN, IBAN or ID").pack(side='left')
+    search_field = ttk.Entry(bar, width=30)
+    search_field.pack(side='left', padx=6)
+    search_field.bind('<Return>', lambda e: run_search())
+    search_kind = ttk.Combobox(bar, values=list(SEARCH_KINDS), state='readonly', width=12)
+    search_kind.current(0)
+    search_kind.pack(side='left')
+    mkbtn(bar, 'Search', command=run_search, boot='primary').pack(side='left', padx=(8, 0))
+    mkbtn(bar, 'Refresh', command=lambda: run_search(refresh=True), boot='info').pack(side='left', padx=6)
+
+    search_summary = ttk.Label(search_tab, anchor='w')
+    search_summary.pack(fill='x', padx=10, pady=(8, 0))
+    ttk.Label(search_tab, text="Accounts").pack(anchor='w', padx=10, pady=(6, 0))
+    search_acc_table = make_table(search_tab, ("ID","IBAN","Branch","Status","Currency","Balance","Last txn"),
+                                  ("ID","IBAN","Branch","Status","Currency","Balance","Last txn"))
+    ttk.Label(search_tab, text=f"Last {search.RECENT_TRANSACTIONS} transactions").pack(anchor='w', padx=10)
+    search_txn_table = make_table(search_tab, ("ID","Acc","Emp","Amount","Status","Date","Time"),
+                                  ("ID","Acc","Emp","Amount","Status","Date","Time"))
+
+tabs.add(search_tab, "Search", build_search_tab)
+
+# =================== DASHBOARD ===================
+
+dash_tab = ttk.Frame(notebook)
+dash_busy = BusyIndicator(dash_tab)
+
+DASHBOARD_DAYS = 30
+
+def load_dashboard():
+    """Show branch totals for the last DASHBOARD_DAYS days from the snapshot tables."""
+    since = datetime.date.today() - datetime.timedelta(days=DASHBOARD_DAYS)
+    cancel_render(branch_day_table)
+    run_db(dash_busy, snapshots.branch_summary, since, on_done=lambda rows: fill_table(branch_day_table, rows),
+           error_title='Dashboard error')
+
+def update_snapshots():
+    """Fold new transactions into the snapshot tables, then refresh the views."""
+    def _done(stats):
+        dash_status.config(text=f"Folded {stats['transactions']:,} transactions for "
+                                f"{stats['accounts']:,} accounts in {stats['seconds']:.1f}s.")
+        reports.clear()
+        load_dashboard()
+        if dash_acc_field.get().strip():
+            show_account_history()
+    run_db(dash_busy, snapshots.refresh, on_done=_done, error_title='Snapshot error')
+
+def show_account_history():
+    """Show the daily closing balances of the account entered."""
+    try:
+        aid = int(dash_acc_field.get().strip())
+    except ValueError:
+        messagebox.showerror('Validation error', 'Account ID must be an integer.')
+        return
+    cancel_render(acc_day_table)
+    run_db(dash_busy, snapshots.account_history, aid, on_done=lambda rows: fill_table(acc_day_table, rows),
+           error_title='Dashboard error')
+
+def build_dashboard_tab():
+    """Create the snapshot buttons and the branch and account tables."""
+    global dash_status, branch_day_table, dash_acc_field, acc_day_table
+    btn_frame = ttk.Frame(dash_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(8, 0))
+    mkbtn(btn_frame, 'Update snapshots', command=update_snapshots, boot='success').pack(side='left')
+    mkbtn(btn_frame, 'Refresh', command=load_dashboard, boot='info').pack(side='left', padx=6)
+    dash_status = ttk.Label(btn_frame)
+    dash_status.pack(side='left', padx=6)
+
+    ttk.Label(dash_tab, text=f"Branch totals, last {DASHBOARD_DAYS} days").pack(anchor='w', padx=10, pady=(6, 0))
+    branch_day_table = make_table(dash_tab, ("Date","Branch","Txns","Accounts","Credits","Debits","Net"),
+                                  ("Date","Branch","Txns","Accounts","Credits","Debits","Net"))
+
+    acc_frame = ttk.Frame(dash_tab)
+    acc_frame.pack(anchor='w', padx=10)
+    ttk.Label(acc_frame, text="Daily balances for account").pack(side='left')
+    dash_acc_field = ttk.Entry(acc_frame, width=12)
+    dash_acc_field.pack(side='left', padx=6)
+    dash_acc_field.bind('<Return>', lambda e: show_account_history())
+    mkbtn(acc_frame, 'Show', command=show_account_history, boot='info').pack(side='left')
+    acc_day_table = make_table(dash_tab, ("Date","Txns","Net","Closing"), ("Date","Txns","Net","Closing balance"))
+
+tabs.add(dash_tab, "Dashboard", build_dashboard_tab, load_dashboard)
+
+# =================== REPORTS ===================
+
+report_tab = ttk.Frame(notebook)
+report_busy = BusyIndicator(report_tab)
+
+report_names = {r.title: name for name, r in reports.REPORTS.items()}
+
+def show_report(result):
+    """Show a `reports.Result`, re-creating the table columns for it."""
+    cols = tuple(f'c{i}' for i in range(len(result.columns)))
+    # drop the old rows before their columns change
+    render_rows(report_table, ())
+    report_table.configure(columns=cols)
+    for c, h in zip(cols, result.columns):
+        report_table.heading(c, text=h)
+        report_table.column(c, anchor='center')
+    at = datetime.datetime.fromtimestamp(result.generated_at).strftime('%H:%M:%S')
+    source = 'cached' if result.cached else f'{result.seconds:.2f}s'
+    fill_table(report_table, result.rows, status=report_status,
+               on_done=lambda: report_status.config(text=f"{len(result.rows):,} rows as of {at} ({source})"))
+
+def run_report(refresh=False):
+    """Run the selected report; cached results are reused unless `refresh`."""
+    name = report_names.get(report_choice.get())
+    if name is None:
+        return
+    try:
+        days = int(report_days.get().strip() or reports.DEFAULT_DAYS)
+        top = int(report_top.get().strip() or reports.DEFAULT_TOP)
+    except ValueError:
+        messagebox.showerror('Validation error', 'Days and Top must be integers.')
+        return
+    if days < 1 or top < 1:
+        messagebox.showerror('Validation error', 'Days and Top must be positive.')
+        return
+    # a newer request supersedes rows still being added for the previous one
+    cancel_render(report_table)
+    run_db(report_busy, reports.run, name, days, top, refresh, on_done=show_report, error_title='Report error')
+
+def build_reports_tab():
+    """Create the report selector and the result table."""
+    global report_choice, report_days, report_top, report_status, report_table
+    btn_frame = ttk.Frame(report_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(8, 0))
+    report_choice = ttk.Combobox(btn_frame, values=list(report_names), state='readonly', width=30)
+    report_choice.current(0)
+    report_choice.pack(side='left')
+    report_choice.bind('<<ComboboxSelected>>', lambda e: run_report())
+    ttk.Label(btn_frame, text="Days").pack(side='left', padx=(8, 2))
+    report_days = ttk.Entry(btn_frame, width=5)
+    report_days.insert(0, str(reports.DEFAULT_DAYS))
+    report_days.pack(side='left')
+    ttk.Label(btn_frame, text="Top").pack(side='left', padx=(8, 2))
+    report_top = ttk.Entry(btn_frame, width=5)
+    report_top.insert(0, str(reports.DEFAULT_TOP))
+    report_top.pack(side='left')
+    mkbtn(btn_frame, 'Run', command=run_report, boot='primary').pack(side='left', padx=(8, 0))
+    mkbtn(btn_frame, 'Refresh', command=lambda: run_report(refresh=True), boot='info').pack(side='left', padx=6)
+    report_status = ttk.Label(btn_frame)
+    report_status.pack(side='left', padx=6)
+
+    report_table = make_table(report_tab, ("c0",), ("",))
+
+# the report (cached when fresh) is re-run whenever the tab is opened
+tabs.add(report_tab, "Reports", build_reports_tab, on_show=run_report)
+
+# =================== DIAGNOSTICS ===================
+
+diag_tab = ttk.Frame(notebook)
+
+def refresh_diagnostics():
+    """Show per-statement timings, pool counters and recent slow queries."""
+    snap = instrument.snapshot()
+    pool = snap['pool']
+    cached = cache.snapshot()
+    diag_summary.config(text=(
+        f"Since {snap['since']}  |  slow threshold {snap['slow_threshold_ms']:.0f} ms  |  "
+        f"pool: {pool.get('in_use', '?')} in use, {pool.get('idle', '?')} idle, "
+        f"{pool.get('hits', 0)} hits, {pool.get('misses', 0)} misses, {pool.get('waits', 0)} waits  |  "
+        f"cache: {cached['entries']} entries, {cached['hits']} hits, {cached['misses']} misses"))
+    diag_table.delete(*diag_table.get_children())
+    for i, st in enumerate(snap['statements']):
+        diag_table.insert('', 'end', tags=('odd' if i % 2 else 'even',), values=(
+            st['template'], st['count'], st['errors'], st['rows'], f"{st['total_ms']:.0f}",
+            f"{st['avg_ms']:.1f}", f"{st['p95_ms']:.0f}", f"{st['max_ms']:.1f}", f"{st['avg_acquire_ms']:.2f}"))
+    slow_table.delete(*slow_table.get_children())
+    for i, q in enumerate(snap['slow_queries']):
+        slow_table.insert('', 'end', tags=('odd' if i % 2 else 'even',),
+                          values=(q['at'], f"{q['ms']:.1f}", q['rows'], q['error'] or '', q['sql']))
+
+def reset_diagnostics():
+    """Clear the collected timings."""
+    instrument.reset()
+    refresh_diagnostics()
+
+def export_diagnostics():
+    """Save the timings as JSON."""
+    path = filedialog.asksaveasfilename(title='Export diagnostics', defaultextension='.json',
+                                        filetypes=[('JSON', '*.json')])
+    if path:
+        instrument.dump(path)
+        messagebox.showinfo('Exported', f'Diagnostics written to {path}')
+
+def build_diagnostics_tab():
+    """Create the summary line, buttons and timing tables."""
+    global diag_summary, diag_table, slow_table
+    diag_summary = ttk.Label(diag_tab, anchor='w')
+    diag_summary.pack(fill='x', padx=10, pady=(8, 0))
+
+    btn_frame = ttk.Frame(diag_tab)
+    btn_frame.pack(anchor='w', padx=10, pady=(6, 0))
+
+    mkbtn(btn_frame, 'Refresh', command=refresh_diagnostics, boot='info').pack(side='left')
+    mkbtn(btn_frame, 'Reset', command=reset_diagnostics, boot='secondary').pack(side='left', padx=6)
+    mkbtn(btn_frame, 'Export JSON', command=export_diagnostics, boot='outline-primary').pack(side='left', padx=6)
+
+    diag_table = make_table(diag_tab, ("Statement","Calls","Errors","Rows","Total ms","Avg ms","p95 ms","Max ms","Acquire ms"),
+                            ("Statement","Calls","Errors","Rows","Total ms","Avg ms","p95 ms","Max ms","Acquire ms"))
+    diag_table.column("Statement", width=420, anchor='w')
+    ttk.Label(diag_tab, text="Slow queries").pack(anchor='w', padx=10)
+    slow_table = make_table(diag_tab, ("At","ms","Rows","Error","SQL"), ("At","ms","Rows","Error","SQL"))
+    slow_table.column("SQL", width=420, anchor='w')
+
+# refresh whenever the tab is opened
+tabs.add(diag_tab, "Diagnostics", build_diagnostics_tab, on_show=refresh_diagnostics)
 
 # ------------------- RUN -------------------
 
+# build and load the visible tab now; the others follow once the window is up
+tabs.ensure(notebook.select())
+_built = time.perf_counter()
+
+def _first_paint():
+    tabs.prefetch()
+    if STARTUP_TIMING:
+        painted = time.perf_counter()
+        print(f"startup: imports {(_imported - _started) * 1000:.0f} ms, "
+              f"UI build {(_built - _imported) * 1000:.0f} ms, "
+              f"first paint {(painted - _started) * 1000:.0f} ms", file=sys.stderr)
+
+def _mapped(event):
+    # every widget carries the root's binding tag; wait for the root itself
+    if event.widget is root:
+        root.unbind('<Map>', _map_binding)
+        root.after_idle(_first_paint)
+
+_map_binding = root.bind('<Map>', _mapped)
+
 root.mainloop()
@@ -0,0 +1,252 @@
+"""Archive closed months of ``[Transaction]``.
+
+``[Transaction]`` only grows, and page loads, searches and reports read
+it. This job keeps it to the *hot* window, the current month and the
+`HOT_MONTHS` - 1 before it. Older months are moved out in one of two
+ways:
+
+- ``to='table'`` (default) moves the rows to ``TransactionArchive``
+  (migration 0003). On SQL Server that table is page-compressed and
+  partitioned by month (``pfTransactionMonth``/``psTransactionMonth``).
+  The job adds the boundaries for each month before moving it, so
+  queries on a date range read only the partitions they need. Each
+  batch is a single ``DELETE ... OUTPUT deleted.* INTO
+  TransactionArchive``. On SQLite a batch is an ``INSERT ... SELECT``
+  followed by a ``DELETE``.
+- ``to='files'`` writes each month to a gzip-compressed CSV file
+  (``Transaction_2024-01.csv.gz``, with a header row) and then deletes
+  the rows it wrote.
+
+The ``TransactionHistory`` view unions ``[Transaction]`` and
+``TransactionArchive``. Statements, reports and the snapshots read it.
+The Transaction tab shows the hot rows unless "Include history" is
+ticked. Rows exported to files are no longer in the database.
+
+Only transactions already folded into the daily snapshots are moved
+(`snapshots.refresh()` runs first), so the snapshot totals stay
+complete.
+
+Usage::
+
+    python archive.py                      # archive everything before the hot window
+    python archive.py --hot-months 6
+    python archive.py --before 2024-01-01 --to files --dir /backup/transactions
+"""
+
+import argparse
+import csv
+import datetime
+import gzip
+import os
+import sys
+import time
+
+import instrument
+import snapshots
+from data import stream
+from db import get_backend, get_pool
+
+# Months kept in [Transaction], counting the current one.
+HOT_MONTHS = 3
+
+# Rows moved or deleted per statement; below SQL Server's lock escalation
+# threshold (5,000 locks), so archiving does not lock the whole table.
+BATCH_SIZE = 4000
+
+# Default directory for ``to='files'``.
+ARCHIVE_DIR = 'archive'
+
+COLUMNS = ('TransactionId', 'AccountId', 'EmpId', 'Amount', 'Status', 'TransactionDate', 'TransactionTime')
+
+PARTITION_FUNCTION = 'pfTransactionMonth'
+PARTITION_SCHEME = 'psTransactionMonth'
+
+_COLS = ', '.join(COLUMNS)
+_MONTH = 'TransactionDate >= ? AND TransactionDate < ? AND TransactionId <= ?'
+
+
+def cutoff(hot_months=HOT_MONTHS, today=None):
+    """Return the first day of the oldest hot month; earlier months are closed."""
+    if hot_months < 1:
+        raise ValueError('hot_months must be at least 1')
+    today = today or datetime.date.today()
+    months = today.year * 12 + today.month - 1 - (hot_months - 1)
+    return datetime.date(months // 12, months % 12 + 1, 1)
+
+
+def archive(before=None, to='table', directory=ARCHIVE_DIR, batch_size=BATCH_SIZE):
+    """Move the transactions dated before `before` out of ``[Transaction]``.
+
+    Args:
+        before (datetime.date): first day kept; rounded down to the start
+            of its month. Defaults to `cutoff()`.
+        to (str): ``'table'`` for ``TransactionArchive`` or ``'files'``
+            for gzip CSV files in `directory`.
+        directory (str): where ``to='files'`` writes.
+        batch_size (int): rows per statement.
+
+    Returns:
+        list: one dict per archived month with ``month`` (its first
+        day), ``rows``, ``path`` (the file written, or None) and
+        ``seconds``.
+
+    Raises:
+        ValueError: `before` is in the current month or later, or an
+            unknown `to`.
+        RuntimeError: a month changed while it was exported to a file;
+            nothing was deleted for it.
+    """
+    if to not in ('table', 'files'):
+        raise ValueError(f'unknown archive target {to!r}')
+    before = cutoff() if before is None else before.replace(day=1)
+    if before > cutoff(1):
+        raise ValueError('only months before the current one can be archived')
+    # only rows already in the snapshots may leave [Transaction]
+    watermark = snapshots.refresh()['watermark']
+    backend = get_backend()
+    results = []
+    for start, end in _months(backend, before):
+        started = time.perf_counter()
+        if to == 'table':
+            rows, path = _to_table(backend, start, end, watermark, batch_size), None
+        else:
+            rows, path = _to_file(start, end, watermark, batch_size, directory)
+        if rows:
+            results.append({'month': start, 'rows': rows, 'path': path,
+                            'seconds': time.perf_counter() - started})
+    return results
+
+
+def _months(backend, before):
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        cur.execute(backend.limit(
+            'SELECT TransactionDate FROM [Transaction] WHERE TransactionDate < ? ORDER BY TransactionDate', 1),
+            (before,))
+        first = cur.fetchone()
+    if first is None:
+        return
+    start = first[0].replace(day=1)
+    while start < before:
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        yield start, end
+        start = end
+
+
+def _to_table(backend, start, end, watermark, batch_size):
+    params = (start, end, watermark)
+    moved = 0
+    with instrument.statement('archive.month') as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        if backend.name == 'mssql':
+            _add_boundaries(cur, (start, end))
+            conn.commit()
+        while True:
+            if backend.name == 'mssql':
+                cur.execute(f'DELETE TOP (?) FROM [Transaction] '
+                            f'OUTPUT {", ".join("deleted." + c for c in COLUMNS)} '
+                            f'INTO TransactionArchive ({_COLS}) WHERE {_MONTH}', (batch_size,) + params)
+            else:
+                cur.execute(backend.limit(
+                    f'SELECT TransactionId FROM [Transaction] WHERE {_MONTH} ORDER BY TransactionId',
+                    batch_size), params)
+                ids = cur.fetchall()
+                if not ids:
+                    break
+                batch = params + (ids[-1][0],)
+                cur.execute(f'INSERT INTO TransactionArchive ({_COLS}) '
+                            f'SELECT {_COLS} FROM [Transaction] WHERE {_MONTH} AND TransactionId <= ?', batch)
+                cur.execute(f'DELETE FROM [Transaction] WHERE {_MONTH} AND TransactionId <= ?', batch)
+            count = cur.rowcount
+            conn.commit()
+            moved += count
+            if count < batch_size:
+                break
+        t.executed(moved)
+    return moved
+
+
+def _add_boundaries(cur, days):
+    # an empty month is split off before rows arrive, so no data moves
+    cur.execute('SELECT CAST(v.value AS DATE) FROM sys.partition_range_values v '
+                'JOIN sys.partition_functions f ON f.function_id = v.function_id WHERE f.name = ?',
+                (PARTITION_FUNCTION,))
+    existing = {row[0] for row in cur.fetchall()}
+    for day in days:
+        if day not in existing:
+            cur.execute(f'ALTER PARTITION SCHEME {PARTITION_SCHEME} NEXT USED [PRIMARY]')
+            cur.execute(f"ALTER PARTITION FUNCTION {PARTITION_FUNCTION}() SPLIT RANGE ('{day.isoformat()}')")
+
+
+def _to_file(start, end, watermark, batch_size, directory):
+    params = (start, end, watermark)
+    os.makedirs(directory, exist_ok=True)
+    path = _file_name(directory, start)
+    partial = path + '.part'
+    # (first id, last id, rows) of each delete batch, in id order
+    ranges = []
+    rows = stream(f'SELECT {_COLS} FROM [Transaction] WHERE {_MONTH} ORDER BY TransactionId', params)
+    with gzip.open(partial, 'wt', encoding='utf-8', newline='') as fh:
+        out = csv.writer(fh)
+        out.writerow(COLUMNS)
+        for row in rows:
+            out.writerow(['' if v is None else v for v in row])
+            if not ranges or ranges[-1][2] >= batch_size:
+                ranges.append([row[0], row[0], 0])
+            ranges[-1][1] = row[0]
+            ranges[-1][2] += 1
+    if not ranges:
+        os.remove(partial)
+        return 0, None
+    os.replace(partial, path)
+    # delete exactly the rows written, all or nothing
+    with instrument.statement('archive.month') as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        for first, last, count in ranges:
+            cur.execute(f'DELETE FROM [Transaction] WHERE {_MONTH} AND TransactionId BETWEEN ? AND ?',
+                        params + (first, last))
+            if cur.rowcount != count:
+                conn.rollback()
+                os.remove(path)
+                raise RuntimeError(f'{start:%Y-%m}: transactions {first}-{last} changed during the export; '
+                                   'nothing was deleted, run the archive again')
+        conn.commit()
+        t.executed(sum(r[2] for r in ranges))
+    return sum(r[2] for r in ranges), path
+
+
+def _file_name(directory, start):
+    # a month archived again (late rows) gets a numbered part file
+    base = os.path.join(directory, f'Transaction_{start:%Y-%m}')
+    path, n = base + '.csv.gz', 1
+    while os.path.exists(path):
+        n += 1
+        path = f'{base}_{n}.csv.gz'
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Move closed months of transactions out of [Transaction].')
+    parser.add_argument('--hot-months', type=int, default=HOT_MONTHS,
+                        help='months kept, counting the current one (default %(default)s)')
+    parser.add_argument('--before', type=datetime.date.fromisoformat,
+                        help='archive months before this date (YYYY-MM-DD) instead')
+    parser.add_argument('--to', choices=('table', 'files'), default='table')
+    parser.add_argument('--dir', default=ARCHIVE_DIR, help='directory for --to files (default %(default)s)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    before = args.before or cutoff(args.hot_months)
+    results = archive(before, args.to, args.dir, args.batch_size)
+    for r in results:
+        where = r['path'] or 'TransactionArchive'
+        print(f"{r['month']:%Y-%m}  {r['rows']:>10,} rows  {r['seconds']:6.1f}s  -> {where}", file=sys.stderr)
+    if not results:
+        print(f'nothing to archive before {before}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,347 @@
+"""Database backend implementations.
+
+A backend bundles everything that differs between database engines:
+how to open a connection, the DB-API paramstyle, dialect-specific SQL
+fragments (current date/time, locking hints, row limits) and how to
+read back the identity value of the last insert.
+
+Two backends are provided:
+
+- `MSSQLBackend` — the production SQL Server database via `pyodbc`.
+- `SQLiteBackend` — an in-process database built from `Schema.sql`, for
+  local/offline runs, CI and benchmarks (no ODBC driver required).
+
+SQL in the application is written once with ``{name}`` placeholders for
+the fragments that differ (see `Backend.render`), e.g.
+``"INSERT ... VALUES (?, {today})"``.
+"""
+
+import datetime
+import os
+import re
+import sqlite3
+import threading
+from decimal import Decimal
+
+SCHEMA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Schema.sql')
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+_SELECT_HEAD = re.compile(r'^\s*SELECT(\s+DISTINCT)?\s', re.IGNORECASE)
+_INSERT_VALUES = re.compile(r'\)\s*(VALUES\b)', re.IGNORECASE)
+_DELETE_WHERE = re.compile(r'\s(WHERE\b)', re.IGNORECASE)
+
+_CENT = Decimal('0.01')
+
+
+class Backend:
+    """Base class describing a database engine.
+
+    Subclasses set `name`, `fragments` and implement `connect`.
+    """
+
+    name = ''
+    paramstyle = 'qmark'
+    fragments = {}
+    # upper bound on concurrently open connections, or None for no limit
+    max_connections = None
+
+    def connect(self):
+        """Open and return a new DB-API connection."""
+        raise NotImplementedError
+
+    def render(self, sql):
+        """Substitute ``{fragment}`` placeholders with this dialect's SQL.
+
+        Unknown names are left untouched so literal braces survive.
+        """
+        return _PLACEHOLDER.sub(
+            lambda m: self.fragments.get(m.group(1), m.group(0)), sql)
+
+    def limit(self, sql, n):
+        """Return `sql` (a SELECT) restricted to at most `n` rows."""
+        raise NotImplementedError
+
+    def last_insert_id(self, cur):
+        """Return the identity value generated by the last INSERT on `cur`."""
+        raise NotImplementedError
+
+    def prepare_bulk(self, cur):
+        """Configure `cur` for large `executemany` batches (no-op by default)."""
+        return cur
+
+    def update_returning(self, table, assignments, where, column):
+        """Build an UPDATE that locks the row and returns `column` after the change.
+
+        Executing it yields one row per updated record, so callers learn
+        both whether the predicate matched and the new value in a single
+        round-trip.
+        """
+        raise NotImplementedError
+
+    def insert_returning(self, sql, column):
+        """Turn the INSERT `sql` into one that returns the new row's `column`.
+
+        Unlike `last_insert_id`, no second statement runs on the cursor,
+        so a cursor kept for the INSERT stays prepared for it.
+        """
+        raise NotImplementedError
+
+    def delete_returning(self, sql, column):
+        """Turn the ``DELETE ... WHERE`` `sql` into one that returns `column` of each deleted row."""
+        raise NotImplementedError
+
+    def is_deadlock(self, exc):
+        """Return True if `exc` means the transaction lost a lock conflict.
+
+        The work can then be rolled back and retried as a whole.
+        """
+        return False
+
+    def is_integrity_error(self, exc):
+        """Return True if `exc` is a constraint violation by the statement's data.
+
+        e.g. an unknown foreign key or a failed CHECK; the transaction
+        itself is still usable.
+        """
+        return False
+
+
+class MSSQLBackend(Backend):
+    """SQL Server over ODBC (`pyodbc`)."""
+
+    name = 'mssql'
+    fragments = {
+        'now': 'GETDATE()',
+        'today': 'CAST(GETDATE() AS DATE)',
+        'time_now': 'CAST(GETDATE() AS TIME)',
+        'rowlock': 'WITH (UPDLOCK, ROWLOCK)',
+    }
+
+    # Use ODBC Driver 17 for SQL Server with Windows authentication
+    DEFAULT_CONNECTION_STRING = (
+        "DRIVER={ODBC Driver 17 for SQL Server};"
+        "SERVER=localhost;"
+        "DATABASE=Bank;"
+        "Trusted_Connection=yes;"
+    )
+
+    def __init__(self, connection_string=None):
+        self.connection_string = connection_string or self.DEFAULT_CONNECTION_STRING
+
+    def connect(self):
+        import pyodbc
+        return pyodbc.connect(self.connection_string)
+
+    def limit(self, sql, n):
+        n = int(n)
+        m = _SELECT_HEAD.match(sql)
+        if not m:
+            raise ValueError('limit() expects a SELECT statement')
+        return f"SELECT{m.group(1) or ''} TOP ({n}) " + sql[m.end():]
+
+    def last_insert_id(self, cur):
+        # SCOPE_IDENTITY() is NULL in a separate batch under pyodbc's
+        # prepared execution; @@IDENTITY is per-connection and the
+        # schema has no triggers that could change it.
+        cur.execute('SELECT @@IDENTITY')
+        value = cur.fetchone()[0]
+        return None if value is None else int(value)
+
+    def prepare_bulk(self, cur):
+        # send the whole parameter array in one round-trip
+        cur.fast_executemany = True
+        return cur
+
+    def update_returning(self, table, assignments, where, column):
+        return (f"UPDATE {table} {self.fragments['rowlock']} SET {assignments} "
+                f"OUTPUT inserted.{column} WHERE {where}")
+
+    def insert_returning(self, sql, column):
+        m = _INSERT_VALUES.search(sql)
+        if not m:
+            raise ValueError('insert_returning() expects INSERT ... (columns) VALUES')
+        return f'{sql[:m.start(1)].rstrip()} OUTPUT inserted.{column} {sql[m.start(1):]}'
+
+    def delete_returning(self, sql, column):
+        m = _DELETE_WHERE.search(sql)
+        if not m:
+            raise ValueError('delete_returning() expects DELETE ... WHERE')
+        return f'{sql[:m.start(1)].rstrip()} OUTPUT deleted.{column} {sql[m.start(1):]}'
+
+    def is_deadlock(self, exc):
+        # error 1205 (deadlock victim) is reported with SQLSTATE 40001
+        args = getattr(exc, 'args', ())
+        return bool(args) and (args[0] == '40001' or '(1205)' in str(exc))
+
+    def is_integrity_error(self, exc):
+        # class 23 SQLSTATEs: FK, CHECK, NOT NULL and unique violations
+        args = getattr(exc, 'args', ())
+        return bool(args) and isinstance(args[0], str) and args[0].startswith('23')
+
+
+class SQLiteBackend(Backend):
+    """In-process SQLite database with the `Schema.sql` tables.
+
+    Pending migrations from `migrations/` are applied on first connect.
+
+    SQLite has no exact decimal type: ``DECIMAL(18,2)`` columns have
+    NUMERIC affinity and hold money as INTEGER or REAL. Every statement
+    that computes a stored amount rounds it to 2 places, so a stored
+    value is always the double nearest to its amount in cents and reads
+    back (through the DECIMAL converter) as that exact `Decimal`.
+
+    Args:
+        path (str): database file, or ``':memory:'`` for a private
+            in-memory database. In-memory databases use SQLite's shared
+            cache, whose table locks do not wait, so they are limited to
+            one connection at a time; use a file for concurrent work.
+        schema_file (str): T-SQL DDL to translate and load when the
+            database is empty.
+    """
+
+    name = 'sqlite'
+    fragments = {
+        'now': "DATETIME('now', 'localtime')",
+        'today': "DATE('now', 'localtime')",
+        'time_now': "TIME('now', 'localtime')",
+        'rowlock': '',
+    }
+
+    _memory_seq = 0
+
+    def __init__(self, path=':memory:', schema_file=SCHEMA_FILE):
+        self.schema_file = schema_file
+        self._lock = threading.Lock()
+        self._ready = False
+        self._anchor = None
+        if path == ':memory:':
+            SQLiteBackend._memory_seq += 1
+            # a named shared-cache database lives as long as one
+            # connection to it is open; `_anchor` keeps it alive
+            self._target = f'file:bank_mem_{os.getpid()}_{SQLiteBackend._memory_seq}?mode=memory&cache=shared'
+            self.max_connections = 1
+        else:
+            self._target = 'file:' + os.path.abspath(path)
+        self.path = path
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self._target,
+            uri=True,
+            timeout=30.0,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        conn.execute('PRAGMA foreign_keys = ON')
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._bootstrap(conn)
+                    self._ready = True
+        return conn
+
+    def _bootstrap(self, conn):
+        if self.path == ':memory:':
+            self._anchor = sqlite3.connect(self._target, uri=True, check_same_thread=False)
+        else:
+            conn.execute('PRAGMA journal_mode = WAL')
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'Account'"
+        ).fetchone()
+        if not exists:
+            with open(self.schema_file, encoding='utf-8') as fh:
+                conn.executescript(translate_ddl(fh.read()))
+            conn.commit()
+        # bring the local database to the latest schema version
+        from migrate import upgrade
+        upgrade(conn, self)
+
+    def limit(self, sql, n):
+        return f'{sql} LIMIT {int(n)}'
+
+    def last_insert_id(self, cur):
+        return cur.lastrowid
+
+    def update_returning(self, table, assignments, where, column):
+        # SQLite takes a write lock on the whole database for the update
+        return f'UPDATE {table} SET {assignments} WHERE {where} RETURNING {column}'
+
+    def insert_returning(self, sql, column):
+        return f'{sql} RETURNING {column}'
+
+    def delete_returning(self, sql, column):
+        return f'{sql} RETURNING {column}'
+
+    def is_deadlock(self, exc):
+        # a busy timeout, or a WAL snapshot that another writer overtook
+        return isinstance(exc, sqlite3.OperationalError) and 'locked' in str(exc)
+
+    def is_integrity_error(self, exc):
+        return isinstance(exc, sqlite3.IntegrityError)
+
+
+def translate_ddl(tsql):
+    """Translate the T-SQL in `Schema.sql` into SQLite-compatible DDL.
+
+    SQLite already accepts ``[Transaction]`` quoting, NVARCHAR/BIT/DECIMAL
+    type names and named constraints; only IDENTITY keys need rewriting.
+    """
+    return re.sub(r'\bINT\s+IDENTITY(\s*\(\s*\d+\s*,\s*\d+\s*\))?\s+PRIMARY\s+KEY',
+                  'INTEGER PRIMARY KEY AUTOINCREMENT', tsql, flags=re.IGNORECASE)
+
+
+def _convert_decimal(raw):
+    # every DECIMAL column is DECIMAL(18,2); pyodbc returns them with
+    # two places
+    return Decimal(raw.decode()).quantize(_CENT)
+
+
+def _convert_date(raw):
+    text = raw.decode()
+    try:
+        return datetime.date.fromisoformat(text[:10])
+    except ValueError:
+        return text
+
+
+def _convert_datetime(raw):
+    text = raw.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+def _convert_time(raw):
+    text = raw.decode()
+    try:
+        return datetime.time.fromisoformat(text)
+    except ValueError:
+        return text
+
+
+# Store Decimal/date/time values as ISO text and read them back as the
+# same native types pyodbc returns for the SQL Server columns.
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_adapter(datetime.date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime.datetime, lambda d: d.isoformat(' '))
+sqlite3.register_adapter(datetime.time, lambda t: t.isoformat())
+sqlite3.register_converter('DECIMAL', _convert_decimal)
+sqlite3.register_converter('DATE', _convert_date)
+sqlite3.register_converter('DATETIME', _convert_datetime)
+sqlite3.register_converter('TIME', _convert_time)
+
+
+BACKENDS = {
+    'mssql': MSSQLBackend,
+    'sqlite': SQLiteBackend,
+}
+
+
+def create_backend(name, **options):
+    """Instantiate a backend by name (``'mssql'`` or ``'sqlite'``)."""
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f'unknown database backend {name!r}; choose from {sorted(BACKENDS)}')
+    return cls(**options)
@@ -0,0 +1,181 @@
+"""Load-test driver replaying the application's CRUD operations.
+
+Runs a weighted mix of the statements `app.py` issues — table page
+loads, inserts, edits, postings and deletes — from several threads
+against the active backend, then reports throughput and p50/p99
+latency per operation. Populate the database first, e.g. with
+`datagen.py`.
+
+Usage::
+
+    python bench.py --ops 20000 --threads 8
+    BANK_DB_BACKEND=sqlite BANK_SQLITE_PATH=bench.db python bench.py --duration 30
+"""
+
+import argparse
+import math
+import random
+import threading
+import time
+
+import queries
+from data import execute, fetch
+from paging import PageQuery
+from posting import PostingError, cancel_many, post
+
+# operation name -> relative weight in the mix
+MIX = {
+    'load_accounts_page': 20,
+    'load_txns_page': 20,
+    'load_customers_page': 8,
+    'post_txn': 25,
+    'add_customer': 5,
+    'add_account': 5,
+    'edit_account': 7,
+    'edit_customer': 5,
+    'delete_txns': 5,
+}
+
+_ACCOUNTS = PageQuery('Account', ('AccountId', 'IBAN', 'CustomerId', 'BranchId', 'Balance'), 'AccountId')
+_TXNS = PageQuery('[Transaction]', ('TransactionId', 'AccountId', 'EmpId', 'Amount', 'TransactionDate'),
+                  'TransactionId')
+_CUSTOMERS = PageQuery('Customer', ('CustomerId', 'SSN', 'Job'), 'CustomerId')
+
+
+class Workload:
+    """Key ranges sampled by the operations, read once before the run."""
+
+    def __init__(self):
+        def bounds(table, key):
+            lo, hi = fetch(f'SELECT MIN({key}), MAX({key}) FROM {table}')[0]
+            if lo is None:
+                raise SystemExit(f'{table} is empty; load data first (see datagen.py)')
+            return lo, hi
+        self.accounts = bounds('Account', 'AccountId')
+        self.customers = bounds('Customer', 'CustomerId')
+        self.employees = bounds('Employee', 'EmpId')
+        self.branches = bounds('Branch', 'BranchId')
+        self.txns = bounds('[Transaction]', 'TransactionId')
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def unique(self):
+        with self._lock:
+            self._seq += 1
+            return f'{time.time_ns():x}-{self._seq}'
+
+
+def _op(name, w, rng):
+    if name == 'load_accounts_page':
+        _ACCOUNTS.page(after=rng.randint(*w.accounts) - 1)
+    elif name == 'load_txns_page':
+        _TXNS.page(after=rng.randint(*w.txns) - 1)
+    elif name == 'load_customers_page':
+        _CUSTOMERS.page(after=rng.randint(*w.customers) - 1)
+    elif name == 'post_txn':
+        try:
+            post(rng.randint(*w.accounts), rng.randint(*w.employees), round(rng.uniform(-200, 500), 2))
+        except PostingError:
+            pass
+    elif name == 'add_customer':
+        queries.run('customer.insert', (f'B{w.unique()}'[:20], 'Bench'))
+    elif name == 'add_account':
+        queries.run('account.insert',
+                    (f'BENCH{w.unique()}', rng.randint(*w.customers), rng.randint(*w.branches), 0.0))
+    elif name == 'edit_account':
+        execute('UPDATE Account SET Status=? WHERE AccountId=?',
+                (rng.choice(('Open', 'Frozen')), rng.randint(*w.accounts)))
+    elif name == 'edit_customer':
+        execute('UPDATE Customer SET Job=? WHERE CustomerId=?', ('Bench', rng.randint(*w.customers)))
+    elif name == 'delete_txns':
+        start = rng.randint(*w.txns)
+        cancel_many(range(start, start + 5))
+    else:
+        raise ValueError(f'unknown operation {name!r}')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    k = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(k, len(sorted_values) - 1)]
+
+
+def run(ops=None, duration=None, threads=4, seed=1, mix=MIX):
+    """Run the workload and return ``(latencies, errors, elapsed)``.
+
+    `latencies` maps operation name to a list of seconds; `errors` maps
+    operation name to a count. Stops after `ops` operations in total or
+    `duration` seconds, whichever is given.
+    """
+    workload = Workload()
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    latencies = {n: [] for n in names}
+    errors = {n: 0 for n in names}
+    lock = threading.Lock()
+    remaining = [ops if ops is not None else float('inf')]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        local = {n: [] for n in names}
+        local_errors = {n: 0 for n in names}
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            name = rng.choices(names, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                _op(name, workload, rng)
+            except Exception:
+                local_errors[name] += 1
+            local[name].append(time.perf_counter() - t0)
+        with lock:
+            for n in names:
+                latencies[n].extend(local[n])
+                errors[n] += local_errors[n]
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return latencies, errors, time.perf_counter() - started
+
+
+def report(latencies, errors, elapsed):
+    """Print a per-operation latency table and the overall throughput."""
+    total = sum(len(v) for v in latencies.values())
+    print(f"{'operation':<22}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        print(f'{name:<22}{len(values):>8}{errors[name]:>8}'
+              f'{percentile(values, 50) * 1000:>10.2f}{percentile(values, 99) * 1000:>10.2f}'
+              f'{values[-1] * 1000:>10.2f}')
+    every = sorted(v for values in latencies.values() for v in values)
+    print(f'total {total} ops in {elapsed:.2f}s: {total / elapsed:,.0f} ops/s, '
+          f'p50 {percentile(every, 50) * 1000:.2f} ms, p99 {percentile(every, 99) * 1000:.2f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a CRUD mix and report latency percentiles.')
+    parser.add_argument('--ops', type=int, help='total operations (default 10000 unless --duration)')
+    parser.add_argument('--duration', type=float, help='run for this many seconds instead')
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    ops = args.ops if args.ops is not None or args.duration else 10000
+    report(*run(ops, args.duration, args.threads, args.seed))
+
+
+if __name__ == '__main__':
+    main()
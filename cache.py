@@ -0,0 +1,132 @@
+"""Read-through cache for the reference tables.
+
+Department, Branch and Employee change rarely but are listed on every
+tab load and checked on every foreign-key lookup. `fetch` serves
+queries on those tables from memory: results are keyed by table, SQL
+text and parameters, expire after `TTL` seconds and the least recently
+used entries are dropped beyond `MAX_ENTRIES`.
+
+Writes through `data.execute`, `data.insert`, `data.delete_many` and
+`queries.run` call `invalidate_sql`, which drops every entry of the
+table the statement writes to. Changes made outside this process are
+picked up when the entries expire.
+"""
+
+import collections
+import re
+import threading
+import time
+
+# Tables served from the cache (compared case-insensitively, without
+# brackets or schema).
+CACHED_TABLES = ('Department', 'Branch', 'Employee')
+
+# Seconds before a cached result is re-read from the database.
+TTL = 300.0
+
+# Maximum number of cached results across all tables.
+MAX_ENTRIES = 256
+
+_WRITE_TARGET = re.compile(
+    r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|DELETE|MERGE\s+INTO|MERGE|TRUNCATE\s+TABLE)\s+'
+    r'(?:\[?\w+\]?\.)?\[?(\w+)\]?', re.IGNORECASE)
+
+_cached = {t.lower() for t in CACHED_TABLES}
+_entries = collections.OrderedDict()   # (table, sql, params) -> (expires, rows)
+_generation = collections.Counter()    # table -> invalidation count
+_lock = threading.Lock()
+stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+
+def table_name(table):
+    """Normalize ``'[dbo].[Branch]'``-style names to ``'branch'``."""
+    return table.rsplit('.', 1)[-1].strip('[]').lower()
+
+
+def is_cached(table):
+    return table_name(table) in _cached
+
+
+def fetch(table, query, params=(), fetcher=None):
+    """Return the rows of `query`, from memory if `table` is cached.
+
+    `table` is the table `query` reads from. Queries on tables not in
+    `CACHED_TABLES` go straight to `fetcher` (default `data.fetch`). A
+    list result is copied, so the caller may modify it; other results
+    (e.g. `data.ResultSet`) are shared and must not be modified.
+    """
+    if fetcher is None:
+        from data import fetch as fetcher
+    name = table_name(table)
+    if name not in _cached:
+        return fetcher(query, params)
+    rows = _load((name, query, tuple(params), fetcher), lambda: fetcher(query, params))
+    return list(rows) if isinstance(rows, list) else rows
+
+
+def keys(table, column):
+    """Return the frozenset of `column` values in `table` (e.g. for FK checks)."""
+    from data import fetch as fetch_rows
+    query = f'SELECT {column} FROM {table}'
+    load = lambda: frozenset(row[0] for row in fetch_rows(query))
+    name = table_name(table)
+    if name not in _cached:
+        return load()
+    return _load((name, query, 'keys'), load)
+
+
+def _load(key, loader):
+    name = key[0]
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > now:
+            _entries.move_to_end(key)
+            stats['hits'] += 1
+            return entry[1]
+        stats['misses'] += 1
+        generation = _generation[name]
+    value = loader()
+    with _lock:
+        # a write that landed while we were reading makes the value stale
+        if _generation[name] == generation:
+            _entries[key] = (now + TTL, value)
+            _entries.move_to_end(key)
+            while len(_entries) > MAX_ENTRIES:
+                _entries.popitem(last=False)
+    return value
+
+
+def invalidate(table=None):
+    """Drop cached results for `table`, or for every table."""
+    name = None if table is None else table_name(table)
+    if name is not None and name not in _cached:
+        return
+    with _lock:
+        stats['invalidations'] += 1
+        if name is None:
+            _generation.update(_cached)
+            _entries.clear()
+            return
+        _generation[name] += 1
+        for key in [k for k in _entries if k[0] == name]:
+            del _entries[key]
+
+
+def invalidate_sql(query):
+    """Invalidate the table written by an INSERT/UPDATE/DELETE/MERGE.
+
+    Statements whose target cannot be determined (procedure calls,
+    batches) invalidate everything.
+    """
+    m = _WRITE_TARGET.match(query)
+    if m is None:
+        invalidate()
+    elif m.group(1).lower() in _cached:
+        invalidate(m.group(1))
+
+
+def snapshot():
+    """Return hit/miss counters and the number of cached results."""
+    with _lock:
+        return dict(stats, entries=len(_entries))
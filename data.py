@@ -2,46 +2,274 @@
 
 This module exposes two convenience functions used throughout the
 application: `execute` for commands that modify data, and `fetch` for
-retrieving query results. Both functions obtain a connection from
-`db.get_connection()` and ensure the connection is closed after use.
+retrieving query results. Both functions borrow a connection from the
+shared pool (`db.get_pool()`) and return it when finished, so repeated
+calls reuse open connections instead of logging in each time. `stream`
+is the constant-memory counterpart of `fetch` for large results, and
+`fetch_result` returns a column-wise `ResultSet` of native values for
+the table views.
+
+Every call is timed through `instrument` (connection acquisition,
+execute and fetch separately); see the Diagnostics tab or
+`instrument.dump()`. Writes invalidate the reference-table cache
+(`cache.py`) for the table they modify.
 """
 
-from db import get_connection
+import re
+import time
+
+import cache
+import instrument
+from db import get_backend, get_pool
+
+# Rows pulled from the driver per `fetchmany` call in `stream`.
+STREAM_CHUNK_SIZE = 1000
+
+# Largest number of keys bound into a single `IN (...)` list. SQL Server
+# accepts at most 2100 parameters per statement.
+DELETE_CHUNK_SIZE = 500
+
+_KEY_PREDICATE = re.compile(r'^(?P<head>.*\S)\s*=\s*\?\s*;?\s*$', re.DOTALL)
+_MISSING = 'no longer exists'
 
 
 def execute(query, params=()):
     """Execute a write/update/delete SQL statement.
 
-    Opens a connection, executes the provided parameterized query,
-    commits the transaction and closes the connection. Exceptions are
-    propagated to the caller.
+    Borrows a pooled connection, executes the provided parameterized
+    query and commits the transaction. Exceptions are propagated to the
+    caller; the connection is rolled back and returned to the pool.
 
     Args:
         query (str): SQL statement with placeholders (e.g. ? for pyodbc).
         params (tuple): parameters to bind to the query.
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    # perform the operation and persist changes
-    cur.execute(query, params)
-    conn.commit()
-    # ensure we always close the connection to release resources
-    conn.close()
+    with instrument.statement(query) as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        # perform the operation and persist changes
+        cur.execute(query, params)
+        conn.commit()
+        t.executed(cur.rowcount)
+    cache.invalidate_sql(query)
+
+
+def insert(query, params=()):
+    """Execute an INSERT into a table with an IDENTITY key and return the new id.
+
+    Args:
+        query (str): parameterized INSERT statement.
+        params (tuple): parameters to bind to the query.
+
+    Returns:
+        int: identity value generated for the inserted row.
+    """
+    with instrument.statement(query) as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        new_id = get_backend().last_insert_id(cur)
+        conn.commit()
+        t.executed(1)
+    cache.invalidate_sql(query)
+    return new_id
 
 
-def fetch(query):
+def fetch(query, params=()):
     """Execute a read-only SQL query and return all rows.
 
     Args:
         query (str): SQL select statement to execute.
+        params (tuple): parameters to bind to the query.
 
     Returns:
         list: sequence of rows returned by the query (pyodbc.Row objects).
     """
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(query)
-    rows = cur.fetchall()
-    # close the connection before returning results
-    conn.close()
-    return rows
+    with instrument.statement(query) as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        t.executed()
+        rows = cur.fetchall()
+        t.rows = len(rows)
+        return rows
+
+
+def fetch_result(query, params=()):
+    """Execute a read-only SQL query and return a `ResultSet`.
+
+    Args:
+        query (str): SQL select statement to execute.
+        params (tuple): parameters to bind to the query.
+
+    Returns:
+        ResultSet: the rows, stored column-wise with native types.
+    """
+    with instrument.statement(query) as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        cur.execute(query, params)
+        t.executed()
+        result = ResultSet([d[0] for d in cur.description], cur.fetchall())
+        t.rows = len(result)
+        return result
+
+
+class ResultSet:
+    """Query rows held column-wise, with the driver's native value types.
+
+    Values are kept as returned (`int`, `Decimal`, `datetime`, ...) and
+    only formatted for display when a row is shown. Storing one list per
+    column instead of one row object per row keeps large results small.
+    Indexing and iteration yield plain tuples; a `ResultSet` is not
+    modified after construction.
+
+    Args:
+        columns (sequence): column names.
+        rows (iterable): row sequences, each with one value per column.
+    """
+
+    __slots__ = ('columns', '_data', '_count')
+
+    def __init__(self, columns, rows):
+        self.columns = tuple(columns)
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        self._count = len(rows)
+        if rows:
+            self._data = tuple(list(col) for col in zip(*rows))
+        else:
+            self._data = tuple([] for _ in self.columns)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return zip(*self._data) if self.columns else iter(())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultSet(self.columns, list(self)[index])
+        return tuple(col[index] for col in self._data)
+
+    def __repr__(self):
+        return f'<ResultSet {len(self)} rows x {len(self.columns)} columns>'
+
+    def column(self, name):
+        """Return the values of column `name` as a list (do not modify it)."""
+        return self._data[self.columns.index(name)]
+
+    def reversed(self):
+        """Return a new `ResultSet` with the rows in reverse order."""
+        return ResultSet(self.columns, list(self)[::-1])
+
+    @classmethod
+    def concat(cls, columns, results):
+        """Join several result sets with the same columns into one."""
+        return cls(columns, [row for result in results for row in result])
+
+
+def stream(query, params=(), chunk_size=STREAM_CHUNK_SIZE):
+    """Yield the rows of a query without materializing the whole result.
+
+    Rows are pulled from the driver `chunk_size` at a time with
+    `fetchmany`. The pooled connection stays checked out until the
+    generator is exhausted or closed, so consume it promptly (or wrap it
+    in `contextlib.closing`) and do not hold it across UI events.
+
+    Args:
+        query (str): SQL select statement to execute.
+        params (tuple): parameters to bind to the query.
+        chunk_size (int): rows fetched per round-trip.
+
+    Yields:
+        one row at a time.
+    """
+    # fetch time counts only the fetchmany calls, not the consumer
+    with instrument.statement(query) as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        fetched, fetching = 0, 0.0
+        try:
+            cur.execute(query, params)
+            t.executed()
+            while True:
+                started = time.perf_counter()
+                rows = cur.fetchmany(chunk_size)
+                fetching += time.perf_counter() - started
+                if not rows:
+                    break
+                fetched += len(rows)
+                yield from rows
+        finally:
+            cur.close()
+            t.rows = fetched
+            t.fetch = fetching
+
+
+def delete_many(delete_sql, keys, chunk_size=DELETE_CHUNK_SIZE):
+    """Delete many rows by key in a single transaction.
+
+    `delete_sql` is the single-row statement used elsewhere, ending in
+    ``<key column> = ?`` (e.g. ``'DELETE FROM Account WHERE AccountId = ?'``).
+    Keys are deleted in chunks with ``<key column> IN (?, ?, ...)``; each
+    chunk returns the keys it actually deleted, and keys whose row no
+    longer exists (e.g. deleted by another user) are reported as
+    failures rather than as deleted. If a chunk fails (typically a
+    foreign key violation), its keys are retried one at a time so that
+    only the offending rows are skipped. All successful deletes are
+    committed together at the end.
+
+    Args:
+        delete_sql (str): parameterized single-key DELETE statement.
+        keys (iterable): key values to delete.
+        chunk_size (int): maximum keys per `IN` list.
+
+    Returns:
+        tuple: ``(deleted, failures)`` where `deleted` is the list of keys
+        that were removed and `failures` maps each key that could not be
+        deleted to the error message.
+    """
+    m = _KEY_PREDICATE.match(delete_sql)
+    if not m:
+        raise ValueError('delete_sql must end with "<key column> = ?"')
+    head = m.group('head')
+    column = head.split()[-1]
+    backend = get_backend()
+    keys = list(dict.fromkeys(keys))
+    deleted = []
+    failures = {}
+    with instrument.statement(f'{head} IN (?)') as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        for start in range(0, len(keys), chunk_size):
+            chunk = keys[start:start + chunk_size]
+            marks = ','.join('?' * len(chunk))
+            try:
+                cur.execute(backend.delete_returning(f'{head} IN ({marks})', column), chunk)
+                gone = {row[0] for row in cur.fetchall()}
+            except Exception:
+                # the failed statement is rolled back on its own; fall
+                # back to per-key deletes to isolate the bad rows
+                gone = None
+            if gone is not None:
+                for k in chunk:
+                    if k in gone:
+                        deleted.append(k)
+                    else:
+                        failures[k] = _MISSING
+                continue
+            for k in chunk:
+                try:
+                    cur.execute(delete_sql, (k,))
+                except Exception as e:
+                    failures[k] = str(e)
+                    continue
+                if cur.rowcount == 0:
+                    failures[k] = _MISSING
+                else:
+                    deleted.append(k)
+        conn.commit()
+        t.executed(len(deleted))
+    if deleted:
+        cache.invalidate_sql(delete_sql)
+    return deleted, failures
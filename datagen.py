@@ -0,0 +1,335 @@
+"""Deterministic synthetic data generator for load testing.
+
+Generates departments, branches, employees, customers, accounts and
+transactions at a configurable scale and bulk-loads them into the
+active backend (see `db.get_backend`). The same seed and options always
+produce the same data.
+
+Distributions aim to look like a retail bank rather than uniform noise:
+
+- customers hold 1-4 accounts (most hold one);
+- accounts are spread over branches with a skew towards large branches;
+- account activity is heavy-tailed (Pareto), so a few accounts carry
+  most of the transactions;
+- transactions are generated day by day in date order, with fewer on
+  weekends, and booked by an employee of the account's branch.
+
+Account balances are set to an opening balance plus the sum of the
+generated transactions, matching what the posting engine maintains.
+
+Usage::
+
+    python datagen.py --customers 1000000 --accounts 3000000 --transactions 100000000
+    BANK_DB_BACKEND=sqlite BANK_SQLITE_PATH=bench.db python datagen.py --scale 0.01
+"""
+
+import argparse
+import bisect
+import datetime
+import random
+import sys
+import time
+from array import array
+
+from db import get_backend, get_pool
+
+BATCH_SIZE = 10000
+
+# Full-size targets; `--scale` multiplies them.
+DEFAULTS = {
+    'branches': 200,
+    'employees': 20000,
+    'customers': 1000000,
+    'accounts': 3000000,
+    'transactions': 100000000,
+}
+
+DEPARTMENTS = ('OPS', 'RETAIL', 'LOANS', 'CARDS', 'FX', 'RISK', 'HR', 'IT', 'AUDIT', 'SUPPORT')
+JOBS = ('Engineer', 'Teacher', 'Nurse', 'Driver', 'Clerk', 'Manager', 'Student', 'Retired',
+        'Doctor', 'Farmer', 'Lawyer', 'Designer', 'Sales', 'Chef', None)
+CURRENCIES = (('USD', 70), ('EUR', 20), ('GBP', 8), ('CHF', 2))
+INCOME = ('Low', 'Medium', 'High')
+
+
+class Generator:
+    """Writes one reproducible data set.
+
+    Args:
+        seed (int): random seed; also part of generated SSNs/IBANs so
+            data sets with different seeds can coexist in one database.
+        counts (dict): row counts per entity (keys as in `DEFAULTS`).
+        end_date (datetime.date): last transaction date.
+        days (int): length of the transaction history.
+        batch_size (int): rows per `executemany` and per commit.
+        log (callable): progress callback taking a message.
+    """
+
+    def __init__(self, seed, counts, end_date, days, batch_size=BATCH_SIZE, log=None):
+        self.seed = seed
+        self.counts = counts
+        self.end_date = end_date
+        self.days = days
+        self.batch_size = batch_size
+        self.log = log or (lambda msg: None)
+        self.rng = random.Random(seed)
+        self.tag = f'G{seed}'
+
+    def run(self):
+        """Generate and load everything; returns row counts written."""
+        written = {}
+        with get_pool().connection() as conn:
+            cur = get_backend().prepare_bulk(conn.cursor())
+            self.conn, self.cur = conn, cur
+            written['departments'] = self._departments()
+            branch_ids = self._branches()
+            written['branches'] = len(branch_ids)
+            emp_by_branch = self._employees(branch_ids)
+            written['employees'] = sum(len(v) for v in emp_by_branch)
+            customer_ids = self._customers()
+            written['customers'] = len(customer_ids)
+            account_ids, account_branch = self._accounts(customer_ids, branch_ids)
+            written['accounts'] = len(account_ids)
+            written['transactions'] = self._transactions(account_ids, account_branch, emp_by_branch)
+            self._settle_balances(account_ids)
+        return written
+
+    # ------------------------------------------------------------ loaders
+
+    def _insert(self, sql, rows):
+        """Insert an iterable of parameter tuples in committed batches."""
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.cur.executemany(sql, batch)
+                self.conn.commit()
+                total += len(batch)
+                batch = []
+        if batch:
+            self.cur.executemany(sql, batch)
+            self.conn.commit()
+            total += len(batch)
+        return total
+
+    def _max_id(self, table, key):
+        self.cur.execute(f'SELECT MAX({key}) FROM {table}')
+        return self.cur.fetchone()[0] or 0
+
+    def _new_ids(self, table, key, after):
+        """Return identity values created after `after`, in insert order."""
+        ids = array('q')
+        self.cur.execute(f'SELECT {key} FROM {table} WHERE {key} > ? ORDER BY {key}', (after,))
+        while True:
+            rows = self.cur.fetchmany(self.batch_size)
+            if not rows:
+                break
+            ids.extend(r[0] for r in rows)
+        return ids
+
+    # ------------------------------------------------------------ entities
+
+    def _departments(self):
+        self.cur.execute('SELECT DeptCode FROM Department')
+        existing = {r[0] for r in self.cur.fetchall()}
+        rows = [(code, f'{code.title()} department') for code in DEPARTMENTS if code not in existing]
+        return self._insert('INSERT INTO Department (DeptCode, Description) VALUES (?, ?)', rows)
+
+    def _branches(self):
+        n = self.counts['branches']
+        before = self._max_id('Branch', 'BranchId')
+        rows = ((f'{self.tag}-BR{i:05d}', '09:00-17:00', f'branch{i}@{self.tag.lower()}.example.com',
+                 f'555-{i % 10000:04d}') for i in range(n))
+        self._insert('INSERT INTO Branch (BranchCode, OpeningHours, Email, Phone) VALUES (?, ?, ?, ?)', rows)
+        ids = self._new_ids('Branch', 'BranchId', before)
+        self.log(f'branches: {len(ids):,}')
+        return ids
+
+    def _employees(self, branch_ids):
+        n = self.counts['employees']
+        rng = self.rng
+        before = self._max_id('Employee', 'EmpId')
+        # every branch gets at least one employee; the rest follow branch size
+        weights = self._branch_weights(len(branch_ids))
+        assigned = [i % len(branch_ids) for i in range(min(n, len(branch_ids)))]
+        assigned += rng.choices(range(len(branch_ids)), weights=weights, k=max(n - len(branch_ids), 0))
+
+        def rows():
+            for i, b in enumerate(assigned):
+                hired = self.end_date - datetime.timedelta(days=rng.randrange(30, 20 * 365))
+                born = hired - datetime.timedelta(days=rng.randrange(20 * 365, 45 * 365))
+                yield (rng.choice(DEPARTMENTS), branch_ids[b], hired, born,
+                       f'emp{i}@{self.tag.lower()}.example.com', rng.choice((35, 40, 40, 40, 20)))
+        self._insert('INSERT INTO Employee (DeptCode, BranchId, HireDate, BirthDate, Email, WorkHours) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', rows())
+        ids = self._new_ids('Employee', 'EmpId', before)
+        by_branch = [array('q') for _ in branch_ids]
+        for emp_id, b in zip(ids, assigned):
+            by_branch[b].append(emp_id)
+        self.log(f'employees: {len(ids):,}')
+        return by_branch
+
+    def _customers(self):
+        n = self.counts['customers']
+        rng = self.rng
+        before = self._max_id('Customer', 'CustomerId')
+        start = self.end_date - datetime.timedelta(days=15 * 365)
+
+        def rows():
+            for i in range(n):
+                yield (f'{self.tag}-{i:09d}', rng.choice('MF'),
+                       start + datetime.timedelta(days=rng.randrange(15 * 365)),
+                       1 if rng.random() < 0.95 else 0, rng.choice(JOBS),
+                       rng.choices(INCOME, weights=(50, 40, 10))[0])
+        self._insert('INSERT INTO Customer (SSN, Gender, RegDate, IsActive, Job, IncomeLevel) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', rows())
+        ids = self._new_ids('Customer', 'CustomerId', before)
+        self.log(f'customers: {len(ids):,}')
+        return ids
+
+    def _accounts(self, customer_ids, branch_ids):
+        n = self.counts['accounts']
+        rng = self.rng
+        before = self._max_id('Account', 'AccountId')
+        cum_branch = list(_cumulative(self._branch_weights(len(branch_ids))))
+        currencies, cur_weights = zip(*CURRENCIES)
+        account_branch = array('l')
+
+        def pick_branch():
+            return bisect.bisect(cum_branch, rng.random() * cum_branch[-1])
+
+        def rows():
+            made = 0
+            c = 0
+            # walk customers in order, giving each 1-4 accounts, until the
+            # target is reached (cycling if accounts outnumber 4x customers)
+            while made < n and customer_ids:
+                owner = customer_ids[c % len(customer_ids)]
+                home = pick_branch()
+                held = min(rng.choices((1, 2, 3, 4), weights=(40, 30, 20, 10))[0], n - made)
+                for _ in range(held):
+                    # most accounts live in the customer's home branch
+                    b = home if rng.random() < 0.85 else pick_branch()
+                    account_branch.append(b)
+                    yield (f'{self.tag}BANK{made:012d}', owner, branch_ids[b],
+                           'Open' if rng.random() < 0.97 else 'Closed',
+                           rng.choices(currencies, weights=cur_weights)[0],
+                           round(rng.lognormvariate(7, 1.2), 2))
+                    made += 1
+                c += 1
+        self._insert('INSERT INTO Account (IBAN, CustomerId, BranchId, Status, Currency, Balance) '
+                     'VALUES (?, ?, ?, ?, ?, ?)', rows())
+        ids = self._new_ids('Account', 'AccountId', before)
+        self.log(f'accounts: {len(ids):,}')
+        return ids, account_branch
+
+    def _transactions(self, account_ids, account_branch, emp_by_branch):
+        total = self.counts['transactions']
+        if not account_ids or not total:
+            return 0
+        rng = self.rng
+        # heavy-tailed activity: a few accounts are very busy
+        cum = array('d', _cumulative(rng.paretovariate(1.6) for _ in account_ids))
+        top = cum[-1]
+        start = self.end_date - datetime.timedelta(days=self.days - 1)
+        day_weights = [0.5 if (start + datetime.timedelta(days=d)).weekday() >= 5 else 1.0
+                       for d in range(self.days)]
+        per_weight = total / sum(day_weights)
+        written = 0
+        started = time.perf_counter()
+
+        def rows():
+            remaining = total
+            for d in range(self.days):
+                day = start + datetime.timedelta(days=d)
+                count = remaining if d == self.days - 1 else min(round(day_weights[d] * per_weight), remaining)
+                remaining -= count
+                # one sorted list of seconds-of-day keeps each day in time order
+                for sec in sorted(rng.randrange(8 * 3600, 20 * 3600) for _ in range(count)):
+                    a = bisect.bisect(cum, rng.random() * top)
+                    staff = emp_by_branch[account_branch[a]] or emp_by_branch[0]
+                    amount = round(rng.lognormvariate(3.5, 1.3), 2)
+                    if rng.random() < 0.55:
+                        amount = -amount
+                    yield (account_ids[a], staff[rng.randrange(len(staff))], amount, 'Posted', day,
+                           datetime.time(sec // 3600, sec // 60 % 60, sec % 60))
+
+        sql = ('INSERT INTO [Transaction] (AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime) '
+               'VALUES (?, ?, ?, ?, ?, ?)')
+        batch = []
+        for row in rows():
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.cur.executemany(sql, batch)
+                self.conn.commit()
+                written += len(batch)
+                batch = []
+                if written % (self.batch_size * 100) == 0:
+                    rate = written / (time.perf_counter() - started)
+                    self.log(f'transactions: {written:,} ({rate:,.0f} rows/s)')
+        if batch:
+            self.cur.executemany(sql, batch)
+            self.conn.commit()
+            written += len(batch)
+        self.log(f'transactions: {written:,}')
+        return written
+
+    def _settle_balances(self, account_ids):
+        """Fold the generated transactions into Balance/LastTransactionDate."""
+        if not account_ids:
+            return
+        first, last = account_ids[0], account_ids[-1]
+        step = self.batch_size
+        for lo in range(first, last + 1, step):
+            self.cur.execute(
+                'UPDATE Account SET '
+                'Balance = ROUND(COALESCE(Balance, 0) + COALESCE((SELECT SUM(t.Amount) FROM [Transaction] t '
+                'WHERE t.AccountId = Account.AccountId), 0), 2), '
+                'LastTransactionDate = (SELECT MAX(t.TransactionDate) FROM [Transaction] t '
+                'WHERE t.AccountId = Account.AccountId) '
+                'WHERE AccountId BETWEEN ? AND ?', (lo, min(lo + step - 1, last)))
+            self.conn.commit()
+        self.log('balances settled')
+
+    # ------------------------------------------------------------ helpers
+
+    def _branch_weights(self, count):
+        # Zipf-like branch sizes, shuffled deterministically
+        weights = [1.0 / (i + 1) ** 0.8 for i in range(count)]
+        random.Random(self.seed + 1).shuffle(weights)
+        return weights
+
+
+def _cumulative(values):
+    total = 0.0
+    for v in values:
+        total += v
+        yield total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic Bank data.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='multiplier applied to the default row counts')
+    for name, default in DEFAULTS.items():
+        parser.add_argument(f'--{name}', type=int, help=f'row count (default {default:,} x scale)')
+    parser.add_argument('--days', type=int, default=365, help='days of transaction history')
+    parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=datetime.date(2025, 12, 31))
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    counts = {name: getattr(args, name) if getattr(args, name) is not None else max(int(default * args.scale), 1)
+              for name, default in DEFAULTS.items()}
+    started = time.perf_counter()
+    gen = Generator(args.seed, counts, args.end_date, args.days, args.batch_size,
+                    log=lambda msg: print(f'[{time.perf_counter() - started:8.1f}s] {msg}', file=sys.stderr))
+    written = gen.run()
+    elapsed = time.perf_counter() - started
+    rows = sum(written.values())
+    print(f'wrote {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s): '
+          + ', '.join(f'{k}={v:,}' for k, v in written.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,26 +1,125 @@
 """Database helper utilities.
 
-This module provides a small helper to obtain a connection to the
-local SQL Server database used by the application.
+This module selects the database backend used by the application,
+provides a helper to obtain a connection to it, and owns the shared
+connection pool that the data layer borrows connections from.
+
+The backend defaults to the local SQL Server `Bank` database. Set the
+environment variable ``BANK_DB_BACKEND=sqlite`` (optionally with
+``BANK_SQLITE_PATH``) to run against an in-process SQLite database
+instead; see `backends.py`.
 """
 
-import pyodbc
+import os
+import threading
+
+from backends import create_backend
+from pool import ConnectionPool
+
+# Pool sizing. Adjust before the first call to `get_pool()` (or use
+# `configure_pool`) to tune for the deployment.
+POOL_MIN_SIZE = 1
+POOL_MAX_SIZE = 10
+POOL_TIMEOUT = 30.0
+POOL_MAX_IDLE = 300.0
+
+_backend = None
+_pool = None
+_lock = threading.RLock()
+
+
+def get_backend():
+    """Return the active `backends.Backend`, creating it on first use.
+
+    The choice comes from ``BANK_DB_BACKEND`` (``mssql`` by default or
+    ``sqlite``); the SQLite file is taken from ``BANK_SQLITE_PATH``
+    (default: an in-memory database).
+    """
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                name = os.environ.get('BANK_DB_BACKEND', 'mssql').lower()
+                options = {}
+                if name == 'sqlite':
+                    options['path'] = os.environ.get('BANK_SQLITE_PATH', ':memory:')
+                _backend = create_backend(name, **options)
+    return _backend
+
+
+def set_backend(backend):
+    """Switch the application to `backend` and discard the current pool."""
+    global _backend, _pool
+    with _lock:
+        old, _pool = _pool, None
+        _backend = backend
+    if old is not None:
+        old.close()
 
 
 def get_connection():
-    """Return a new pyodbc connection to the Bank database.
+    """Return a new connection to the Bank database.
 
-    The function creates and returns a live connection object. Callers
-    are responsible for closing the connection when finished.
+    The function creates and returns a live connection object from the
+    active backend. Callers are responsible for closing the connection
+    when finished. Most code should borrow a pooled connection via
+    `get_pool()` instead.
 
     Returns:
-        pyodbc.Connection: active DB connection to the `Bank` database.
+        a DB-API connection (pyodbc.Connection for SQL Server).
+    """
+    return get_backend().connect()
+
+
+def sql(text):
+    """Render ``{fragment}`` placeholders in `text` for the active backend.
+
+    Example: ``sql("INSERT ... VALUES (?, {today})")``.
     """
-    # Use ODBC Driver 17 for SQL Server with Windows authentication
-    conn = pyodbc.connect(
-        "DRIVER={ODBC Driver 17 for SQL Server};"
-        "SERVER=localhost;"
-        "DATABASE=Bank;"
-        "Trusted_Connection=yes;"
-    )
-    return conn
+    return get_backend().render(text)
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use.
+
+    Returns:
+        pool.ConnectionPool: pool whose connections come from
+        `get_connection()`.
+    """
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = _build_pool({})
+    return _pool
+
+
+def configure_pool(**options):
+    """Replace the shared pool with one built from `options`.
+
+    Accepts the keyword arguments of `pool.ConnectionPool` (except
+    `factory`). The previous pool, if any, is closed.
+    """
+    global _pool
+    with _lock:
+        old = _pool
+        _pool = _build_pool(options)
+    if old is not None:
+        old.close()
+    return _pool
+
+
+def pool_stats():
+    """Return hit/miss/wait counters of the shared pool (see `ConnectionPool.snapshot`)."""
+    return get_pool().snapshot()
+
+
+def _build_pool(options):
+    settings = dict(min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                    timeout=POOL_TIMEOUT, max_idle=POOL_MAX_IDLE)
+    settings.update(options)
+    cap = get_backend().max_connections
+    if cap is not None:
+        settings['max_size'] = min(settings['max_size'], cap)
+        settings['min_size'] = min(settings['min_size'], settings['max_size'])
+    return ConnectionPool(get_connection, **settings)
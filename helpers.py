@@ -1,8 +1,19 @@
+import time
 import tkinter as tk
 from tkinter import ttk, messagebox
 
 # Module-level `root` will be set by the main app after creating the Tk instance
 root = None
+# Module-level `executor` (a `worker.DBExecutor`) may be set by the main app;
+# when present, table loads and bulk deletes run off the UI thread
+executor = None
+
+# Pages of rows kept materialized in a paged table; older pages are
+# dropped as the user scrolls and re-fetched when scrolling back.
+MAX_PAGES = 3
+
+# Milliseconds `render_rows` spends inserting rows per event-loop turn.
+RENDER_BUDGET_MS = 8
 
 
 def make_form(parent, fields):
@@ -18,9 +29,22 @@ def make_form(parent, fields):
     return entries
 
 
-def make_table(parent, columns, headings, with_select=False):
+def make_table(parent, columns, headings, with_select=False, source=None, page_size=None, busy=None):
+    """Create a table (`ttk.Treeview`) with a vertical scrollbar.
+
+    When `source` (a `paging.PageQuery`) is given, the table is paged:
+    a `VirtualTable` is attached as `tree.pager`, and `tree.pager.reload()`
+    loads the first page. Further pages are fetched as the user scrolls,
+    and only a window of `MAX_PAGES` pages is kept in the widget. `busy`
+    is an optional `BusyIndicator` shown while pages are loading. Paged
+    tables sort on header clicks and get a row of filter boxes; both are
+    applied in SQL by the `source`.
+    """
     frame = ttk.Frame(parent, padding=(10, 8))
     frame.pack(fill='both', expand=True)
+    if source is not None:
+        filter_bar = ttk.Frame(frame)
+        filter_bar.pack(side='top', fill='x', pady=(0, 4))
     # optionally add a select checkbox column at the start
     if with_select:
         columns = ('_sel',) + tuple(columns)
@@ -41,9 +65,522 @@ def make_table(parent, columns, headings, with_select=False):
     tree.tag_configure('even', background='white')
     if with_select:
         tree.bind('<Button-1>', lambda e: _on_tree_click(e, tree))
+    if source is not None:
+        tree.pager = VirtualTable(tree, vsb, source, with_select,
+                                  page_size or _default_page_size(), busy=busy)
+        # display columns map to the source's columns by position
+        shown = [(c, h) for c, h in zip(columns, headings) if c != '_sel']
+        for (c, h), src_col in zip(shown, source.columns):
+            tree.pager.headings[c] = (h, src_col)
+            tree.heading(c, command=lambda sc=src_col: tree.pager.sort_by(sc))
+            ttk.Label(filter_bar, text=h).pack(side='left', padx=(0, 2))
+            ent = ttk.Entry(filter_bar, width=10)
+            ent.pack(side='left', padx=(0, 8))
+            ent.bind('<KeyRelease>', lambda e, sc=src_col, w=ent: tree.pager.filter(sc, w.get()))
+        tree.pager.show_sort()
     return tree
 
 
+def _default_page_size():
+    from paging import PAGE_SIZE
+    return PAGE_SIZE
+
+
+class VirtualTable:
+    """Sliding window of keyset pages shown in a Treeview.
+
+    Only up to `max_pages` pages of rows exist as Treeview items at any
+    time. Scrolling to the bottom fetches the next page (dropping the
+    oldest one); scrolling back to the top re-fetches the previous page.
+
+    Items are keyed by the row's primary key (``iid = str(key)``), so
+    after a local write the affected rows can be updated in place with
+    `refresh(keys)` or `remove(keys)` instead of reloading the table.
+
+    Sorting (`sort_by`) and filtering (`filter`) are delegated to the
+    source's SQL; the table then reloads from the first page.
+    """
+
+    def __init__(self, tree, scrollbar, source, with_select, page_size, max_pages=MAX_PAGES, busy=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.source = source
+        self.with_select = with_select
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.busy = busy
+        # tree column -> (heading text, source column)
+        self.headings = {}
+        self._filter_job = None
+        # each page is [first_cursor, last_cursor, [item ids]]
+        self._pages = []
+        # item id -> native row (tuple) of every item in the window; cells
+        # are formatted only when an item is inserted or changes
+        self._rows = {}
+        self._more_after = False
+        self._more_before = False
+        self._busy = False
+        tree.configure(yscrollcommand=self._on_yscroll)
+
+    def reload(self):
+        """Show the first page, updating only the items that changed.
+
+        Rows still on the first page keep their item (and checkbox);
+        changed values are rewritten, new rows inserted and rows that
+        are gone removed. A reload supersedes any page fetch still in
+        flight for this table.
+        """
+        self._busy = True
+        self._fetch(self._show_first)
+
+    def refresh(self, keys):
+        """Re-read the rows with `keys` and update just those items.
+
+        Rows that no longer exist are removed; new rows are inserted in
+        key order if they fall inside the loaded window.
+        """
+        keys = list(keys)
+        if keys:
+            self._submit(self.source.rows, keys, on_done=lambda rows: self._apply(keys, rows))
+
+    def load_newer(self):
+        """Append rows added after the last loaded key (e.g. new transactions).
+
+        Only has an effect when the window already shows the end of the
+        table; otherwise the rows appear when the user scrolls there.
+        """
+        if self._more_after or self._busy:
+            return
+        if not self._pages:
+            self.reload()
+            return
+        self._submit(self.source.page, after=self._pages[-1][1], limit=self.page_size,
+                     on_done=self._append_newer)
+
+    def sort_by(self, column):
+        """Sort by source `column`; clicking the sorted column again reverses it."""
+        src = self.source
+        descending = src.sort_column == column and not src.descending
+        src.set_sort(column, descending)
+        self.show_sort()
+        self.reload()
+
+    def show_sort(self):
+        """Mark the sorted column's heading with an arrow."""
+        src = self.source
+        for c, (text, src_col) in self.headings.items():
+            if src_col == src.sort_column:
+                text += ' ▼' if src.descending else ' ▲'
+            self.tree.heading(c, text=text)
+
+    def filter(self, column, text, delay=300):
+        """Filter on `column` containing `text`, reloading after `delay` ms of quiet."""
+        self.source.set_filter(column, text)
+        if self._filter_job is not None:
+            self.tree.after_cancel(self._filter_job)
+        self._filter_job = self.tree.after(delay, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        self.reload()
+
+    def remove(self, keys):
+        """Remove the items of `keys` (rows deleted by this client)."""
+        for key in keys:
+            self._remove_item(self.iid(key))
+        self._stripe()
+
+    def iid(self, key):
+        """Return the Treeview item id used for the row with `key`."""
+        return str(key)
+
+    def key(self, iid):
+        """Return the key value (native type) of the row shown as item `iid`."""
+        return self.source.key_of(self._rows[iid])
+
+    def row(self, iid):
+        """Return the row shown as item `iid` as a tuple of native values."""
+        return self._rows[iid]
+
+    def _show_first(self, rows):
+        tree = self.tree
+        key_of, cursor_of = self.source.key_of, self.source.cursor_of
+        order = [self.iid(key_of(r)) for r in rows]
+        wanted = set(order)
+        stale = [it for it in tree.get_children() if it not in wanted]
+        if stale:
+            tree.delete(*stale)
+        for it in stale:
+            self._rows.pop(it, None)
+        for i, r in enumerate(rows):
+            self._put(r, i)
+        # rows kept from before a sort change are out of place
+        children = tree.get_children()
+        if list(children) != order:
+            for i, it in enumerate(order):
+                tree.move(it, '', i)
+        self._stripe()
+        self._pages = []
+        if rows:
+            self._pages.append([cursor_of(rows[0]), cursor_of(rows[-1]), order])
+        self._more_before = False
+        self._more_after = len(rows) == self.page_size
+        self._busy = False
+
+    def _submit(self, fn, *args, on_done, **kwargs):
+        # single-row updates are not superseded by (and do not supersede)
+        # page loads
+        if executor is None:
+            on_done(fn(*args, **kwargs))
+            return
+        executor.submit(fn, *args, **kwargs, on_done=on_done, busy=self.busy)
+
+    def _apply(self, keys, rows):
+        found = {self.source.key_of(r): r for r in rows}
+        for key in keys:
+            row = found.get(key)
+            if row is None:
+                self._remove_item(self.iid(key))
+            else:
+                self._upsert(row)
+        self._stripe()
+
+    def _append_newer(self, rows):
+        if self._more_after or not rows:
+            return
+        for r in rows:
+            self._upsert(r)
+        self._stripe()
+        self._more_after = len(rows) == self.page_size
+
+    def _upsert(self, row):
+        key = self.source.key_of(row)
+        iid = self.iid(key)
+        if self.tree.exists(iid):
+            self._put(row, self.tree.index(iid))
+            return
+        if not getattr(self.source, 'key_order', True):
+            # the row's place in a custom sort is found on the next reload
+            return
+        if not self._pages:
+            if self._more_after or self._more_before:
+                return
+            self._pages.append([key, key, []])
+        # find the page whose key range holds `key`; rows beyond the
+        # window's edges are left for paging to pick up
+        if key < self._pages[0][0] and self._more_before:
+            return
+        if key > self._pages[-1][1] and self._more_after:
+            return
+        offset = 0
+        for page in self._pages:
+            if key <= page[1] or page is self._pages[-1]:
+                break
+            offset += len(page[2])
+        items = page[2]
+        pos = 0
+        key_of = self.source.key_of
+        while pos < len(items) and items[pos] in self._rows and key_of(self._rows[items[pos]]) < key:
+            pos += 1
+        items.insert(pos, iid)
+        page[0] = min(page[0], key)
+        page[1] = max(page[1], key)
+        self._put(row, offset + pos)
+
+    def _put(self, row, index):
+        # insert the row at `index`, or update its values if it is shown
+        row = tuple(row)
+        iid = self.iid(self.source.key_of(row))
+        tree = self.tree
+        if tree.exists(iid):
+            if self._rows.get(iid) == row:
+                return
+            vals = tuple(_format_cell(x) for x in row)
+            if self.with_select:
+                vals = (tree.set(iid, '_sel') or '☐',) + vals
+            tree.item(iid, values=vals)
+        else:
+            vals = tuple(_format_cell(x) for x in row)
+            if self.with_select:
+                vals = ('☐',) + vals
+            tree.insert('', index, iid=iid, values=vals, tags=('odd' if index % 2 else 'even',))
+        self._rows[iid] = row
+
+    def _remove_item(self, iid):
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+        self._rows.pop(iid, None)
+        for page in self._pages:
+            if iid in page[2]:
+                page[2].remove(iid)
+        self._pages = [p for p in self._pages if p[2]]
+
+    def _fetch(self, on_done, **page_args):
+        # run the query on the DB executor when the app provides one
+        if executor is None:
+            try:
+                rows = self.source.page(limit=self.page_size, **page_args)
+            except Exception:
+                self._busy = False
+                raise
+            on_done(rows)
+            return
+        executor.submit(self.source.page, limit=self.page_size, **page_args,
+                        on_done=on_done, on_error=self._on_fetch_error,
+                        key=('page', id(self)), busy=self.busy)
+
+    def _on_fetch_error(self, exc):
+        self._busy = False
+        if executor.on_error is not None:
+            executor.on_error(exc)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._busy or not self._pages:
+            return
+        if float(last) >= 0.98 and self._more_after:
+            self._busy = True
+            self._fetch(self._show_next, after=self._pages[-1][1])
+        elif float(first) <= 0.02 and self._more_before:
+            self._busy = True
+            self._fetch(self._show_previous, before=self._pages[0][0])
+
+    def _show_next(self, rows):
+        try:
+            self._more_after = len(rows) == self.page_size
+            if not rows:
+                return
+            top = self._top_index()
+            self._pages.append(self._insert_page(rows, 'end'))
+            if len(self._pages) > self.max_pages:
+                dropped = self._drop(0)
+                self._more_before = True
+                top -= dropped
+                self._stripe()
+            self._scroll_to(top)
+        finally:
+            self._busy = False
+
+    def _show_previous(self, rows):
+        try:
+            self._more_before = len(rows) == self.page_size
+            if not rows:
+                return
+            top = self._top_index()
+            self._pages.insert(0, self._insert_page(rows, 0))
+            top += len(rows)
+            if len(self._pages) > self.max_pages:
+                self._drop(-1)
+                self._more_after = True
+            self._stripe()
+            self._scroll_to(top)
+        finally:
+            self._busy = False
+
+    def _insert_page(self, rows, where):
+        key_of, cursor_of = self.source.key_of, self.source.cursor_of
+        base = len(self.tree.get_children('')) if where == 'end' else where
+        for i, r in enumerate(rows):
+            self._put(r, base + i)
+        return [cursor_of(rows[0]), cursor_of(rows[-1]), [self.iid(key_of(r)) for r in rows]]
+
+    def _stripe(self):
+        # tag by position in the window, so the stripes run on across
+        # page boundaries after pages are prepended or dropped and rows
+        # are inserted or removed
+        tree = self.tree
+        for i, it in enumerate(tree.get_children('')):
+            tree.item(it, tags=('odd' if i % 2 else 'even',))
+
+    def _drop(self, index):
+        # rows may already have been deleted from the tree individually
+        items = [it for it in self._pages.pop(index)[2] if self.tree.exists(it)]
+        self.tree.delete(*items)
+        for it in items:
+            self._rows.pop(it, None)
+        return len(items)
+
+    def _top_index(self):
+        count = len(self.tree.get_children(''))
+        return round(self.tree.yview()[0] * count)
+
+    def _scroll_to(self, index):
+        count = len(self.tree.get_children(''))
+        if count:
+            self.tree.yview_moveto(max(index, 0) / count)
+
+
+class RenderJob:
+    """Progressive fill of a plain table started by `render_rows`."""
+
+    __slots__ = ('tree', 'rows', 'done', 'budget', 'on_progress', 'on_done', '_after', 'cancelled')
+
+    def __init__(self, tree, rows, budget, on_progress, on_done):
+        self.tree = tree
+        self.rows = rows
+        self.done = 0
+        self.budget = budget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self._after = None
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop adding rows; rows already shown stay."""
+        self.cancelled = True
+        if self._after is not None:
+            self.tree.after_cancel(self._after)
+            self._after = None
+        if _rendering.get(str(self.tree)) is self:
+            del _rendering[str(self.tree)]
+
+    def _step(self):
+        self._after = None
+        if self.cancelled:
+            return
+        rows, total, insert = self.rows, len(self.rows), self.tree.insert
+        i = self.done
+        deadline = time.perf_counter() + self.budget
+        while i < total:
+            insert('', 'end', values=tuple(_format_cell(x) for x in rows[i]), tags=('odd' if i % 2 else 'even',))
+            i += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.done = i
+        if self.on_progress is not None:
+            self.on_progress(i, total)
+        if i < total:
+            # yield to the event loop so the window repaints and stays responsive
+            self._after = self.tree.after(1, self._step)
+            return
+        if _rendering.get(str(self.tree)) is self:
+            del _rendering[str(self.tree)]
+        if self.on_done is not None:
+            self.on_done()
+
+
+_rendering = {}   # str(tree) -> RenderJob in progress
+
+
+def render_rows(tree, rows, on_progress=None, on_done=None, budget_ms=None):
+    """Replace the rows of a plain (unpaged) table, inserting them progressively.
+
+    Rows are formatted with `_format_cell` and inserted for at most
+    `budget_ms` (default `RENDER_BUDGET_MS`) per event-loop turn, so
+    large results appear chunk by chunk without freezing the window. The
+    first chunk is inserted before returning. A newer call for the same
+    `tree` cancels a render still in progress.
+
+    Args:
+        tree: the `ttk.Treeview` to fill.
+        rows (sequence): row tuples (or a `data.ResultSet`).
+        on_progress (callable): ``on_progress(shown, total)`` after each chunk.
+        on_done (callable): called once every row is shown.
+
+    Returns:
+        RenderJob: handle whose `cancel()` stops the render.
+    """
+    cancel_render(tree)
+    tree.delete(*tree.get_children())
+    budget = (RENDER_BUDGET_MS if budget_ms is None else budget_ms) / 1000.0
+    job = RenderJob(tree, rows, budget, on_progress, on_done)
+    _rendering[str(tree)] = job
+    job._step()
+    return job
+
+
+def cancel_render(tree):
+    """Cancel the `render_rows` job filling `tree`, if any."""
+    job = _rendering.get(str(tree))
+    if job is not None:
+        job.cancel()
+
+
+class LazyTabs:
+    """Notebook tabs whose widgets are built and loaded on first use.
+
+    `add` puts the tab's frame in the notebook right away, so the tab
+    strip is complete, but runs its `build()` only when the tab is first
+    selected (or reached by `prefetch`), followed by `load()`. `on_show()`
+    runs every time the tab is selected, after it has been built.
+    """
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self._tabs = {}   # str(frame) -> [build, load, on_show, built]
+        notebook.bind('<<NotebookTabChanged>>', self._changed, add='+')
+
+    def add(self, frame, text, build, load=None, on_show=None):
+        self.notebook.add(frame, text=text)
+        self._tabs[str(frame)] = [build, load, on_show, False]
+
+    def built(self, frame):
+        """True once `frame`'s widgets exist."""
+        tab = self._tabs.get(str(frame))
+        return tab is None or tab[3]
+
+    def ensure(self, frame):
+        """Build and load `frame` if that has not happened yet."""
+        tab = self._tabs.get(str(frame))
+        if tab is None or tab[3]:
+            return
+        tab[3] = True
+        tab[0]()
+        if tab[1] is not None:
+            tab[1]()
+
+    def prefetch(self, delay=50):
+        """Build the remaining tabs in the background, one per `delay` ms.
+
+        Each step builds one tab on the UI thread and submits its load,
+        so the window stays responsive in between.
+        """
+        pending = [name for name, tab in self._tabs.items() if not tab[3]]
+
+        def _step():
+            while pending:
+                name = pending.pop(0)
+                if not self._tabs[name][3]:
+                    self.ensure(name)
+                    break
+            if pending:
+                self.notebook.after(delay, _step)
+        self.notebook.after(delay, _step)
+
+    def _changed(self, event=None):
+        current = self.notebook.select()
+        if current not in self._tabs:
+            return
+        self.ensure(current)
+        on_show = self._tabs[current][2]
+        if on_show is not None:
+            on_show()
+
+
+class BusyIndicator:
+    """Small indeterminate progress bar overlaid on a tab's top-right corner.
+
+    `start()`/`stop()` calls nest; the bar is visible while at least one
+    operation is outstanding.
+    """
+
+    def __init__(self, parent):
+        self._count = 0
+        self.bar = ttk.Progressbar(parent, mode='indeterminate', length=90)
+
+    def start(self):
+        self._count += 1
+        if self._count == 1:
+            self.bar.place(relx=1.0, rely=0.0, x=-10, y=10, anchor='ne')
+            self.bar.start(15)
+
+    def stop(self):
+        self._count = max(self._count - 1, 0)
+        if self._count == 0:
+            self.bar.stop()
+            self.bar.place_forget()
+
+
 def _toggle_check(tree, item):
     try:
         cur = tree.set(item, '_sel')
@@ -63,28 +600,19 @@ def _on_tree_click(event, tree):
         _toggle_check(tree, row)
 
 
-def tree_sort(tree, col, reverse=False):
-    # Skip sorting on selection column
-    if col == '_sel':
-        return
-    data = []
-    for k in tree.get_children(''):
-        v = tree.set(k, col)
-        data.append((v, k))
-    def _try_num(x):
-        try:
-            return float(x)
-        except Exception:
-            return x
-    data.sort(key=lambda t: _try_num(t[0]), reverse=reverse)
-    for index, (_, k) in enumerate(data):
-        tree.move(k, '', index)
-    # toggle next time
-    tree._sort_states = getattr(tree, '_sort_states', {})
-    tree._sort_states[col] = not reverse
-
-
 def delete_selected(tree, delete_sql, id_pos_with_select=1, id_is_int=False, reload_callback=None):
+    """Delete all checked rows with one batched transaction.
+
+    Rows that were deleted are removed from the tree in place; rows that
+    could not be deleted (e.g. still referenced by a foreign key) stay
+    checked and are listed in the result message. `reload_callback` is
+    kept for compatibility and is only used if the tree cannot be
+    updated in place. Paged tables supply each row's key in its native
+    type; `id_pos_with_select`/`id_is_int` are only used to read keys
+    from the cell text of plain tables. `delete_sql` may instead be a
+    function taking the list of keys and returning ``(deleted,
+    failures)`` like `data.delete_many`, e.g. `posting.cancel_many`.
+    """
     # collect checked items
     items = [it for it in tree.get_children('') if tree.set(it, '_sel') == '☑']
     if not items:
@@ -92,25 +620,61 @@ def delete_selected(tree, delete_sql, id_pos_with_select=1, id_is_int=False, rel
         return
     if not messagebox.askyesno('Confirm', f'Delete {len(items)} selected rows?'):
         return
-    from data import execute
+    from data import delete_many
+    if callable(delete_sql):
+        delete = delete_sql
+    else:
+        def delete(keys):
+            return delete_many(delete_sql, keys)
+    pager = getattr(tree, 'pager', None)
+    by_key = {}
     try:
         for it in items:
-            vals = tree.item(it, 'values')
-            v = vals[id_pos_with_select]
-            if id_is_int:
-                v = int(v)
-            execute(delete_sql, (v,))
-        if reload_callback:
-            reload_callback()
-        else:
-            for it in items:
-                try:
-                    tree.delete(it)
-                except Exception:
-                    pass
-        messagebox.showinfo('Deleted', f'Deleted {len(items)} rows.')
+            if pager is not None:
+                # native key kept by the pager; no parsing of cell text
+                v = pager.key(it)
+            else:
+                v = tree.item(it, 'values')[id_pos_with_select]
+                if id_is_int:
+                    v = int(v)
+            by_key.setdefault(v, []).append(it)
     except Exception as e:
         messagebox.showerror('Error', str(e))
+        return
+
+    def _done(result):
+        deleted, failures = result
+        try:
+            if pager is not None:
+                pager.remove(deleted)
+            else:
+                tree.delete(*[it for k in deleted for it in by_key[k] if tree.exists(it)])
+        except Exception:
+            if reload_callback:
+                reload_callback()
+        if failures:
+            lines = [f'{k}: {msg}' for k, msg in list(failures.items())[:10]]
+            if len(failures) > 10:
+                lines.append(f'... and {len(failures) - 10} more')
+            messagebox.showwarning(
+                'Partially deleted',
+                f'Deleted {len(deleted)} rows; {len(failures)} could not be deleted:\n' + '\n'.join(lines))
+        else:
+            messagebox.showinfo('Deleted', f'Deleted {len(deleted)} rows.')
+
+    def _failed(e):
+        messagebox.showerror('Error', str(e))
+
+    if executor is None:
+        try:
+            result = delete(list(by_key))
+        except Exception as e:
+            _failed(e)
+            return
+        _done(result)
+    else:
+        executor.submit(delete, list(by_key), on_done=_done, on_error=_failed,
+                        busy=pager.busy if pager is not None else None)
 
 
 def _format_cell(v):
@@ -131,6 +695,8 @@ def _format_cell(v):
 
 def _make_edit_dialog(title, fields, values, on_save):
     # uses module-level `root` variable; main app should set helpers.root = root
+    # on_save(data, close) starts the save; it calls close() once the
+    # database has accepted it, so a failed save keeps the dialog open
     win = tk.Toplevel(root)
     win.title(title)
     entries = {}
@@ -141,11 +707,13 @@ def _make_edit_dialog(title, fields, values, on_save):
         ent.insert(0, '' if values[i] is None else str(values[i]))
         entries[key] = ent
     win.columnconfigure(1, weight=1)
+    def _close():
+        if win.winfo_exists():
+            win.destroy()
     def _save():
         data = {k: entries[k].get().strip() for k in fields}
         try:
-            on_save(data)
-            win.destroy()
+            on_save(data, _close)
         except Exception as e:
             messagebox.showerror('Edit error', str(e), parent=win)
     btn_frame = ttk.Frame(win)
@@ -0,0 +1,235 @@
+"""Bulk import of Customer, Account and Transaction rows from CSV/JSONL.
+
+Rows are streamed from the input file, validated with the same rules
+as the forms (`validation.py`) and inserted in batches with
+`executemany` (using `fast_executemany` on SQL Server). Each batch is
+committed on its own; if a batch fails (duplicate SSN/IBAN, unknown
+foreign key, ...), it is rolled back and replayed row by row so only
+the offending rows are rejected. Rejected rows are written to a JSONL
+reject file together with their line number and error. Branch and
+employee references are checked against the reference-table cache
+before rows reach the database.
+
+Input columns use the table's column names. CSV files need a header
+row; JSONL files hold one JSON object per line.
+
+- customer: ``SSN``, ``Job``; optional ``Gender``, ``RegDate``,
+  ``IncomeLevel``, ``IsActive`` (default 1)
+- account: ``IBAN``, ``CustomerId``, ``BranchId``, ``Balance``; optional
+  ``Status``, ``Currency``
+- transaction: ``AccountId``, ``EmpId``, ``Amount``; optional ``Status``,
+  ``TransactionDate`` (default today), ``TransactionTime``
+
+Transactions are loaded as history rows; they do not change
+``Account.Balance`` (load balances with the account extract, or use
+`posting.post_batch` for live postings).
+
+Usage::
+
+    python importer.py customer customers.csv
+    python importer.py transaction txns.jsonl --batch-size 10000 --rejects bad.jsonl
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import sys
+import time
+
+import cache
+from db import get_backend, get_pool
+from validation import clean_account, clean_customer, clean_transaction
+
+BATCH_SIZE = 5000
+PROGRESS_EVERY = 100000
+
+
+def _opt(row, name):
+    value = row.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _customer(row):
+    ssn, job = clean_customer(row.get('SSN'), row.get('Job'))
+    active = _opt(row, 'IsActive')
+    if active is None:
+        active = 1
+    elif active.lower() in ('1', 'true', 'yes', 'y'):
+        active = 1
+    elif active.lower() in ('0', 'false', 'no', 'n'):
+        active = 0
+    else:
+        raise ValueError("IsActive must be 0/1.")
+    gender = _opt(row, 'Gender')
+    if gender is not None and len(gender) != 1:
+        raise ValueError("Gender must be a single character.")
+    return (ssn, job, gender, _date(row, 'RegDate'), active, _opt(row, 'IncomeLevel'))
+
+
+def _account(row):
+    iban, cust_id, branch_id, balance = clean_account(
+        row.get('IBAN'), row.get('CustomerId'), row.get('BranchId'), row.get('Balance'))
+    if branch_id not in cache.keys('Branch', 'BranchId'):
+        raise ValueError(f"Branch {branch_id} does not exist.")
+    return (iban, cust_id, branch_id, balance, _opt(row, 'Status'), _opt(row, 'Currency'))
+
+
+def _transaction(row):
+    acc_id, emp_id, amount = clean_transaction(row.get('AccountId'), row.get('EmpId'), row.get('Amount'))
+    if emp_id not in cache.keys('Employee', 'EmpId'):
+        raise ValueError(f"Employee {emp_id} does not exist.")
+    day = _date(row, 'TransactionDate') or datetime.date.today()
+    at = _opt(row, 'TransactionTime')
+    if at is not None:
+        try:
+            at = datetime.time.fromisoformat(at)
+        except ValueError:
+            raise ValueError("TransactionTime must be HH:MM[:SS].")
+    return (acc_id, emp_id, amount, _opt(row, 'Status'), day, at)
+
+
+def _date(row, name):
+    value = _opt(row, name)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value[:10])
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date.")
+
+
+# entity -> (INSERT statement, row converter)
+ENTITIES = {
+    'customer': (
+        'INSERT INTO Customer (SSN, Job, Gender, RegDate, IsActive, IncomeLevel) VALUES (?,?,?,?,?,?)',
+        _customer,
+    ),
+    'account': (
+        'INSERT INTO Account (IBAN, CustomerId, BranchId, Balance, Status, Currency) VALUES (?,?,?,?,?,?)',
+        _account,
+    ),
+    'transaction': (
+        'INSERT INTO [Transaction] (AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime) '
+        'VALUES (?,?,?,?,?,?)',
+        _transaction,
+    ),
+}
+
+
+def read_rows(path):
+    """Yield ``(line_number, dict)`` pairs from a CSV or JSONL file."""
+    if path.lower().endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as fh:
+            for n, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, {'__error__': f'invalid JSON: {e}', '__raw__': line.rstrip('\n')}
+    else:
+        with open(path, newline='', encoding='utf-8-sig') as fh:
+            reader = csv.DictReader(fh)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def import_file(entity, path, batch_size=BATCH_SIZE, rejects=None, progress=None):
+    """Import `path` into the table for `entity`.
+
+    Args:
+        entity (str): ``'customer'``, ``'account'`` or ``'transaction'``.
+        path (str): CSV or JSONL (``.jsonl``) file.
+        batch_size (int): rows per `executemany` call and per commit.
+        rejects: writable text file for rejected rows (JSONL), or None.
+        progress (callable): optional ``progress(stats)`` called every
+            `PROGRESS_EVERY` rows read.
+
+    Returns:
+        dict: counters ``read``, ``inserted``, ``rejected`` and
+        ``seconds``.
+    """
+    insert_sql, convert = ENTITIES[entity]
+    stats = {'read': 0, 'inserted': 0, 'rejected': 0, 'seconds': 0.0}
+    started = time.perf_counter()
+
+    def reject(line, row, error):
+        stats['rejected'] += 1
+        if rejects is not None:
+            rejects.write(json.dumps({'line': line, 'error': error, 'row': row}, default=str) + '\n')
+
+    with get_pool().connection() as conn:
+        cur = get_backend().prepare_bulk(conn.cursor())
+        batch, sources = [], []
+        for line, row in read_rows(path):
+            stats['read'] += 1
+            try:
+                # a JSONL line may hold any JSON value, not just an object
+                if not isinstance(row, dict):
+                    raise ValueError(f'expected a JSON object, got {type(row).__name__}')
+                if '__error__' in row:
+                    raise ValueError(row['__error__'])
+                batch.append(convert(row))
+                sources.append((line, row))
+            except ValueError as e:
+                reject(line, row, str(e))
+            if len(batch) >= batch_size:
+                _flush(conn, cur, insert_sql, batch, sources, stats, reject)
+                batch, sources = [], []
+            if progress is not None and stats['read'] % PROGRESS_EVERY == 0:
+                stats['seconds'] = time.perf_counter() - started
+                progress(stats)
+        if batch:
+            _flush(conn, cur, insert_sql, batch, sources, stats, reject)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def _flush(conn, cur, insert_sql, batch, sources, stats, reject):
+    try:
+        cur.executemany(insert_sql, batch)
+        conn.commit()
+        stats['inserted'] += len(batch)
+        return
+    except Exception:
+        conn.rollback()
+    # replay one row at a time to isolate the rows the database refuses
+    for params, (line, row) in zip(batch, sources):
+        try:
+            cur.execute(insert_sql, params)
+            stats['inserted'] += 1
+        except Exception as e:
+            reject(line, row, str(e))
+    conn.commit()
+
+
+def _report(stats, stream=sys.stderr):
+    rate = stats['read'] / stats['seconds'] if stats['seconds'] else 0.0
+    print(f"read {stats['read']:,}  inserted {stats['inserted']:,}  rejected {stats['rejected']:,}  "
+          f"{stats['seconds']:.1f}s  {rate:,.0f} rows/s", file=stream)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk-import rows into the Bank database.')
+    parser.add_argument('entity', choices=sorted(ENTITIES))
+    parser.add_argument('path', help='CSV file with a header row, or .jsonl file')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                        help='rows per executemany/commit (default %(default)s)')
+    parser.add_argument('--rejects', help='reject file (default: <path>.rejects.jsonl)')
+    args = parser.parse_args(argv)
+
+    rejects_path = args.rejects or args.path + '.rejects.jsonl'
+    with open(rejects_path, 'w', encoding='utf-8') as rejects:
+        stats = import_file(args.entity, args.path, args.batch_size, rejects, progress=_report)
+    _report(stats)
+    if stats['rejected']:
+        print(f'rejected rows written to {rejects_path}', file=sys.stderr)
+    return 1 if stats['rejected'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Query timing instrumentation.
+
+The data layer (`data.py`) reports every statement it runs here. For
+each statement *template* — the SQL text with literals and ``IN (...)``
+lists collapsed, so ``WHERE AccountId = 5`` and ``WHERE AccountId = 7``
+count as one entry — we keep:
+
+- call and error counts and rows returned/affected,
+- a latency histogram (total time, with percentiles estimated from the
+  buckets),
+- time split into connection acquisition, execute and fetch.
+
+Statements slower than the slow-query threshold are logged to the
+``bank.sql`` logger and kept in a short in-memory log. Other consumers
+can subscribe with `add_listener` to receive one `Timing` per
+statement (e.g. to ship metrics elsewhere).
+
+The threshold defaults to ``BANK_SLOW_QUERY_MS`` (500 ms) and can be
+changed with `set_slow_threshold`. `dump()` writes everything as JSON;
+the application's Diagnostics tab shows the same data.
+"""
+
+import collections
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+log = logging.getLogger('bank.sql')
+
+# Upper bounds (milliseconds) of the latency histogram buckets; the last
+# bucket is open-ended.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Number of slow statements kept by `slow_queries()`.
+SLOW_LOG_SIZE = 200
+
+slow_threshold = float(os.environ.get('BANK_SLOW_QUERY_MS', 500)) / 1000.0
+enabled = True
+
+_stats = {}
+_slow = collections.deque(maxlen=SLOW_LOG_SIZE)
+_listeners = []
+_lock = threading.Lock()
+_started = time.time()
+
+_STRING = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w\]])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_SPACE = re.compile(r'\s+')
+
+
+@functools.lru_cache(maxsize=1024)
+def template(sql):
+    """Return the normalized template of `sql` used to group statistics."""
+    text = _STRING.sub('?', sql)
+    text = _NUMBER.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    return _SPACE.sub(' ', text).strip()
+
+
+class Timing:
+    """Timings of one statement, filled in by the data layer.
+
+    Use as a context manager around the whole call and mark the phases
+    with `acquired()` and `executed()`; whatever time remains until exit
+    is counted to the phase still in progress: acquire before
+    `acquired()`, execute before `executed()`, otherwise fetch (unless
+    `fetch` is set explicitly). A call that fails while waiting for a
+    connection is thus booked as acquire time, not fetch time.
+    """
+
+    __slots__ = ('sql', 'started', 'acquire', 'execute', 'fetch', 'rows', 'error', '_mark', '_phase')
+
+    def __init__(self, sql):
+        self.sql = sql
+        self.acquire = self.execute = 0.0
+        self.fetch = None
+        self.rows = None
+        self.error = None
+        self._phase = 'acquire'
+        self.started = self._mark = time.perf_counter()
+
+    @property
+    def total(self):
+        return self.acquire + self.execute + (self.fetch or 0.0)
+
+    def acquired(self):
+        now = time.perf_counter()
+        self.acquire = now - self._mark
+        self._mark = now
+        self._phase = 'execute'
+
+    def executed(self, rows=None):
+        now = time.perf_counter()
+        self.execute = now - self._mark
+        self._mark = now
+        self._phase = 'fetch'
+        if rows is not None:
+            self.rows = rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        rest = time.perf_counter() - self._mark
+        if self._phase == 'acquire':
+            self.acquire = rest
+        elif self._phase == 'execute':
+            self.execute = rest
+        elif self.fetch is None:
+            self.fetch = rest
+        if exc is not None:
+            self.error = f'{exc_type.__name__}: {exc}'
+        record(self)
+        return False
+
+
+class _NullTiming:
+    """Stand-in returned by `statement()` while instrumentation is off."""
+
+    __slots__ = ()
+    rows = fetch = None
+
+    def acquired(self):
+        pass
+
+    def executed(self, rows=None):
+        pass
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL = _NullTiming()
+
+
+def statement(sql):
+    """Return a `Timing` context for one execution of `sql`."""
+    return Timing(sql) if enabled else _NULL
+
+
+class StatementStats:
+    """Aggregated timings of one statement template."""
+
+    __slots__ = ('template', 'count', 'errors', 'rows', 'total', 'max',
+                 'acquire', 'execute', 'fetch', 'buckets')
+
+    def __init__(self, template):
+        self.template = template
+        self.count = self.errors = self.rows = 0
+        self.total = self.max = self.acquire = self.execute = self.fetch = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, timing):
+        total = timing.total
+        self.count += 1
+        self.total += total
+        self.max = max(self.max, total)
+        self.acquire += timing.acquire
+        self.execute += timing.execute
+        self.fetch += timing.fetch or 0.0
+        if timing.rows is not None and timing.rows > 0:
+            self.rows += timing.rows
+        if timing.error is not None:
+            self.errors += 1
+        ms = total * 1000.0
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def percentile(self, pct):
+        """Estimate the `pct` latency percentile (ms) from the histogram.
+
+        Returns the upper bound of the bucket holding the percentile,
+        capped at the slowest observed call.
+        """
+        if not self.count:
+            return 0.0
+        rank = pct / 100.0 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                if i < len(BUCKETS_MS):
+                    return min(float(BUCKETS_MS[i]), self.max * 1000.0)
+                break
+        return self.max * 1000.0
+
+    def as_dict(self):
+        n = self.count or 1
+        return {
+            'template': self.template,
+            'count': self.count,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.total * 1000.0,
+            'avg_ms': self.total * 1000.0 / n,
+            'max_ms': self.max * 1000.0,
+            'p50_ms': self.percentile(50),
+            'p95_ms': self.percentile(95),
+            'p99_ms': self.percentile(99),
+            'avg_acquire_ms': self.acquire * 1000.0 / n,
+            'avg_execute_ms': self.execute * 1000.0 / n,
+            'avg_fetch_ms': self.fetch * 1000.0 / n,
+            'histogram': dict(zip([f'<={b}ms' for b in BUCKETS_MS] + [f'>{BUCKETS_MS[-1]}ms'], self.buckets)),
+        }
+
+
+def record(timing):
+    """Add a finished `Timing` to the statistics and notify listeners."""
+    key = template(timing.sql)
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = StatementStats(key)
+        stats.add(timing)
+        slow = timing.total >= slow_threshold
+        if slow:
+            _slow.append({
+                'at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'ms': timing.total * 1000.0,
+                'acquire_ms': timing.acquire * 1000.0,
+                'rows': timing.rows,
+                'error': timing.error,
+                'sql': timing.sql,
+            })
+        listeners = list(_listeners)
+    if slow:
+        log.warning('slow query (%.1f ms, acquire %.1f ms, rows %s): %s',
+                    timing.total * 1000.0, timing.acquire * 1000.0, timing.rows, key)
+    for fn in listeners:
+        try:
+            fn(timing)
+        except Exception:
+            log.exception('instrumentation listener failed')
+
+
+def add_listener(fn):
+    """Call ``fn(timing)`` after every recorded statement."""
+    with _lock:
+        _listeners.append(fn)
+
+
+def remove_listener(fn):
+    with _lock:
+        _listeners.remove(fn)
+
+
+def set_slow_threshold(ms):
+    """Log statements taking at least `ms` milliseconds as slow."""
+    global slow_threshold
+    slow_threshold = ms / 1000.0
+
+
+def enable(flag=True):
+    """Turn recording on or off (off makes `statement()` a no-op)."""
+    global enabled
+    enabled = bool(flag)
+
+
+def reset():
+    """Clear all statistics and the slow-query log."""
+    global _started
+    with _lock:
+        _stats.clear()
+        _slow.clear()
+        _started = time.time()
+
+
+def statements():
+    """Return per-template statistics as dicts, slowest total time first."""
+    with _lock:
+        rows = [s.as_dict() for s in _stats.values()]
+    rows.sort(key=lambda r: r['total_ms'], reverse=True)
+    return rows
+
+
+def slow_queries():
+    """Return the recent slow statements, newest first."""
+    with _lock:
+        return list(reversed(_slow))
+
+
+def snapshot():
+    """Return all statistics, the slow-query log and pool counters as a dict."""
+    from db import pool_stats
+    try:
+        pool = pool_stats()
+    except Exception as e:
+        pool = {'error': str(e)}
+    return {
+        'since': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(_started)),
+        'slow_threshold_ms': slow_threshold * 1000.0,
+        'pool': pool,
+        'statements': statements(),
+        'slow_queries': slow_queries(),
+    }
+
+
+def dump(path=None):
+    """Write `snapshot()` as JSON to `path`, or return it as a string."""
+    text = json.dumps(snapshot(), indent=2, default=str)
+    if path is None:
+        return text
+    with open(path, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+    return path
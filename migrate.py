@@ -0,0 +1,151 @@
+"""Versioned schema migrations.
+
+Migrations live in the `migrations/` folder as SQL scripts named
+``<version>_<name>.<backend>.sql`` (for example
+``0001_hot_lookup_indexes.mssql.sql``), one file per backend. Scripts
+are split into batches on lines containing only ``GO`` and should be
+idempotent, so re-running one that was partly applied is harmless.
+
+Applied versions are recorded in the ``SchemaVersion`` table. Each
+migration runs in its own transaction together with its version row.
+
+Usage::
+
+    python migrate.py            # apply all pending migrations
+    python migrate.py --list     # show applied/pending migrations
+    python migrate.py --target 1 # apply up to version 1
+"""
+
+import argparse
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+_FILE_NAME = re.compile(r'^(\d+)_(\w+)\.(\w+)\.sql$')
+_GO = re.compile(r'^\s*GO\s*$', re.IGNORECASE | re.MULTILINE)
+
+_VERSION_TABLE = {
+    'mssql': (
+        "IF OBJECT_ID('dbo.SchemaVersion', 'U') IS NULL "
+        "CREATE TABLE dbo.SchemaVersion ("
+        " Version INT PRIMARY KEY,"
+        " Name NVARCHAR(200) NOT NULL,"
+        " AppliedAt DATETIME NOT NULL DEFAULT GETDATE())"
+    ),
+    'sqlite': (
+        "CREATE TABLE IF NOT EXISTS SchemaVersion ("
+        " Version INT PRIMARY KEY,"
+        " Name NVARCHAR(200) NOT NULL,"
+        " AppliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ),
+}
+
+
+class Migration:
+    """One versioned script for one backend."""
+
+    __slots__ = ('version', 'name', 'path')
+
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+
+    def batches(self):
+        """Return the script's SQL batches (split on ``GO`` lines)."""
+        with open(self.path, encoding='utf-8') as fh:
+            text = fh.read()
+        return [b.strip() for b in _GO.split(text) if _strip_comments(b).strip()]
+
+
+def available(backend_name, directory=MIGRATIONS_DIR):
+    """List the migrations for `backend_name`, ordered by version."""
+    found = {}
+    for entry in sorted(os.listdir(directory)):
+        m = _FILE_NAME.match(entry)
+        if not m or m.group(3) != backend_name:
+            continue
+        version = int(m.group(1))
+        if version in found:
+            raise ValueError(f'duplicate migration version {version} for {backend_name}')
+        found[version] = Migration(version, m.group(2), os.path.join(directory, entry))
+    return [found[v] for v in sorted(found)]
+
+
+def applied_versions(conn, backend_name):
+    """Return the set of versions recorded in ``SchemaVersion``."""
+    cur = conn.cursor()
+    cur.execute(_VERSION_TABLE[backend_name])
+    conn.commit()
+    cur.execute('SELECT Version FROM SchemaVersion')
+    return {row[0] for row in cur.fetchall()}
+
+
+def upgrade(conn=None, backend=None, target=None, directory=MIGRATIONS_DIR):
+    """Apply pending migrations up to `target` (default: all).
+
+    Args:
+        conn: connection to migrate; defaults to a pooled connection.
+        backend: `backends.Backend` of `conn`; defaults to the active one.
+        target (int): highest version to apply.
+
+    Returns:
+        list: the `Migration` objects that were applied.
+    """
+    if conn is None:
+        from db import get_backend, get_pool
+        with get_pool().connection() as pooled:
+            return upgrade(pooled, backend or get_backend(), target, directory)
+    if backend is None:
+        from db import get_backend
+        backend = get_backend()
+    done = applied_versions(conn, backend.name)
+    applied = []
+    for migration in available(backend.name, directory):
+        if migration.version in done:
+            continue
+        if target is not None and migration.version > target:
+            break
+        cur = conn.cursor()
+        try:
+            for batch in migration.batches():
+                cur.execute(batch)
+            cur.execute('INSERT INTO SchemaVersion (Version, Name) VALUES (?, ?)',
+                        (migration.version, migration.name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(migration)
+    return applied
+
+
+def _strip_comments(sql):
+    return '\n'.join(line for line in sql.splitlines() if not line.strip().startswith('--'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply Bank database schema migrations.')
+    parser.add_argument('--target', type=int, help='highest version to apply')
+    parser.add_argument('--list', action='store_true', help='list migrations and exit')
+    args = parser.parse_args(argv)
+
+    from db import get_backend, get_pool
+    backend = get_backend()
+    with get_pool().connection() as conn:
+        if args.list:
+            done = applied_versions(conn, backend.name)
+            for m in available(backend.name):
+                state = 'applied' if m.version in done else 'pending'
+                print(f'{m.version:04d} {m.name:<40} {state}')
+            return
+        applied = upgrade(conn, backend, args.target)
+    for m in applied:
+        print(f'applied {m.version:04d} {m.name}')
+    if not applied:
+        print('database is up to date')
+
+
+if __name__ == '__main__':
+    main()
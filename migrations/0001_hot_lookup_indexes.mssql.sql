@@ -0,0 +1,42 @@
+-- Indexes for the hot lookup paths: per-account transaction history,
+-- date-range scans, and the foreign keys checked on every delete.
+-- Each statement is guarded so the script can be re-run safely.
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Transaction_AccountId_TransactionDate' AND object_id = OBJECT_ID('dbo.[Transaction]'))
+    CREATE NONCLUSTERED INDEX IX_Transaction_AccountId_TransactionDate
+        ON dbo.[Transaction] (AccountId, TransactionDate)
+        INCLUDE (Amount, Status);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Transaction_TransactionDate' AND object_id = OBJECT_ID('dbo.[Transaction]'))
+    CREATE NONCLUSTERED INDEX IX_Transaction_TransactionDate
+        ON dbo.[Transaction] (TransactionDate)
+        INCLUDE (AccountId, Amount);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Transaction_EmpId' AND object_id = OBJECT_ID('dbo.[Transaction]'))
+    CREATE NONCLUSTERED INDEX IX_Transaction_EmpId
+        ON dbo.[Transaction] (EmpId);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Account_CustomerId' AND object_id = OBJECT_ID('dbo.Account'))
+    CREATE NONCLUSTERED INDEX IX_Account_CustomerId
+        ON dbo.Account (CustomerId)
+        INCLUDE (IBAN, Balance, Status);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Account_BranchId' AND object_id = OBJECT_ID('dbo.Account'))
+    CREATE NONCLUSTERED INDEX IX_Account_BranchId
+        ON dbo.Account (BranchId)
+        INCLUDE (Balance, Currency);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Employee_BranchId' AND object_id = OBJECT_ID('dbo.Employee'))
+    CREATE NONCLUSTERED INDEX IX_Employee_BranchId
+        ON dbo.Employee (BranchId);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_Employee_DeptCode' AND object_id = OBJECT_ID('dbo.Employee'))
+    CREATE NONCLUSTERED INDEX IX_Employee_DeptCode
+        ON dbo.Employee (DeptCode);
+GO
@@ -0,0 +1,31 @@
+-- Indexes for the hot lookup paths: per-account transaction history,
+-- date-range scans, and the foreign keys checked on every delete.
+-- SQLite has no INCLUDE clause; covered columns are trailing key columns.
+
+CREATE INDEX IF NOT EXISTS IX_Transaction_AccountId_TransactionDate
+    ON [Transaction] (AccountId, TransactionDate, Amount, Status);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Transaction_TransactionDate
+    ON [Transaction] (TransactionDate, AccountId, Amount);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Transaction_EmpId
+    ON [Transaction] (EmpId);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Account_CustomerId
+    ON Account (CustomerId, IBAN, Balance, Status);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Account_BranchId
+    ON Account (BranchId, Balance, Currency);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Employee_BranchId
+    ON Employee (BranchId);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_Employee_DeptCode
+    ON Employee (DeptCode);
+GO
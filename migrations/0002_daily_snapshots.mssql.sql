@@ -0,0 +1,48 @@
+-- Pre-aggregated daily snapshots maintained by snapshots.py:
+-- per-account end-of-day balances, per-branch daily totals, the
+-- watermark of the last transaction folded in, and the job's work table.
+
+IF OBJECT_ID('dbo.DailyAccountBalance', 'U') IS NULL
+    CREATE TABLE dbo.DailyAccountBalance (
+        AccountId      INT NOT NULL,
+        BalanceDate    DATE NOT NULL,
+        TxnCount       INT NOT NULL,
+        NetAmount      DECIMAL(18,2) NOT NULL,
+        ClosingBalance DECIMAL(18,2),
+        CONSTRAINT PK_DailyAccountBalance PRIMARY KEY (AccountId, BalanceDate)
+    );
+GO
+
+IF OBJECT_ID('dbo.BranchDailySummary', 'U') IS NULL
+    CREATE TABLE dbo.BranchDailySummary (
+        BranchId       INT NOT NULL,
+        SummaryDate    DATE NOT NULL,
+        TxnCount       INT NOT NULL,
+        AccountCount   INT NOT NULL,
+        Credits        DECIMAL(18,2) NOT NULL,
+        Debits         DECIMAL(18,2) NOT NULL,
+        NetAmount      DECIMAL(18,2) NOT NULL,
+        CONSTRAINT PK_BranchDailySummary PRIMARY KEY (BranchId, SummaryDate)
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_BranchDailySummary_SummaryDate' AND object_id = OBJECT_ID('dbo.BranchDailySummary'))
+    CREATE NONCLUSTERED INDEX IX_BranchDailySummary_SummaryDate
+        ON dbo.BranchDailySummary (SummaryDate)
+        INCLUDE (TxnCount, Credits, Debits, NetAmount);
+GO
+
+IF OBJECT_ID('dbo.SnapshotWatermark', 'U') IS NULL
+    CREATE TABLE dbo.SnapshotWatermark (
+        Name              NVARCHAR(50) PRIMARY KEY,
+        LastTransactionId INT NOT NULL,
+        UpdatedAt         DATETIME NOT NULL DEFAULT GETDATE()
+    );
+GO
+
+IF OBJECT_ID('dbo.SnapshotTouched', 'U') IS NULL
+    CREATE TABLE dbo.SnapshotTouched (
+        AccountId INT PRIMARY KEY,
+        FromDate  DATE NOT NULL
+    );
+GO
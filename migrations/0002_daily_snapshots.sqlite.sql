@@ -0,0 +1,42 @@
+-- Pre-aggregated daily snapshots maintained by snapshots.py:
+-- per-account end-of-day balances, per-branch daily totals, the
+-- watermark of the last transaction folded in, and the job's work table.
+
+CREATE TABLE IF NOT EXISTS DailyAccountBalance (
+    AccountId      INT NOT NULL,
+    BalanceDate    DATE NOT NULL,
+    TxnCount       INT NOT NULL,
+    NetAmount      DECIMAL(18,2) NOT NULL,
+    ClosingBalance DECIMAL(18,2),
+    PRIMARY KEY (AccountId, BalanceDate)
+);
+GO
+
+CREATE TABLE IF NOT EXISTS BranchDailySummary (
+    BranchId       INT NOT NULL,
+    SummaryDate    DATE NOT NULL,
+    TxnCount       INT NOT NULL,
+    AccountCount   INT NOT NULL,
+    Credits        DECIMAL(18,2) NOT NULL,
+    Debits         DECIMAL(18,2) NOT NULL,
+    NetAmount      DECIMAL(18,2) NOT NULL,
+    PRIMARY KEY (BranchId, SummaryDate)
+);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_BranchDailySummary_SummaryDate
+    ON BranchDailySummary (SummaryDate, TxnCount, Credits, Debits, NetAmount);
+GO
+
+CREATE TABLE IF NOT EXISTS SnapshotWatermark (
+    Name              NVARCHAR(50) PRIMARY KEY,
+    LastTransactionId INT NOT NULL,
+    UpdatedAt         DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+GO
+
+CREATE TABLE IF NOT EXISTS SnapshotTouched (
+    AccountId INT PRIMARY KEY,
+    FromDate  DATE NOT NULL
+);
+GO
@@ -0,0 +1,50 @@
+-- Monthly partitioning for archived transactions: the partition
+-- function/scheme on TransactionDate, the page-compressed
+-- TransactionArchive table partitioned on it, and the TransactionHistory
+-- view over the hot and archived rows. archive.py moves closed months
+-- out of [Transaction] and adds a boundary for every month it archives.
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pfTransactionMonth')
+BEGIN
+    -- start with one boundary at the current month; everything archived
+    -- lies before it, so the partition to its right stays empty
+    DECLARE @first DATE = DATEFROMPARTS(YEAR(GETDATE()), MONTH(GETDATE()), 1);
+    CREATE PARTITION FUNCTION pfTransactionMonth (DATE) AS RANGE RIGHT FOR VALUES (@first);
+END
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'psTransactionMonth')
+    CREATE PARTITION SCHEME psTransactionMonth AS PARTITION pfTransactionMonth ALL TO ([PRIMARY]);
+GO
+
+IF OBJECT_ID('dbo.TransactionArchive', 'U') IS NULL
+    CREATE TABLE dbo.TransactionArchive (
+        TransactionId   INT NOT NULL,
+        AccountId       INT NOT NULL,
+        EmpId           INT NOT NULL,
+        Amount          DECIMAL(18,2),
+        Status          NVARCHAR(20),
+        TransactionDate DATE NOT NULL,
+        TransactionTime TIME,
+        ArchivedAt      DATETIME NOT NULL DEFAULT GETDATE(),
+        CONSTRAINT PK_TransactionArchive PRIMARY KEY CLUSTERED (TransactionId, TransactionDate)
+            WITH (DATA_COMPRESSION = PAGE)
+    ) ON psTransactionMonth (TransactionDate);
+GO
+
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'IX_TransactionArchive_AccountId_TransactionDate' AND object_id = OBJECT_ID('dbo.TransactionArchive'))
+    CREATE NONCLUSTERED INDEX IX_TransactionArchive_AccountId_TransactionDate
+        ON dbo.TransactionArchive (AccountId, TransactionDate)
+        INCLUDE (Amount, Status)
+        WITH (DATA_COMPRESSION = PAGE)
+        ON psTransactionMonth (TransactionDate);
+GO
+
+IF OBJECT_ID('dbo.TransactionHistory', 'V') IS NULL
+    EXEC('CREATE VIEW dbo.TransactionHistory AS
+          SELECT TransactionId, AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime
+          FROM dbo.[Transaction]
+          UNION ALL
+          SELECT TransactionId, AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime
+          FROM dbo.TransactionArchive');
+GO
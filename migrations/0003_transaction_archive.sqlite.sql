@@ -0,0 +1,31 @@
+-- Archived transactions: the TransactionArchive table (SQLite has no
+-- partitioning; archive.py moves closed months into it) and the
+-- TransactionHistory view over the hot and archived rows.
+
+CREATE TABLE IF NOT EXISTS TransactionArchive (
+    TransactionId   INTEGER PRIMARY KEY,
+    AccountId       INT NOT NULL,
+    EmpId           INT NOT NULL,
+    Amount          DECIMAL(18,2),
+    Status          NVARCHAR(20),
+    TransactionDate DATE NOT NULL,
+    TransactionTime TIME,
+    ArchivedAt      DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_TransactionArchive_AccountId_TransactionDate
+    ON TransactionArchive (AccountId, TransactionDate, Amount, Status);
+GO
+
+CREATE INDEX IF NOT EXISTS IX_TransactionArchive_TransactionDate
+    ON TransactionArchive (TransactionDate);
+GO
+
+CREATE VIEW IF NOT EXISTS TransactionHistory AS
+    SELECT TransactionId, AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime
+    FROM [Transaction]
+    UNION ALL
+    SELECT TransactionId, AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime
+    FROM TransactionArchive;
+GO
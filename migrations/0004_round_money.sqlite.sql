@@ -0,0 +1,21 @@
+-- Money written before balances were rounded on every update drifted
+-- by float arithmetic (e.g. 37324.829999999994). Snap every stored
+-- amount back to its value in cents. SQL Server stores DECIMAL exactly
+-- and needs no counterpart.
+
+UPDATE Account SET Balance = ROUND(Balance, 2) WHERE Balance <> ROUND(Balance, 2);
+GO
+
+UPDATE [Transaction] SET Amount = ROUND(Amount, 2) WHERE Amount <> ROUND(Amount, 2);
+GO
+
+UPDATE TransactionArchive SET Amount = ROUND(Amount, 2) WHERE Amount <> ROUND(Amount, 2);
+GO
+
+UPDATE DailyAccountBalance SET NetAmount = ROUND(NetAmount, 2), ClosingBalance = ROUND(ClosingBalance, 2)
+WHERE NetAmount <> ROUND(NetAmount, 2) OR ClosingBalance <> ROUND(ClosingBalance, 2);
+GO
+
+UPDATE BranchDailySummary SET Credits = ROUND(Credits, 2), Debits = ROUND(Debits, 2), NetAmount = ROUND(NetAmount, 2)
+WHERE Credits <> ROUND(Credits, 2) OR Debits <> ROUND(Debits, 2) OR NetAmount <> ROUND(NetAmount, 2);
+GO
@@ -0,0 +1,17 @@
+-- Days whose snapshots went stale after a posted transaction was
+-- amended or cancelled (posting.py records them, the next
+-- snapshots.refresh() recomputes and removes them), and the snapshot
+-- watermark row itself, seeded here so concurrent first refreshes only
+-- ever lock and update it.
+
+IF OBJECT_ID('dbo.SnapshotPending', 'U') IS NULL
+    CREATE TABLE dbo.SnapshotPending (
+        PendingId INT IDENTITY(1,1) PRIMARY KEY,
+        AccountId INT NOT NULL,
+        FromDate  DATE NOT NULL
+    );
+GO
+
+IF NOT EXISTS (SELECT 1 FROM dbo.SnapshotWatermark WHERE Name = 'daily')
+    INSERT INTO dbo.SnapshotWatermark (Name, LastTransactionId) VALUES ('daily', 0);
+GO
@@ -0,0 +1,16 @@
+-- Days whose snapshots went stale after a posted transaction was
+-- amended or cancelled (posting.py records them, the next
+-- snapshots.refresh() recomputes and removes them), and the snapshot
+-- watermark row itself, seeded here so concurrent first refreshes only
+-- ever lock and update it.
+
+CREATE TABLE IF NOT EXISTS SnapshotPending (
+    PendingId INTEGER PRIMARY KEY,
+    AccountId INT NOT NULL,
+    FromDate  DATE NOT NULL
+);
+GO
+
+INSERT INTO SnapshotWatermark (Name, LastTransactionId)
+SELECT 'daily', 0 WHERE NOT EXISTS (SELECT 1 FROM SnapshotWatermark WHERE Name = 'daily');
+GO
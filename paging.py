@@ -0,0 +1,191 @@
+"""Keyset pagination for the table views.
+
+`PageQuery` describes a table listing (table, columns, key column) and
+fetches it one page at a time with ``WHERE key > ? ORDER BY key`` plus
+``TOP``/``LIMIT``, so the cost of a page does not depend on how far into
+the table it is, unlike ``OFFSET``. Pages of the reference tables are
+served through `cache.fetch`.
+
+Listings can be sorted by any selected column and filtered with
+per-column ``LIKE`` patterns. Sorting by a column other than the key
+seeks on the pair ``(column, key)``, with NULLs ordered before all
+other values as both SQL Server and SQLite do for ``ASC``. Column names
+are only ever taken from `columns`, never from user input.
+
+The table, sort order and filters are kept in one immutable `_View`
+that the setters replace, so a page fetched on the DB executor reads a
+consistent set of all three even while the UI thread changes them.
+"""
+
+from collections import namedtuple
+
+import cache
+from data import ResultSet, fetch_result
+from db import get_backend
+
+PAGE_SIZE = 200
+
+# Keys per `IN (...)` list in `PageQuery.rows`.
+ROWS_CHUNK_SIZE = 500
+
+# `filters` is a tuple of (column, text) pairs
+_View = namedtuple('_View', 'table sort_column descending filters')
+
+
+class PageQuery:
+    """Keyset-paginated ``SELECT`` over one table.
+
+    Args:
+        table (str): table name as written in SQL (e.g. ``'[Transaction]'``).
+        columns (sequence): column names to select, in display order.
+        key (str): unique, non-null column used for ordering and seeking;
+            must be one of `columns`.
+    """
+
+    def __init__(self, table, columns, key):
+        if key not in columns:
+            raise ValueError(f'key column {key!r} must be selected')
+        self.columns = tuple(columns)
+        self.key = key
+        self.key_index = self.columns.index(key)
+        self._view = _View(table, key, False, ())
+
+    @property
+    def table(self):
+        """Table or view listed; may be switched, e.g. to include history."""
+        return self._view.table
+
+    @table.setter
+    def table(self, table):
+        self._view = self._view._replace(table=table)
+
+    @property
+    def sort_column(self):
+        return self._view.sort_column
+
+    @property
+    def descending(self):
+        return self._view.descending
+
+    @property
+    def filters(self):
+        """Active filters as a new ``{column: text}`` dict."""
+        return dict(self._view.filters)
+
+    def key_of(self, row):
+        """Return the key value of a row returned by `page`."""
+        return row[self.key_index]
+
+    def cursor_of(self, row):
+        """Return the seek position of `row` to pass as `after`/`before`.
+
+        This is the key value when sorting by the key, otherwise the pair
+        ``(sort value, key)``.
+        """
+        sort_column = self._view.sort_column
+        if sort_column == self.key:
+            return row[self.key_index]
+        return (row[self.columns.index(sort_column)], row[self.key_index])
+
+    @property
+    def key_order(self):
+        """True when rows are listed in plain ascending key order."""
+        view = self._view
+        return view.sort_column == self.key and not view.descending
+
+    def set_sort(self, column, descending=False):
+        """Order pages by `column` (one of `columns`), then by the key."""
+        self._check(column)
+        self._view = self._view._replace(sort_column=column, descending=bool(descending))
+
+    def set_filter(self, column, text):
+        """Keep rows whose `column` contains `text`; empty text clears the filter."""
+        self._check(column)
+        text = '' if text is None else str(text).strip()
+        filters = self.filters
+        if text:
+            filters[column] = text
+        else:
+            filters.pop(column, None)
+        self._view = self._view._replace(filters=tuple(filters.items()))
+
+    def page(self, after=None, before=None, limit=PAGE_SIZE):
+        """Fetch one page of rows in the current sort order.
+
+        Args:
+            after: cursor (see `cursor_of`); return the rows following it.
+            before: cursor; return the rows immediately preceding it.
+            limit (int): maximum rows to return.
+
+        Returns:
+            data.ResultSet: rows in display order.
+        """
+        view = self._view
+        cols = ', '.join(self.columns)
+        clauses, params = _filter_clauses(view.filters)
+        # walking backwards reads the opposite order and reverses it
+        backwards = before is not None
+        descending = view.descending != backwards
+        cursor = before if backwards else after
+        if cursor is not None:
+            seek, seek_params = self._seek(view.sort_column, cursor, 'lt' if descending else 'gt')
+            clauses.append(seek)
+            params.extend(seek_params)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        direction = 'DESC' if descending else 'ASC'
+        order = f'{self.key} {direction}'
+        if view.sort_column != self.key:
+            order = f'{view.sort_column} {direction}, {order}'
+        query = get_backend().limit(f'SELECT {cols} FROM {view.table}{where} ORDER BY {order}', limit)
+        rows = cache.fetch(view.table, query, params, fetch_result)
+        return rows.reversed() if backwards else rows
+
+    def rows(self, keys):
+        """Fetch the rows with the given key values (in no particular order).
+
+        Keys that no longer exist, or no longer match the filters, are
+        simply missing from the result.
+        """
+        keys = list(keys)
+        view = self._view
+        parts = []
+        cols = ', '.join(self.columns)
+        clauses, params = _filter_clauses(view.filters)
+        where = ''.join(f' AND {c}' for c in clauses)
+        for start in range(0, len(keys), ROWS_CHUNK_SIZE):
+            chunk = keys[start:start + ROWS_CHUNK_SIZE]
+            marks = ','.join('?' * len(chunk))
+            parts.append(cache.fetch(
+                view.table, f'SELECT {cols} FROM {view.table} WHERE {self.key} IN ({marks}){where}',
+                chunk + params, fetch_result))
+        if len(parts) == 1:
+            return parts[0]
+        return ResultSet.concat(self.columns, parts)
+
+    def _check(self, column):
+        if column not in self.columns:
+            raise ValueError(f'unknown column {column!r}')
+
+    def _seek(self, s, cursor, op):
+        # `s` is the sort column; `op` is 'gt' (rows after the cursor in
+        # ascending order) or 'lt'
+        k = self.key
+        if s == k:
+            return (f'{k} > ?' if op == 'gt' else f'{k} < ?'), [cursor]
+        value, key = cursor
+        if op == 'gt':
+            if value is None:
+                return f'(({s} IS NULL AND {k} > ?) OR {s} IS NOT NULL)', [key]
+            return f'({s} > ? OR ({s} = ? AND {k} > ?))', [value, value, key]
+        if value is None:
+            return f'({s} IS NULL AND {k} < ?)', [key]
+        return f'({s} < ? OR {s} IS NULL OR ({s} = ? AND {k} < ?))', [value, value, key]
+
+
+def _filter_clauses(filters):
+    clauses, params = [], []
+    for column, text in filters:
+        escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_').replace('[', '\\[')
+        clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+        params.append(f'%{escaped}%')
+    return clauses, params
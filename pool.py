@@ -0,0 +1,291 @@
+"""Bounded, thread-safe connection pool.
+
+`ConnectionPool` keeps a set of open DB-API connections so that callers
+do not pay a full login handshake for every statement. Connections are
+created by a factory (normally `db.get_connection`), validated on
+checkout, evicted after sitting idle for too long and capped at
+`max_size`. When the pool is exhausted, callers wait up to `timeout`
+seconds for a connection to be returned.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the timeout."""
+
+
+class _Slot:
+    """Book-keeping for one pooled connection."""
+
+    __slots__ = ('conn', 'created', 'last_used', 'state')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created = time.monotonic()
+        self.last_used = self.created
+        self.state = {}
+
+
+class ConnectionPool:
+    """Pool of reusable database connections.
+
+    Args:
+        factory (callable): zero-argument function returning a new
+            connection.
+        min_size (int): connections opened eagerly and kept even when idle.
+        max_size (int): hard cap on open connections (idle + in use).
+        timeout (float): seconds `acquire` waits for a free connection
+            before raising `PoolTimeout`.
+        max_idle (float): seconds after which an idle connection above
+            `min_size` is closed.
+        health_check (callable): optional `check(conn)` used on checkout;
+            should raise if the connection is unusable. Defaults to
+            running ``SELECT 1``.
+        ping_after (float): only health-check connections that have been
+            idle at least this many seconds, so back-to-back statements
+            do not pay an extra round-trip each.
+    """
+
+    def __init__(self, factory, min_size=1, max_size=10, timeout=30.0,
+                 max_idle=300.0, health_check=None, ping_after=1.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError('require 0 <= min_size <= max_size and max_size >= 1')
+        self._factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._health_check = health_check or _select_one
+        self.ping_after = ping_after
+        self._idle = []
+        self._in_use = {}
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'evicted': 0,
+            'broken': 0,
+        }
+        for _ in range(min_size):
+            self._idle.append(_Slot(self._factory()))
+
+    # ----------------------------------------------------------- checkout
+
+    def acquire(self, timeout=None):
+        """Borrow a connection from the pool.
+
+        Reuses an idle connection when one passes the health check,
+        otherwise opens a new one if below `max_size`, otherwise waits.
+
+        Args:
+            timeout (float): override the pool's default wait timeout.
+
+        Returns:
+            a live DB-API connection; give it back with `release`.
+
+        Raises:
+            PoolTimeout: no connection became available in time.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError('connection pool is closed')
+                self._evict_idle_locked()
+                if self._idle:
+                    slot = self._idle.pop()
+                    ok = True
+                    if time.monotonic() - slot.last_used >= self.ping_after:
+                        # run the health check outside the lock; a slow or
+                        # dead server must not block other borrowers
+                        self._in_use[id(slot.conn)] = slot
+                        self._cond.release()
+                        try:
+                            ok = self._is_healthy(slot.conn)
+                        finally:
+                            self._cond.acquire()
+                            del self._in_use[id(slot.conn)]
+                    if not ok:
+                        self.stats['broken'] += 1
+                        self._close_quietly(slot.conn)
+                        continue
+                    self.stats['hits'] += 1
+                    break
+                if len(self._in_use) < self.max_size:
+                    # reserve the slot before connecting so concurrent
+                    # borrowers cannot overshoot max_size
+                    placeholder = object()
+                    self._in_use[id(placeholder)] = placeholder
+                    self._cond.release()
+                    try:
+                        conn = self._factory()
+                    except Exception:
+                        self._cond.acquire()
+                        del self._in_use[id(placeholder)]
+                        self._cond.notify()
+                        raise
+                    self._cond.acquire()
+                    del self._in_use[id(placeholder)]
+                    slot = _Slot(conn)
+                    self.stats['misses'] += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    if waited is not None:
+                        self.stats['wait_time'] += time.monotonic() - waited
+                    raise PoolTimeout(
+                        f'no connection available after {timeout:.1f}s '
+                        f'(max_size={self.max_size})')
+                if waited is None:
+                    waited = time.monotonic()
+                    self.stats['waits'] += 1
+                self._cond.wait(remaining)
+            if waited is not None:
+                self.stats['wait_time'] += time.monotonic() - waited
+            self._in_use[id(slot.conn)] = slot
+            return slot.conn
+
+    def release(self, conn, discard=False):
+        """Return a connection previously obtained from `acquire`.
+
+        Any open transaction is rolled back so the next borrower starts
+        clean. Connections that fail the rollback, or that the caller
+        flags with `discard=True`, are closed instead of reused.
+        """
+        with self._cond:
+            slot = self._in_use.get(id(conn))
+        if slot is None:
+            raise ValueError('connection does not belong to this pool')
+        if not discard:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        with self._cond:
+            del self._in_use[id(conn)]
+            if discard:
+                self.stats['broken'] += 1
+            if discard or self._closed:
+                self._close_quietly(conn)
+            else:
+                slot.last_used = time.monotonic()
+                self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager wrapping `acquire`/`release`.
+
+        The connection is discarded rather than reused if the block
+        raises a database error that may have left it in a bad state.
+        """
+        conn = self.acquire(timeout)
+        discard = False
+        try:
+            yield conn
+        except Exception as e:
+            discard = _looks_disconnected(e)
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def state(self, conn):
+        """Return a dict private to the borrowed connection `conn`.
+
+        Callers keep per-connection objects in it, such as cursors
+        holding prepared statements. It lives exactly as long as the
+        connection and is dropped when the connection is closed.
+
+        Raises:
+            ValueError: `conn` is not currently borrowed from this pool.
+        """
+        with self._cond:
+            slot = self._in_use.get(id(conn))
+        if slot is None or not isinstance(slot, _Slot):
+            raise ValueError('connection is not checked out from this pool')
+        return slot.state
+
+    # ------------------------------------------------------- maintenance
+
+    def evict_idle(self):
+        """Close idle connections older than `max_idle` (keeps `min_size`)."""
+        with self._cond:
+            self._evict_idle_locked()
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts.
+
+        Connections currently borrowed are closed when released.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for slot in idle:
+            self._close_quietly(slot.conn)
+
+    def snapshot(self):
+        """Return a copy of the counters plus current pool occupancy."""
+        with self._cond:
+            out = dict(self.stats)
+            out['idle'] = len(self._idle)
+            out['in_use'] = len(self._in_use)
+        return out
+
+    # ----------------------------------------------------------- private
+
+    def _evict_idle_locked(self):
+        if not self.max_idle:
+            return
+        now = time.monotonic()
+        keep = []
+        # the list is used LIFO, so the oldest idle slots sit at the front
+        total = len(self._idle) + len(self._in_use)
+        for slot in self._idle:
+            if now - slot.last_used > self.max_idle and total > self.min_size:
+                self._close_quietly(slot.conn)
+                self.stats['evicted'] += 1
+                total -= 1
+            else:
+                keep.append(slot)
+        self._idle = keep
+
+    def _is_healthy(self, conn):
+        try:
+            self._health_check(conn)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def _select_one(conn):
+    cur = conn.cursor()
+    try:
+        cur.execute('SELECT 1')
+        cur.fetchall()
+    finally:
+        cur.close()
+
+
+def _looks_disconnected(exc):
+    """Best-effort test for errors that leave a connection unusable."""
+    # ODBC SQLSTATE class 08 is "connection exception"
+    state = str(exc.args[0]) if getattr(exc, 'args', None) else ''
+    return state.startswith('08')
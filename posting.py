@@ -0,0 +1,286 @@
+"""Posting engine: apply transactions to account balances atomically.
+
+A posting records a row in ``[Transaction]`` and adds its amount to
+``Account.Balance`` (stamping ``LastTransactionDate``) in the same
+database transaction. Posted transactions are changed only through
+`amend()` and `cancel()`, which move the old amount back off the
+balance in the transaction that rewrites or deletes the row, and the
+app never edits ``Balance`` directly. The stored balance is therefore
+always the opening balance of the account plus its posted transactions
+and never needs to be recomputed by scanning the transaction table.
+(`importer` loads history rows that are already part of the imported
+balances.)
+
+The balance update is a single conditional ``UPDATE`` that takes a row
+lock (``UPDLOCK, ROWLOCK`` on SQL Server) and refuses to overdraw the
+account, which prevents lost updates between concurrent tellers.
+The statements come from the `queries` catalog, so each pooled
+connection prepares them once and reuses them for every posting.
+Committed postings drop the cached `search` profiles listing the
+accounts they changed, and corrections record the days they change for
+the next `snapshots.refresh`.
+"""
+
+from decimal import Decimal, InvalidOperation
+
+import instrument
+import queries
+import search
+from db import get_backend, get_pool
+
+# Postings applied per commit in `post_batch`.
+BATCH_SIZE = 1000
+
+_CENT = Decimal('0.01')
+
+
+class PostingError(Exception):
+    """Raised when a posting is rejected (unknown account, overdraft, bad FK)."""
+
+
+def post(account_id, emp_id, amount, allow_overdraft=False):
+    """Post one transaction and return the account's new balance.
+
+    Args:
+        account_id (int): account to debit (negative amount) or credit.
+        emp_id (int): employee recording the transaction.
+        amount: signed amount; converted to a 2-decimal `Decimal`.
+        allow_overdraft (bool): permit the balance to go below zero.
+
+    Returns:
+        Decimal: balance after the posting.
+
+    Raises:
+        PostingError: the posting was rejected; nothing was written.
+    """
+    with instrument.statement('posting.post') as t, get_pool().connection() as conn:
+        t.acquired()
+        balance = _apply(conn, account_id, emp_id, amount, allow_overdraft)
+        conn.commit()
+        t.executed(1)
+    search.invalidate_accounts([account_id])
+    return balance
+
+
+def post_batch(postings, batch_size=BATCH_SIZE, allow_overdraft=False):
+    """Post many transactions, committing every `batch_size` postings.
+
+    Rejected postings (unknown account, insufficient funds, unknown
+    employee) are skipped without affecting the rest of the batch. A
+    database error that is not specific to one posting aborts the call;
+    batches committed before it stay committed.
+
+    Args:
+        postings (iterable): ``(account_id, emp_id, amount)`` tuples.
+        batch_size (int): postings per database transaction.
+        allow_overdraft (bool): permit balances to go below zero.
+
+    Returns:
+        tuple: ``(balances, rejected)`` — `balances` lists the new balance
+        after each posting (None where rejected) in input order, and
+        `rejected` maps the input index of each rejected posting to the
+        reason.
+    """
+    balances = []
+    rejected = {}
+    posted = set()
+    try:
+        with instrument.statement('posting.post_batch') as t, get_pool().connection() as conn:
+            t.acquired()
+            pending = 0
+            for index, (account_id, emp_id, amount) in enumerate(postings):
+                try:
+                    balances.append(_apply(conn, account_id, emp_id, amount, allow_overdraft))
+                    posted.add(account_id)
+                except PostingError as e:
+                    balances.append(None)
+                    rejected[index] = str(e)
+                pending += 1
+                if pending >= batch_size:
+                    conn.commit()
+                    pending = 0
+            conn.commit()
+            t.executed(len(balances) - len(rejected))
+    finally:
+        # batches committed before an error stay committed
+        search.invalidate_accounts(posted)
+    return balances, rejected
+
+
+def amend(transaction_id, account_id, emp_id, amount, allow_overdraft=False):
+    """Change a posted transaction and move the difference onto the balances.
+
+    The old amount is reversed on the old account and the new amount
+    applied to `account_id` (which may be the same account) in the same
+    database transaction as the row update. ``LastTransactionDate`` is
+    not touched.
+
+    Args:
+        transaction_id (int): transaction in ``[Transaction]``; archived
+            transactions cannot be changed.
+        account_id (int): account the transaction now belongs to.
+        emp_id (int): employee recording the transaction.
+        amount: new signed amount; converted to a 2-decimal `Decimal`.
+        allow_overdraft (bool): permit balances to go below zero.
+
+    Returns:
+        Decimal: balance of `account_id` after the change.
+
+    Raises:
+        PostingError: the change was rejected; nothing was written.
+    """
+    amount = money(amount)
+    with instrument.statement('posting.amend') as t, get_pool().connection() as conn:
+        t.acquired()
+        old_account, old_amount, day = _locked(conn, transaction_id)
+        try:
+            queries.execute_on(conn, 'transaction.update', (account_id, emp_id, amount, transaction_id))
+        except Exception as e:
+            if not get_backend().is_integrity_error(e):
+                raise
+            raise PostingError(f'transaction {transaction_id}: cannot record the change ({e})') from e
+        deltas = {old_account: -old_amount}
+        deltas[account_id] = deltas.get(account_id, 0) + amount
+        balances = {}
+        # ascending account order, like transfers, so concurrent
+        # corrections cannot deadlock on each other's rows
+        for aid in sorted(deltas):
+            balances[aid] = _adjust(conn, aid, deltas[aid], allow_overdraft)
+        _stale(conn, sorted(deltas), day)
+        conn.commit()
+        t.executed(1)
+    search.invalidate_accounts(balances)
+    return balances[account_id]
+
+
+def cancel(transaction_id, allow_overdraft=False):
+    """Delete a posted transaction and take its amount back off the balance.
+
+    Args:
+        transaction_id (int): transaction in ``[Transaction]``; archived
+            transactions cannot be cancelled.
+        allow_overdraft (bool): permit the reversal to overdraw the
+            account (cancelling a deposit that was already spent).
+
+    Returns:
+        Decimal: the account's balance after the reversal.
+
+    Raises:
+        PostingError: the cancellation was rejected; nothing was written.
+    """
+    with instrument.statement('posting.cancel') as t, get_pool().connection() as conn:
+        t.acquired()
+        account_id, balance = _cancel(conn, transaction_id, allow_overdraft)
+        conn.commit()
+        t.executed(1)
+    search.invalidate_accounts([account_id])
+    return balance
+
+
+def cancel_many(transaction_ids, allow_overdraft=False):
+    """Cancel many transactions in a single database transaction.
+
+    Same contract as `data.delete_many`, so `helpers.delete_selected`
+    can use it: rejected cancellations are skipped and reported, the
+    rest are committed together.
+
+    Returns:
+        tuple: ``(cancelled, failures)`` where `cancelled` lists the
+        transaction ids removed and `failures` maps each rejected id to
+        the reason.
+    """
+    cancelled = []
+    failures = {}
+    accounts = set()
+    with instrument.statement('posting.cancel_many') as t, get_pool().connection() as conn:
+        t.acquired()
+        for transaction_id in transaction_ids:
+            try:
+                accounts.add(_cancel(conn, transaction_id, allow_overdraft)[0])
+                cancelled.append(transaction_id)
+            except PostingError as e:
+                failures[transaction_id] = str(e)
+        conn.commit()
+        t.executed(len(cancelled))
+    search.invalidate_accounts(accounts)
+    return cancelled, failures
+
+
+def money(amount):
+    """Return `amount` as a `Decimal` rounded to cents.
+
+    Raises:
+        PostingError: `amount` is not a finite number.
+    """
+    try:
+        value = Decimal(str(amount))
+        if value.is_finite():
+            return value.quantize(_CENT)
+    except InvalidOperation:
+        pass
+    raise PostingError(f'invalid amount {amount!r}')
+
+
+def _apply(conn, account_id, emp_id, amount, allow_overdraft):
+    amount = money(amount)
+    # insert first: a bad employee or account id fails here before the
+    # balance is touched, and the failed statement leaves no trace
+    try:
+        txn_id = queries.execute_on(conn, 'transaction.insert', (account_id, emp_id, amount))
+    except Exception as e:
+        if not get_backend().is_integrity_error(e):
+            raise
+        raise PostingError(f'account {account_id}: cannot record transaction ({e})') from e
+    if amount < 0 and not allow_overdraft:
+        rows = queries.execute_on(conn, 'account.post_checked', (amount, account_id, amount))
+    else:
+        rows = queries.execute_on(conn, 'account.post', (amount, account_id))
+    if rows:
+        return money(rows[0][0])
+    # undo the transaction row inserted above, then explain the rejection
+    queries.execute_on(conn, 'transaction.delete', (txn_id,))
+    _refused(conn, account_id, amount)
+
+
+def _cancel(conn, transaction_id, allow_overdraft):
+    account_id, amount, day = _locked(conn, transaction_id)
+    # the balance first: a refused reversal has changed nothing yet
+    balance = _adjust(conn, account_id, -amount, allow_overdraft)
+    queries.execute_on(conn, 'transaction.delete', (transaction_id,))
+    _stale(conn, [account_id], day)
+    return account_id, balance
+
+
+def _locked(conn, transaction_id):
+    # (account id, amount, date) of a posted transaction, locked for the change
+    rows = queries.execute_on(conn, 'transaction.lock', (transaction_id,))
+    if not rows:
+        raise PostingError(f'transaction {transaction_id} is archived or no longer exists')
+    return rows[0][0], money(rows[0][1]), rows[0][2]
+
+
+def _stale(conn, account_ids, day):
+    # the snapshots of these accounts from `day` on no longer match the
+    # changed transaction; the watermark alone would never notice
+    if day is None:
+        return
+    for account_id in account_ids:
+        queries.execute_on(conn, 'snapshot.stale', (account_id, day))
+
+
+def _adjust(conn, account_id, amount, allow_overdraft):
+    if amount < 0 and not allow_overdraft:
+        rows = queries.execute_on(conn, 'account.adjust_checked', (amount, account_id, amount))
+    else:
+        rows = queries.execute_on(conn, 'account.adjust', (amount, account_id))
+    if rows:
+        return money(rows[0][0])
+    _refused(conn, account_id, amount)
+
+
+def _refused(conn, account_id, amount):
+    found = queries.execute_on(conn, 'account.balance', (account_id,))
+    if not found:
+        raise PostingError(f'account {account_id} does not exist')
+    raise PostingError(f'account {account_id}: insufficient funds '
+                       f'(balance {money(found[0][0] or 0)}, amount {amount})')
@@ -0,0 +1,250 @@
+"""Catalog of the application's named SQL statements.
+
+Every create/update/delete issued by the tabs, and the statements of
+the posting engine, are defined here once under a dotted name such as
+``'account.update'`` and run by name::
+
+    queries.run('account.update', (iban, cust_id, branch_id, aid))
+
+Each pooled connection keeps one cursor per statement (see
+`ConnectionPool.state`), and a cursor only ever executes the SQL of its
+own statement. pyodbc prepares a statement the first time a cursor
+executes it and re-executes the prepared handle while the SQL text does
+not change, so on SQL Server a statement is parsed and planned once per
+connection instead of on every call; SQLite's per-connection statement
+cache does the same for the local backend.
+
+Timings are recorded under the statement name (see `instrument` and
+`stats`), so the Diagnostics tab shows ``account.update`` rather than
+the SQL text. Writes invalidate the reference-table cache like the
+`data` helpers do, and drop the cached `search` profiles of the
+customer or account named by the statement's `touches`.
+"""
+
+import functools
+
+import cache
+import data
+import instrument
+import search
+from db import get_backend, get_pool
+
+
+class Query:
+    """A named statement in the catalog.
+
+    Args:
+        name (str): ``entity.action`` name used to run it.
+        sql (str or callable): parameterized SQL with ``{fragment}``
+            placeholders, or ``sql(backend)`` returning it when the text
+            differs by dialect.
+        kind (str): ``'execute'`` (returns the row count), ``'insert'``
+            (returns the new `key` value) or ``'fetch'`` (returns rows).
+        key (str): identity column returned by an ``'insert'``.
+        touches (tuple): ``(kind, index)`` pairs naming the parameters
+            that identify a written ``'customer'`` or ``'account'``,
+            whose cached `search` profiles a write drops.
+    """
+
+    __slots__ = ('name', 'sql', 'kind', 'key', 'touches')
+
+    def __init__(self, name, sql, kind='execute', key=None, touches=()):
+        if kind not in ('execute', 'insert', 'fetch'):
+            raise ValueError(f'unknown statement kind {kind!r}')
+        self.name = name
+        self.sql = sql
+        self.kind = kind
+        self.key = key
+        self.touches = tuple(touches)
+
+    def render(self, backend):
+        """Return the SQL executed for this statement on `backend`."""
+        text = self.sql(backend) if callable(self.sql) else backend.render(self.sql)
+        if self.kind == 'insert' and self.key:
+            text = backend.insert_returning(text, self.key)
+        return text
+
+
+CATALOG = {}
+
+
+def define(name, sql, kind='execute', key=None, touches=()):
+    """Add a statement to `CATALOG` and return it."""
+    if name in CATALOG:
+        raise ValueError(f'statement {name!r} is already defined')
+    query = CATALOG[name] = Query(name, sql, kind, key, touches)
+    return query
+
+
+def _posting_update(checked, stamp=True):
+    def build(backend):
+        # rounded so that SQLite, which stores DECIMAL as REAL, keeps
+        # every balance at its exact value in cents
+        where = 'AccountId = ?'
+        if checked:
+            where += ' AND ROUND(COALESCE(Balance, 0) + ?, 2) >= 0'
+        assignments = 'Balance = ROUND(COALESCE(Balance, 0) + ?, 2)'
+        if stamp:
+            assignments += ', LastTransactionDate = {now}'
+        return backend.update_returning('Account', backend.render(assignments), where, 'Balance')
+    return build
+
+
+define('department.insert', 'INSERT INTO Department (DeptCode, Description) VALUES (?,?)')
+define('department.update', 'UPDATE Department SET DeptCode=?, Description=? WHERE DeptCode=?')
+define('department.delete', 'DELETE FROM Department WHERE DeptCode = ?')
+
+define('branch.insert', 'INSERT INTO Branch (BranchCode, Email, Phone) VALUES (?,?,?)', 'insert', 'BranchId')
+define('branch.update', 'UPDATE Branch SET BranchCode=?, Email=?, Phone=? WHERE BranchId=?')
+define('branch.delete', 'DELETE FROM Branch WHERE BranchId = ?')
+
+define('employee.insert', 'INSERT INTO Employee (DeptCode, BranchId, Email) VALUES (?,?,?)', 'insert', 'EmpId')
+define('employee.update', 'UPDATE Employee SET DeptCode=?, BranchId=?, Email=? WHERE EmpId=?')
+define('employee.delete', 'DELETE FROM Employee WHERE EmpId = ?')
+
+define('customer.insert', 'INSERT INTO Customer (SSN, Job, IsActive) VALUES (?,?,1)', 'insert', 'CustomerId')
+define('customer.update', 'UPDATE Customer SET SSN=?, Job=? WHERE CustomerId=?', touches=[('customer', 2)])
+define('customer.delete', 'DELETE FROM Customer WHERE CustomerId = ?', touches=[('customer', 0)])
+
+define('account.insert', 'INSERT INTO Account (IBAN, CustomerId, BranchId, Balance) VALUES (?,?,?,?)',
+       'insert', 'AccountId', touches=[('customer', 1)])
+# the balance only changes through `posting`
+define('account.update', 'UPDATE Account SET IBAN=?, CustomerId=?, BranchId=? WHERE AccountId=?',
+       touches=[('customer', 1), ('account', 3)])
+define('account.delete', 'DELETE FROM Account WHERE AccountId = ?', touches=[('account', 0)])
+define('account.balance', 'SELECT Balance FROM Account WHERE AccountId = ?', 'fetch')
+# posting: add to the balance and return it; `_checked` refuses overdrafts
+define('account.post', _posting_update(False), 'fetch')
+define('account.post_checked', _posting_update(True), 'fetch')
+# corrections of posted transactions: same, without stamping the date
+define('account.adjust', _posting_update(False, stamp=False), 'fetch')
+define('account.adjust_checked', _posting_update(True, stamp=False), 'fetch')
+
+define('transaction.insert',
+       "INSERT INTO [Transaction] (AccountId, EmpId, Amount, Status, TransactionDate, TransactionTime) "
+       "VALUES (?, ?, ?, 'Posted', {today}, {time_now})", 'insert', 'TransactionId')
+define('transaction.update', 'UPDATE [Transaction] SET AccountId=?, EmpId=?, Amount=? WHERE TransactionId=?')
+define('transaction.delete', 'DELETE FROM [Transaction] WHERE TransactionId = ?')
+define('transaction.lock',
+       'SELECT AccountId, Amount, TransactionDate FROM [Transaction] {rowlock} WHERE TransactionId = ?', 'fetch')
+# a day of an account whose snapshot rows the next `snapshots.refresh` recomputes
+define('snapshot.stale', 'INSERT INTO SnapshotPending (AccountId, FromDate) VALUES (?, ?)')
+
+
+@functools.lru_cache(maxsize=None)
+def _rendered(name, backend):
+    return CATALOG[name].render(backend)
+
+
+def sql(name):
+    """Return the SQL of statement `name` for the active backend.
+
+    For code that needs the text itself, e.g. `data.delete_many`.
+    """
+    return _rendered(name, get_backend())
+
+
+def cursor(conn, name):
+    """Return the cursor of borrowed connection `conn` reserved for statement `name`.
+
+    The cursor is created on first use and kept for the life of the
+    connection. Connections not borrowed from the shared pool get a new
+    cursor each time.
+    """
+    try:
+        state = get_pool().state(conn)
+    except ValueError:
+        return conn.cursor()
+    cursors = state.get('cursors')
+    if cursors is None:
+        cursors = state['cursors'] = {}
+    cur = cursors.get(name)
+    if cur is None:
+        cur = cursors[name] = conn.cursor()
+    return cur
+
+
+def execute_on(conn, name, params=()):
+    """Run statement `name` on `conn` inside the caller's transaction.
+
+    Nothing is committed and the reference cache is not invalidated.
+
+    Returns:
+        the new key for ``'insert'`` statements, the rows for
+        ``'fetch'`` statements, otherwise the number of affected rows.
+    """
+    query = CATALOG[name]
+    text = _rendered(name, get_backend())
+    with instrument.statement(name) as t:
+        t.acquired()
+        return _execute(cursor(conn, name), query, text, params, t)
+
+
+def run(name, params=()):
+    """Run statement `name` on a pooled connection and commit.
+
+    Args:
+        name (str): a `CATALOG` name.
+        params (tuple): parameters to bind.
+
+    Returns:
+        as `execute_on`.
+
+    Raises:
+        KeyError: unknown statement name.
+    """
+    query = CATALOG[name]
+    text = _rendered(name, get_backend())
+    with instrument.statement(name) as t, get_pool().connection() as conn:
+        t.acquired()
+        result = _execute(cursor(conn, name), query, text, params, t)
+        conn.commit()
+    if query.kind != 'fetch':
+        cache.invalidate_sql(text)
+        _touched(query, [params])
+    return result
+
+
+def delete_many(name, keys):
+    """Delete the rows of `keys` with delete statement `name`.
+
+    `data.delete_many` on the statement's SQL, also dropping the cached
+    `search` profiles of the deleted rows; ``helpers.delete_selected``
+    takes it as its delete function.
+
+    Returns:
+        as `data.delete_many`.
+    """
+    deleted, failures = data.delete_many(sql(name), keys)
+    _touched(CATALOG[name], [(k,) for k in deleted])
+    return deleted, failures
+
+
+def stats():
+    """Return the `instrument` statistics of catalog statements, slowest first."""
+    return [s for s in instrument.statements() if s['template'] in CATALOG]
+
+
+def _touched(query, param_rows):
+    for kind, index in query.touches:
+        ids = [params[index] for params in param_rows]
+        if kind == 'customer':
+            for customer_id in set(ids):
+                search.invalidate(customer_id)
+        else:
+            search.invalidate_accounts(ids)
+
+
+def _execute(cur, query, text, params, t):
+    cur.execute(text, params)
+    if query.kind == 'execute':
+        t.executed(cur.rowcount)
+        return cur.rowcount
+    t.executed()
+    # read every row so the cursor can run the statement again
+    rows = cur.fetchall()
+    t.rows = len(rows)
+    if query.kind == 'insert':
+        value = rows[0][0] if rows else None
+        return None if value is None else int(value)
+    return rows
@@ -0,0 +1,138 @@
+"""Management reports built from set-based aggregate queries.
+
+Each report is one ``GROUP BY`` query (or a read of the snapshot tables
+maintained by `snapshots.py`) that returns a few hundred rows at most,
+instead of exporting whole tables and summing them elsewhere. Results
+are cached in memory together with the time they were produced; `run`
+serves the cached result until it is older than `REPORT_TTL` seconds or
+a refresh is requested.
+
+Reports with a period (``days``) cover the last `days` days up to today.
+"""
+
+import datetime
+import threading
+import time
+
+from data import fetch
+from db import get_backend
+
+# Seconds a report result is served from memory.
+REPORT_TTL = 600.0
+
+DEFAULT_DAYS = 30
+DEFAULT_TOP = 50
+
+
+class Report:
+    """One report definition.
+
+    Args:
+        title (str): display name.
+        columns (tuple): column headings, matching the query's columns.
+        build (callable): ``build(days, top)`` returning ``(sql, params)``.
+    """
+
+    __slots__ = ('title', 'columns', 'build')
+
+    def __init__(self, title, columns, build):
+        self.title = title
+        self.columns = columns
+        self.build = build
+
+
+class Result:
+    """Rows of a report run and the time they were produced."""
+
+    __slots__ = ('name', 'columns', 'rows', 'generated_at', 'seconds', 'cached')
+
+    def __init__(self, name, columns, rows, generated_at, seconds, cached=False):
+        self.name = name
+        self.columns = columns
+        self.rows = rows
+        self.generated_at = generated_at
+        self.seconds = seconds
+        self.cached = cached
+
+
+def _since(days):
+    return datetime.date.today() - datetime.timedelta(days=days - 1)
+
+
+def _branch_totals(days, top):
+    return ('SELECT a.BranchId, b.BranchCode, COUNT(*), ROUND(SUM(a.Balance), 2), '
+            'ROUND(MIN(a.Balance), 2), ROUND(MAX(a.Balance), 2) '
+            'FROM Account a LEFT JOIN Branch b ON b.BranchId = a.BranchId '
+            'GROUP BY a.BranchId, b.BranchCode ORDER BY a.BranchId'), ()
+
+
+def _currency_totals(days, top):
+    return ("SELECT COALESCE(Currency, '-'), COUNT(*), ROUND(SUM(Balance), 2), ROUND(AVG(Balance), 2) "
+            "FROM Account GROUP BY COALESCE(Currency, '-') ORDER BY 3 DESC"), ()
+
+
+def _employee_totals(days, top):
+    return ('SELECT t.EmpId, e.Email, e.BranchId, COUNT(*), ROUND(SUM(t.Amount), 2) '
+            'FROM TransactionHistory t LEFT JOIN Employee e ON e.EmpId = t.EmpId '
+            'WHERE t.TransactionDate >= ? '
+            'GROUP BY t.EmpId, e.Email, e.BranchId ORDER BY 4 DESC'), (_since(days),)
+
+
+def _daily_volume(days, top):
+    # read from the snapshot summary rather than scanning [Transaction]
+    return ('SELECT SummaryDate, SUM(TxnCount), ROUND(SUM(Credits), 2), ROUND(SUM(Debits), 2), ROUND(SUM(NetAmount), 2) '
+            'FROM BranchDailySummary WHERE SummaryDate >= ? '
+            'GROUP BY SummaryDate ORDER BY SummaryDate DESC'), (_since(days),)
+
+
+def _top_accounts(days, top):
+    return get_backend().limit(
+        'SELECT AccountId, IBAN, CustomerId, BranchId, Currency, Balance '
+        'FROM Account WHERE Balance IS NOT NULL ORDER BY Balance DESC, AccountId', top), ()
+
+
+REPORTS = {
+    'branch_totals': Report('Balances per branch',
+                            ('Branch', 'Code', 'Accounts', 'Total balance', 'Min', 'Max'), _branch_totals),
+    'currency_totals': Report('Balances per currency',
+                              ('Currency', 'Accounts', 'Total balance', 'Average'), _currency_totals),
+    'employee_totals': Report('Transactions per employee',
+                              ('Employee', 'Email', 'Branch', 'Transactions', 'Amount'), _employee_totals),
+    'daily_volume': Report('Transaction volume per day',
+                           ('Date', 'Transactions', 'Credits', 'Debits', 'Net'), _daily_volume),
+    'top_accounts': Report('Top accounts by balance',
+                           ('Account', 'IBAN', 'Customer', 'Branch', 'Currency', 'Balance'), _top_accounts),
+}
+
+_results = {}
+_lock = threading.Lock()
+
+
+def run(name, days=DEFAULT_DAYS, top=DEFAULT_TOP, refresh=False):
+    """Return the `Result` of report `name`, from the cache when fresh.
+
+    Args:
+        name (str): key of `REPORTS`.
+        days (int): length of the period for period-based reports.
+        top (int): number of rows for top-N reports.
+        refresh (bool): ignore a cached result and query the database.
+    """
+    report = REPORTS[name]
+    key = (name, days, top)
+    with _lock:
+        hit = _results.get(key)
+    if hit is not None and not refresh and time.time() - hit.generated_at < REPORT_TTL:
+        return Result(name, hit.columns, hit.rows, hit.generated_at, hit.seconds, cached=True)
+    query, params = report.build(days, top)
+    started = time.perf_counter()
+    rows = fetch(query, params)
+    result = Result(name, report.columns, rows, time.time(), time.perf_counter() - started)
+    with _lock:
+        _results[key] = result
+    return result
+
+
+def clear():
+    """Forget all cached report results."""
+    with _lock:
+        _results.clear()
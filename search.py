@@ -0,0 +1,216 @@
+"""Customer 360 lookup: one search box for SSN, IBAN or numeric IDs.
+
+`lookup(text)` resolves the text to a customer through unique index
+seeks (``Customer.SSN``, ``Account.IBAN``, ``CustomerId``,
+``AccountId``, tried in that order) and returns a `Profile` with the
+customer row, all their accounts and their most recent transactions.
+
+On SQL Server the whole lookup is a single batch returning three result
+sets (read with ``cursor.nextset()``), so it costs one round-trip. The
+latest transactions are read with a ``TOP`` per account (``CROSS
+APPLY``) from ``IX_Transaction_AccountId_TransactionDate``, so the cost
+does not grow with the size of ``[Transaction]``. SQLite runs in
+process and executes the same steps as separate statements on one
+connection.
+
+Profiles are cached for `TTL` seconds, so repeated lookups while a
+teller works with a customer do not touch the database. Writes through
+`posting`, `transfers` and the `queries` catalog drop the profiles of
+the customers and accounts they change (`invalidate`,
+`invalidate_accounts`). Use ``refresh=True`` (the Search tab's Refresh
+button) to bypass the cache.
+"""
+
+import collections
+import threading
+import time
+
+import instrument
+from db import get_backend, get_pool
+
+# Seconds a profile is served from memory.
+TTL = 15.0
+
+# Maximum number of cached profiles.
+MAX_ENTRIES = 256
+
+# Transactions returned per profile by default.
+RECENT_TRANSACTIONS = 20
+
+# What the search text may be, in the order tried by `lookup`.
+KINDS = ('ssn', 'iban', 'customer', 'account')
+
+CUSTOMER_COLUMNS = ('CustomerId', 'SSN', 'Gender', 'RegDate', 'IsActive', 'Job', 'IncomeLevel')
+ACCOUNT_COLUMNS = ('AccountId', 'IBAN', 'BranchId', 'Status', 'Currency', 'Balance', 'LastTransactionDate')
+TRANSACTION_COLUMNS = ('TransactionId', 'AccountId', 'EmpId', 'Amount', 'Status', 'TransactionDate', 'TransactionTime')
+
+# each branch is a unique index seek; a NULL parameter disables it
+_RESOLVE = ("SELECT 1 AS MatchRank, 'ssn' AS MatchedBy, CustomerId FROM Customer WHERE SSN = ? "
+            "UNION ALL SELECT 2, 'iban', CustomerId FROM Account WHERE IBAN = ? "
+            "UNION ALL SELECT 3, 'customer', CustomerId FROM Customer WHERE CustomerId = ? "
+            "UNION ALL SELECT 4, 'account', CustomerId FROM Account WHERE AccountId = ?")
+
+_RECENT_ORDER = 'TransactionDate DESC, TransactionId DESC'
+
+
+class Profile:
+    """A customer with their accounts and recent transactions.
+
+    `customer` is a row in `CUSTOMER_COLUMNS` order, `accounts` and
+    `transactions` are lists of rows in `ACCOUNT_COLUMNS` and
+    `TRANSACTION_COLUMNS` order (newest transaction first). `matched_by`
+    is the `KINDS` entry the search text matched.
+    """
+
+    __slots__ = ('matched_by', 'customer', 'accounts', 'transactions', 'fetched_at', 'seconds', 'cached')
+
+    def __init__(self, matched_by, customer, accounts, transactions, fetched_at, seconds, cached=False):
+        self.matched_by = matched_by
+        self.customer = customer
+        self.accounts = accounts
+        self.transactions = transactions
+        self.fetched_at = fetched_at
+        self.seconds = seconds
+        self.cached = cached
+
+    @property
+    def customer_id(self):
+        return self.customer[0]
+
+
+_entries = collections.OrderedDict()   # (text, kind, limit) -> Profile
+_lock = threading.Lock()
+
+
+def lookup(text, kind=None, limit=RECENT_TRANSACTIONS, refresh=False):
+    """Find the customer identified by `text`.
+
+    Args:
+        text (str): SSN, IBAN, customer ID or account ID.
+        kind (str): one of `KINDS` to search only that way; None tries
+            them all in order and returns the first match.
+        limit (int): number of recent transactions to include.
+        refresh (bool): ignore a cached profile.
+
+    Returns:
+        Profile: or None if nothing matches.
+
+    Raises:
+        ValueError: empty text or unknown `kind`.
+    """
+    text = '' if text is None else str(text).strip()
+    if not text:
+        raise ValueError('Enter an SSN, IBAN, customer ID or account ID.')
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f'unknown search kind {kind!r}')
+    limit = int(limit)
+    key = (text, kind, limit)
+    now = time.monotonic()
+    if not refresh:
+        with _lock:
+            entry = _entries.get(key)
+            if entry is not None and entry[0] > now:
+                _entries.move_to_end(key)
+                p = entry[1]
+                return Profile(p.matched_by, p.customer, p.accounts, p.transactions,
+                               p.fetched_at, p.seconds, cached=True)
+    started = time.perf_counter()
+    backend = get_backend()
+    params = _resolve_params(text, kind)
+    with instrument.statement('search.lookup') as t, get_pool().connection() as conn:
+        t.acquired()
+        cur = conn.cursor()
+        if backend.name == 'mssql':
+            found = _lookup_batch(cur, params, limit)
+        else:
+            found = _lookup_steps(cur, backend, params, limit)
+        t.executed(0 if found is None else 1 + len(found[2]) + len(found[3]))
+    if found is None:
+        return None
+    profile = Profile(*found, fetched_at=time.time(), seconds=time.perf_counter() - started)
+    with _lock:
+        _entries[key] = (now + TTL, profile)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return profile
+
+
+def invalidate(customer_id=None):
+    """Drop cached profiles of `customer_id`, or all of them."""
+    with _lock:
+        if customer_id is None:
+            _entries.clear()
+            return
+        for key in [k for k, (_, p) in _entries.items() if p.customer_id == customer_id]:
+            del _entries[key]
+
+
+def invalidate_accounts(account_ids):
+    """Drop cached profiles listing any of `account_ids`."""
+    ids = set(account_ids)
+    if not ids:
+        return
+    with _lock:
+        for key in [k for k, (_, p) in _entries.items() if any(a[0] in ids for a in p.accounts)]:
+            del _entries[key]
+
+
+def _resolve_params(text, kind):
+    try:
+        number = int(text)
+    except ValueError:
+        number = None
+    values = {'ssn': text, 'iban': text, 'customer': number, 'account': number}
+    return tuple(values[k] if kind is None or kind == k else None for k in KINDS)
+
+
+def _lookup_batch(cur, params, limit):
+    # one round-trip: resolve the customer, then three result sets
+    n = int(limit)
+    cur.execute(
+        'SET NOCOUNT ON; '
+        'DECLARE @matched NVARCHAR(10), @cid INT; '
+        f'SELECT TOP (1) @matched = MatchedBy, @cid = CustomerId FROM ({_RESOLVE}) m ORDER BY MatchRank; '
+        f'SELECT @matched, {", ".join(CUSTOMER_COLUMNS)} FROM Customer WHERE CustomerId = @cid; '
+        f'SELECT {", ".join(ACCOUNT_COLUMNS)} FROM Account WHERE CustomerId = @cid ORDER BY AccountId; '
+        f'SELECT TOP ({n}) {", ".join("t." + c for c in TRANSACTION_COLUMNS)} FROM Account a '
+        f'CROSS APPLY (SELECT TOP ({n}) {", ".join(TRANSACTION_COLUMNS)} FROM [Transaction] '
+        f' WHERE AccountId = a.AccountId ORDER BY {_RECENT_ORDER}) t '
+        f'WHERE a.CustomerId = @cid ORDER BY t.TransactionDate DESC, t.TransactionId DESC',
+        params)
+    # read every result set so the pooled connection is left idle
+    customers = cur.fetchall()
+    cur.nextset()
+    accounts = [tuple(r) for r in cur.fetchall()]
+    cur.nextset()
+    transactions = [tuple(r) for r in cur.fetchall()]
+    if not customers:
+        return None
+    row = customers[0]
+    return row[0], tuple(row[1:]), accounts, transactions
+
+
+def _lookup_steps(cur, backend, params, limit):
+    cur.execute(backend.limit(f'SELECT MatchedBy, CustomerId FROM ({_RESOLVE}) m ORDER BY MatchRank', 1), params)
+    match = cur.fetchone()
+    if match is None:
+        return None
+    matched_by, cid = match
+    cur.execute(f'SELECT {", ".join(CUSTOMER_COLUMNS)} FROM Customer WHERE CustomerId = ?', (cid,))
+    customer = cur.fetchone()
+    if customer is None:
+        return None
+    cur.execute(f'SELECT {", ".join(ACCOUNT_COLUMNS)} FROM Account WHERE CustomerId = ? ORDER BY AccountId',
+                (cid,))
+    accounts = [tuple(r) for r in cur.fetchall()]
+    # newest `limit` per account from the (AccountId, TransactionDate)
+    # index, then the newest `limit` overall
+    recent = []
+    query = backend.limit(f'SELECT {", ".join(TRANSACTION_COLUMNS)} FROM [Transaction] '
+                          f'WHERE AccountId = ? ORDER BY {_RECENT_ORDER}', limit)
+    for account in accounts:
+        cur.execute(query, (account[0],))
+        recent.extend(tuple(r) for r in cur.fetchall())
+    recent.sort(key=lambda r: (r[5] is not None, r[5] or 0, r[0]), reverse=True)
+    return matched_by, tuple(customer), accounts, recent[:limit]
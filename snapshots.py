@@ -0,0 +1,228 @@
+"""Daily balance snapshots with incremental maintenance.
+
+Two pre-aggregated tables (created by migration 0002) answer balance and
+volume questions without scanning ``[Transaction]``:
+
+- ``DailyAccountBalance`` — one row per account and day with activity:
+  transaction count, net amount and the end-of-day balance. The balance
+  on any day is the ``ClosingBalance`` of the latest row on or before
+  it, so a year of history is at most 365 rows per account.
+- ``BranchDailySummary`` — per branch and day: transaction count,
+  active accounts, credits, debits and net amount.
+
+`refresh()` folds in the transactions added since the watermark kept in
+``SnapshotWatermark`` (the highest ``TransactionId`` already included).
+For each account with new transactions it recomputes its rows from the
+earliest day touched onwards, because later closing balances depend on
+it; branch rows are recomputed for the touched days only. Everything
+runs in one database transaction together with the watermark update.
+
+Closing balances are derived from the stored ``Account.Balance`` minus
+the later transactions, both taken as of the watermark (transactions
+posted while the refresh runs are left for the next one), so they stay
+consistent with postings (`posting.py`). Transactions amended or
+cancelled through `posting` are below the watermark, so `posting`
+records their account and day in ``SnapshotPending`` (migration 0005)
+and the next refresh recomputes those accounts from that day on.
+Balances or transactions changed by hand bypass it; run `rebuild()` (or
+``python snapshots.py --rebuild``) after such corrections.
+
+`refresh()` reads only the hot ``[Transaction]`` table, which holds
+every transaction above the watermark (`archive.py` never moves those).
+New transactions dated in an already archived month also need a
+rebuild, which reads ``TransactionArchive`` as well.
+
+Usage::
+
+    python snapshots.py            # incremental refresh
+    python snapshots.py --rebuild  # recompute everything
+"""
+
+import argparse
+import time
+
+from data import fetch
+from db import get_pool, sql
+
+WATERMARK = 'daily'
+
+
+def refresh():
+    """Fold transactions added since the last run into the snapshot tables.
+
+    Returns:
+        dict: ``transactions`` (new transactions folded in), ``accounts``
+        (accounts recomputed), ``watermark`` (new highest TransactionId)
+        and ``seconds``.
+    """
+    return _refresh(('[Transaction]',))
+
+
+def _refresh(tables):
+    # `tables` hold the transactions to read: the hot table alone, or
+    # with the archive when rebuilding
+    txns = tables[0] if len(tables) == 1 else 'TransactionHistory'
+    started = time.perf_counter()
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            # lock the watermark row (seeded by migration 0005) so two
+            # refreshes cannot interleave
+            cur.execute(sql('SELECT LastTransactionId FROM SnapshotWatermark {rowlock} WHERE Name = ?'),
+                        (WATERMARK,))
+            row = cur.fetchone()
+            if row is None:
+                raise RuntimeError(f'snapshot watermark {WATERMARK!r} is missing; run migrate.py')
+            low = row[0]
+            cur.execute(f'SELECT MAX(TransactionId), COUNT(*) FROM {txns} WHERE TransactionId > ?', (low,))
+            high, new = cur.fetchone()
+            high = low if high is None else high
+            # days left stale by amended or cancelled transactions, up to
+            # the last one recorded now (later ones wait for the next run)
+            cur.execute('SELECT MAX(PendingId) FROM SnapshotPending')
+            pending = cur.fetchone()[0] or 0
+            accounts = 0
+            if high > low or pending:
+                accounts = _fold(cur, low, high, pending, tables)
+                cur.execute('DELETE FROM SnapshotPending WHERE PendingId <= ?', (pending,))
+                cur.execute(sql('UPDATE SnapshotWatermark SET LastTransactionId = ?, UpdatedAt = {now} '
+                                'WHERE Name = ?'), (high, WATERMARK))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return {'transactions': new, 'accounts': accounts, 'watermark': high,
+            'seconds': time.perf_counter() - started}
+
+
+def rebuild():
+    """Empty the snapshot tables and recompute them from all transactions.
+
+    Archived transactions (``TransactionArchive``, see `archive.py`) are
+    included.
+    """
+    with get_pool().connection() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute('DELETE FROM DailyAccountBalance')
+            cur.execute('DELETE FROM BranchDailySummary')
+            cur.execute('UPDATE SnapshotWatermark SET LastTransactionId = 0 WHERE Name = ?', (WATERMARK,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return _refresh(('[Transaction]', 'TransactionArchive'))
+
+
+def _fold(cur, low, high, pending, tables):
+    txns = tables[0] if len(tables) == 1 else 'TransactionHistory'
+    # (account, day) pairs to recompute: the days of the new
+    # transactions and the pending days of changed ones
+    changed = (f'SELECT AccountId, TransactionDate FROM {txns}'
+               ' WHERE TransactionId > ? AND TransactionId <= ? AND TransactionDate IS NOT NULL'
+               ' UNION ALL SELECT AccountId, FromDate FROM SnapshotPending WHERE PendingId <= ?')
+    window = (low, high, pending)
+    # accounts to recompute and the first day of each
+    cur.execute('DELETE FROM SnapshotTouched')
+    cur.execute('INSERT INTO SnapshotTouched (AccountId, FromDate) '
+                f'SELECT c.AccountId, MIN(c.TransactionDate) FROM ({changed}) c '
+                'GROUP BY c.AccountId', window)
+    accounts = cur.rowcount
+
+    cur.execute('DELETE FROM DailyAccountBalance '
+                'WHERE AccountId IN (SELECT AccountId FROM SnapshotTouched) AND BalanceDate >= '
+                ' (SELECT w.FromDate FROM SnapshotTouched w WHERE w.AccountId = DailyAccountBalance.AccountId)')
+    cur.execute('INSERT INTO DailyAccountBalance (AccountId, BalanceDate, TxnCount, NetAmount) '
+                'SELECT t.AccountId, t.TransactionDate, COUNT(*), ROUND(COALESCE(SUM(t.Amount), 0), 2) '
+                f'FROM SnapshotTouched w JOIN {txns} t '
+                ' ON t.AccountId = w.AccountId AND t.TransactionDate >= w.FromDate '
+                'WHERE t.TransactionId <= ? '
+                'GROUP BY t.AccountId, t.TransactionDate', (high,))
+    # end-of-day balance = balance as of the watermark (the current
+    # balance minus transactions posted after `high`) minus everything up
+    # to the watermark dated later; one correlated sum per table, as they
+    # can seek their own indexes. Rows above `high` are all in the hot
+    # table (archive.py only moves folded rows).
+    newer = (f' - (SELECT COALESCE(SUM(t.Amount), 0) FROM {tables[0]} t'
+             '    WHERE t.AccountId = DailyAccountBalance.AccountId AND t.TransactionId > ?)')
+    later = ''.join(f' - (SELECT COALESCE(SUM(t.Amount), 0) FROM {table} t'
+                    '    WHERE t.AccountId = DailyAccountBalance.AccountId AND t.TransactionId <= ?'
+                    '    AND t.TransactionDate > DailyAccountBalance.BalanceDate)' for table in tables)
+    cur.execute('UPDATE DailyAccountBalance SET ClosingBalance = ROUND('
+                ' (SELECT COALESCE(a.Balance, 0) FROM Account a WHERE a.AccountId = DailyAccountBalance.AccountId)'
+                f'{newer}{later}, 2) '
+                'WHERE AccountId IN (SELECT AccountId FROM SnapshotTouched) AND ClosingBalance IS NULL',
+                (high,) * (1 + len(tables)))
+
+    # branch totals for the (branch, day) pairs of the changed days
+    touched = (f'SELECT DISTINCT na.BranchId, n.TransactionDate FROM ({changed}) n'
+               ' JOIN Account na ON na.AccountId = n.AccountId')
+    cur.execute(f'DELETE FROM BranchDailySummary WHERE EXISTS (SELECT 1 FROM ({touched}) d'
+                ' WHERE d.BranchId = BranchDailySummary.BranchId AND d.TransactionDate = BranchDailySummary.SummaryDate)',
+                window)
+    cur.execute('INSERT INTO BranchDailySummary '
+                '(BranchId, SummaryDate, TxnCount, AccountCount, Credits, Debits, NetAmount) '
+                'SELECT a.BranchId, t.TransactionDate, COUNT(*), COUNT(DISTINCT t.AccountId), '
+                ' ROUND(COALESCE(SUM(CASE WHEN t.Amount > 0 THEN t.Amount END), 0), 2), '
+                ' ROUND(COALESCE(SUM(CASE WHEN t.Amount < 0 THEN t.Amount END), 0), 2), '
+                ' ROUND(COALESCE(SUM(t.Amount), 0), 2) '
+                f'FROM ({touched}) d '
+                f'JOIN {txns} t ON t.TransactionDate = d.TransactionDate '
+                'JOIN Account a ON a.AccountId = t.AccountId AND a.BranchId = d.BranchId '
+                'WHERE t.TransactionId <= ? '
+                'GROUP BY a.BranchId, t.TransactionDate', window + (high,))
+    return accounts
+
+
+def account_history(account_id, start=None, end=None):
+    """Return ``(BalanceDate, TxnCount, NetAmount, ClosingBalance)`` rows of an account."""
+    where, params = _range('BalanceDate', start, end)
+    return fetch('SELECT BalanceDate, TxnCount, NetAmount, ClosingBalance FROM DailyAccountBalance '
+                 f'WHERE AccountId = ?{where} ORDER BY BalanceDate', (account_id,) + params)
+
+
+def balance_on(account_id, day):
+    """Return the account's end-of-day balance on `day` from the snapshot, or None."""
+    rows = fetch('SELECT ClosingBalance FROM DailyAccountBalance '
+                 'WHERE AccountId = ? AND BalanceDate = '
+                 '(SELECT MAX(BalanceDate) FROM DailyAccountBalance WHERE AccountId = ? AND BalanceDate <= ?)',
+                 (account_id, account_id, day))
+    return rows[0][0] if rows else None
+
+
+def branch_summary(start=None, end=None, branch_id=None):
+    """Return BranchDailySummary rows, newest day first.
+
+    Columns: ``SummaryDate, BranchId, TxnCount, AccountCount, Credits,
+    Debits, NetAmount``.
+    """
+    where, params = _range('SummaryDate', start, end)
+    if branch_id is not None:
+        where += ' AND BranchId = ?'
+        params += (branch_id,)
+    return fetch('SELECT SummaryDate, BranchId, TxnCount, AccountCount, Credits, Debits, NetAmount '
+                 f'FROM BranchDailySummary WHERE 1 = 1{where} ORDER BY SummaryDate DESC, BranchId', params)
+
+
+def _range(column, start, end):
+    where, params = '', ()
+    if start is not None:
+        where += f' AND {column} >= ?'
+        params += (start,)
+    if end is not None:
+        where += f' AND {column} <= ?'
+        params += (end,)
+    return where, params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Maintain the daily balance snapshot tables.')
+    parser.add_argument('--rebuild', action='store_true', help='recompute all snapshots from scratch')
+    args = parser.parse_args(argv)
+    stats = rebuild() if args.rebuild else refresh()
+    print(f"folded {stats['transactions']:,} transactions for {stats['accounts']:,} accounts "
+          f"in {stats['seconds']:.1f}s (watermark {stats['watermark']})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Shared fixtures: a fresh SQLite database per test."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db  # noqa: E402
+import queries  # noqa: E402
+from backends import SQLiteBackend  # noqa: E402
+
+
+@pytest.fixture
+def bank(tmp_path):
+    """Switch the application to an empty SQLite file and return its backend."""
+    backend = SQLiteBackend(str(tmp_path / 'bank.db'))
+    db.set_backend(backend)
+    yield backend
+    db.set_backend(None)
+
+
+@pytest.fixture
+def teller(bank):
+    """Create a branch, an employee and a customer; return ``(branch_id, emp_id, customer_id)``."""
+    branch = queries.run('branch.insert', ('B1', 'b1@bank.test', '555-0100'))
+    queries.run('department.insert', ('OPS', 'Operations'))
+    emp = queries.run('employee.insert', ('OPS', branch, 'teller@bank.test'))
+    customer = queries.run('customer.insert', ('123-45-6789', 'Clerk'))
+    return branch, emp, customer
@@ -0,0 +1,30 @@
+"""Bulk import reports bad rows instead of aborting."""
+
+import io
+import json
+
+from data import fetch
+from importer import import_file
+
+
+def test_jsonl_lines_that_are_not_objects_are_rejected(bank, tmp_path):
+    path = tmp_path / 'customers.jsonl'
+    path.write_text('\n'.join([
+        json.dumps({'SSN': '111-11-1111', 'Job': 'Clerk'}),
+        '123',
+        '[]',
+        '"text"',
+        'null',
+        '{not json',
+        json.dumps({'SSN': '222-22-2222', 'Job': 'Pilot'}),
+    ]) + '\n', encoding='utf-8')
+    rejects = io.StringIO()
+
+    stats = import_file('customer', str(path), rejects=rejects)
+
+    assert (stats['read'], stats['inserted'], stats['rejected']) == (7, 2, 5)
+    rejected = [json.loads(line) for line in rejects.getvalue().splitlines()]
+    assert [r['line'] for r in rejected] == [2, 3, 4, 5, 6]
+    assert rejected[0]['error'] == 'expected a JSON object, got int'
+    assert rejected[1]['row'] == []
+    assert fetch('SELECT COUNT(*) FROM Customer')[0][0] == 2
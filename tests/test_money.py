@@ -0,0 +1,40 @@
+"""Money is stored exactly to the cent on SQLite."""
+
+from decimal import Decimal
+
+import pytest
+
+import queries
+from data import fetch
+from posting import PostingError, money, post, post_batch
+
+
+def test_balances_stay_exact_after_postings(teller):
+    branch, emp, customer = teller
+    account = queries.run('account.insert', ('DE00TEST0001', customer, branch, Decimal('0.10')))
+    expected = Decimal('0.10')
+    for amount in ('0.20', '0.10', '1234.57', '-0.30', '37324.83', '-1234.56'):
+        balance = post(account, emp, amount)
+        expected += Decimal(amount)
+        assert balance == expected
+        # no stored balance carries float noise beyond its cents
+        assert fetch('SELECT COUNT(*) FROM Account WHERE Balance <> ROUND(Balance, 2)')[0][0] == 0
+
+    assert fetch('SELECT COUNT(*) FROM [Transaction] WHERE Amount <> ROUND(Amount, 2)')[0][0] == 0
+    stored = fetch('SELECT Balance FROM Account WHERE AccountId = ?', (account,))[0][0]
+    assert stored == expected
+    assert stored.as_tuple().exponent == -2
+
+
+@pytest.mark.parametrize('amount', ['abc', '', 'NaN', 'Infinity', None])
+def test_invalid_amounts_are_rejected_as_posting_errors(teller, amount):
+    branch, emp, customer = teller
+    account = queries.run('account.insert', ('DE00TEST0002', customer, branch, Decimal('5.00')))
+    with pytest.raises(PostingError, match='invalid amount'):
+        money(amount)
+    with pytest.raises(PostingError, match='invalid amount'):
+        post(account, emp, amount)
+    balances, rejected = post_batch([(account, emp, '1.00'), (account, emp, amount)])
+    assert balances == [Decimal('6.00'), None]
+    assert 'invalid amount' in rejected[1]
+    assert fetch('SELECT COUNT(*) FROM [Transaction] WHERE AccountId = ?', (account,))[0][0] == 1
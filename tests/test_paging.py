@@ -0,0 +1,52 @@
+"""Keyset paging over a Decimal sort key on SQLite."""
+
+import random
+from decimal import Decimal
+
+import pytest
+
+import queries
+from paging import PageQuery
+from posting import post_batch
+
+PAGE = 7
+
+
+@pytest.fixture
+def accounts(teller):
+    branch, emp, customer = teller
+    rng = random.Random(7)
+    ids = [queries.run('account.insert', (f'DE00PAGE{i:04d}', customer, branch, Decimal('0.10')))
+           for i in range(60)]
+    # several fractional postings per account, so balances come from
+    # arithmetic on stored values; a few share a balance
+    postings = [(a, emp, f'{rng.randint(1, 5000000) / 100:.2f}') for a in ids[:50] for _ in range(4)]
+    postings += [(a, emp, '0.20') for a in ids[50:]]
+    post_batch(postings)
+    return ids
+
+
+def _walk(query, total):
+    pages = [query.page(limit=PAGE)]
+    # bounded: a seek that repeats rows must fail, not loop
+    while len(pages[-1]) == PAGE and len(pages) <= total // PAGE + 1:
+        pages.append(query.page(after=query.cursor_of(pages[-1][-1]), limit=PAGE))
+    return [list(p) for p in pages if len(p)]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_cover_a_decimal_sort_once_in_both_directions(accounts, descending):
+    query = PageQuery('Account', ('AccountId', 'IBAN', 'Balance'), 'AccountId')
+    query.set_sort('Balance', descending)
+    pages = _walk(query, len(accounts))
+    rows = [r for p in pages for r in p]
+
+    assert len(rows) == len(accounts)
+    assert len({r[0] for r in rows}) == len(accounts)
+    expected = sorted(rows, key=lambda r: (r[2], r[0]))
+    # descending orders by (Balance DESC, AccountId DESC)
+    assert rows == (expected[::-1] if descending else expected)
+
+    # walking backwards from each page's first row returns the page before it
+    for previous, page in zip(pages, pages[1:]):
+        assert list(query.page(before=query.cursor_of(page[0]), limit=PAGE)) == previous
@@ -0,0 +1,29 @@
+"""Report aggregates come back in cents."""
+
+from decimal import Decimal
+
+import pytest
+
+import queries
+import reports
+import snapshots
+from data import execute
+from posting import post_batch
+
+
+@pytest.mark.parametrize('name', sorted(reports.REPORTS))
+def test_report_amounts_have_at_most_two_decimals(teller, name):
+    branch, emp, customer = teller
+    accounts = [queries.run('account.insert', (f'DE00REPT{i:04d}', customer, branch, Decimal('0.10')))
+                for i in range(3)]
+    post_batch([(a, emp, amount) for a in accounts for amount in ('0.20', '1234.57', '-0.30')])
+    # a balance written as a float, as stored before money was rounded
+    execute('UPDATE Account SET Balance = 0.1 + 0.2 WHERE AccountId = ?', (accounts[0],))
+    snapshots.refresh()
+
+    rows = reports.run(name, refresh=True).rows
+    assert rows
+    for row in rows:
+        for value in row:
+            if isinstance(value, (float, Decimal)):
+                assert round(value, 2) == value, (row, value)
@@ -0,0 +1,63 @@
+"""Snapshot refresh after corrections of already folded transactions."""
+
+from decimal import Decimal
+
+import pytest
+
+import queries
+import snapshots
+from data import execute, fetch
+from posting import amend, cancel, cancel_many, post_batch
+
+
+def _tables():
+    return (fetch('SELECT AccountId, BalanceDate, TxnCount, NetAmount, ClosingBalance '
+                  'FROM DailyAccountBalance ORDER BY AccountId, BalanceDate'),
+            fetch('SELECT BranchId, SummaryDate, TxnCount, AccountCount, Credits, Debits, NetAmount '
+                  'FROM BranchDailySummary ORDER BY BranchId, SummaryDate'))
+
+
+@pytest.fixture
+def history(teller):
+    branch, emp, customer = teller
+    other = queries.run('branch.insert', ('B2', 'b2@bank.test', '555-0200'))
+    accounts = [queries.run('account.insert', (f'DE00SNAP{i:04d}', customer, b, Decimal('100.00')))
+                for i, b in enumerate((branch, branch, other))]
+    post_batch([(a, emp, amount) for a in accounts for amount in ('10.50', '-2.25', '7.00', '1.10')])
+    # spread the postings over four days, oldest first
+    for offset in range(4):
+        execute("UPDATE [Transaction] SET TransactionDate = DATE('now', ?) WHERE TransactionId % 4 = ?",
+                (f'-{4 - offset} days', offset))
+    snapshots.refresh()
+    ids = [row[0] for row in fetch('SELECT TransactionId FROM [Transaction] ORDER BY TransactionId')]
+    return emp, accounts, ids
+
+
+def test_refresh_picks_up_amended_and_cancelled_transactions(history):
+    emp, accounts, ids = history
+    amend(ids[1], accounts[0], emp, '-3.75')
+    # moved to an account of the other branch
+    amend(ids[4], accounts[2], emp, '12.00')
+    cancel(ids[2])
+    cancel_many([ids[9], ids[10]])
+    assert fetch('SELECT COUNT(*) FROM SnapshotPending')[0][0] > 0
+
+    stats = snapshots.refresh()
+    assert stats['transactions'] == 0
+    assert stats['accounts'] == 3
+    assert fetch('SELECT COUNT(*) FROM SnapshotPending')[0][0] == 0
+    refreshed = _tables()
+
+    snapshots.rebuild()
+    assert refreshed == _tables()
+    for account in accounts:
+        balance = fetch('SELECT Balance FROM Account WHERE AccountId = ?', (account,))[0][0]
+        assert snapshots.balance_on(account, '9999-12-31') == balance
+
+
+def test_watermark_is_seeded_and_nothing_pending_is_a_no_op(history):
+    assert fetch("SELECT COUNT(*) FROM SnapshotWatermark WHERE Name = 'daily'")[0][0] == 1
+    before = _tables()
+    stats = snapshots.refresh()
+    assert (stats['transactions'], stats['accounts']) == (0, 0)
+    assert _tables() == before
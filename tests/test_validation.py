@@ -0,0 +1,31 @@
+"""Form input is checked before it reaches the database."""
+
+from decimal import Decimal
+
+import pytest
+
+from validation import clean_account, clean_transaction
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('10.005', Decimal('10.01')),
+    ('-10.005', Decimal('-10.01')),
+    ('0.125', Decimal('0.13')),
+    ('9999999999999999.99', Decimal('9999999999999999.99')),
+])
+def test_amounts_round_half_up_to_cents(text, expected):
+    assert clean_transaction('1', '1', text)[2] == expected
+
+
+@pytest.mark.parametrize('text', ['1e17', '1e16', '-1e16', '9999999999999999.995', '1e30'])
+def test_amounts_beyond_decimal_18_2_are_rejected(text):
+    with pytest.raises(ValueError, match='too large'):
+        clean_transaction('1', '1', text)
+    with pytest.raises(ValueError, match='too large'):
+        clean_account('DE00TEST0001', '1', '1', text)
+
+
+@pytest.mark.parametrize('text', ['abc', 'NaN', 'Infinity'])
+def test_non_numeric_amounts_are_rejected(text):
+    with pytest.raises(ValueError, match='must be a number'):
+        clean_transaction('1', '1', text)
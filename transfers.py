@@ -0,0 +1,241 @@
+"""Transfers between accounts.
+
+A transfer debits one account and credits another in a single database
+transaction, as two postings (see `posting.py`): both ``[Transaction]``
+rows and both balance updates are committed together or not at all.
+
+Deadlocks between concurrent transfers are avoided by locking the
+accounts involved in ascending ``AccountId`` order before either balance
+changes, so two transfers between the same accounts in opposite
+directions queue behind each other instead of each holding the lock the
+other needs. If the database still picks a transaction as a deadlock
+victim (SQL Server error 1205) or reports it locked (SQLite), the whole
+transaction is rolled back and retried up to `RETRIES` times with
+backoff.
+
+`transfer_batch` applies many transfers, e.g. a salary run, in chunks of
+`CHUNK_SIZE`, one database transaction per chunk; chunks committed
+before a failure stay committed. Batch files are CSV (with a header row)
+or JSONL with the columns ``FromAccountId``, ``ToAccountId``, ``EmpId``
+and ``Amount``.
+
+Usage::
+
+    python transfers.py salaries.csv --chunk-size 500 --rejects bad.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+import instrument
+import search
+from db import get_backend, get_pool
+from importer import read_rows
+from posting import PostingError, _apply
+from validation import clean_transfer
+
+# Transfers applied per commit in `transfer_batch`.
+CHUNK_SIZE = 500
+
+# Attempts after the first when a transaction loses a lock conflict.
+RETRIES = 5
+
+# Base delay in seconds before a retry; doubled on each attempt.
+RETRY_DELAY = 0.05
+
+# Account ids per locking `SELECT`.
+LOCK_CHUNK_SIZE = 500
+
+
+def transfer(from_account, to_account, emp_id, amount, allow_overdraft=False):
+    """Move `amount` from one account to another.
+
+    Args:
+        from_account (int): account to debit.
+        to_account (int): account to credit.
+        emp_id (int): employee recording both postings.
+        amount: positive amount; converted to a 2-decimal `Decimal`.
+        allow_overdraft (bool): permit `from_account` to go below zero.
+
+    Returns:
+        tuple: ``(from_balance, to_balance)`` after the transfer.
+
+    Raises:
+        ValueError: invalid arguments.
+        PostingError: the transfer was rejected; nothing was written.
+    """
+    src, dst, emp, amount = clean_transfer(from_account, to_account, emp_id, amount)
+    backend = get_backend()
+
+    def work(conn):
+        found = _lock(conn, backend, (src, dst))
+        return _legs(conn, found, src, dst, emp, amount, allow_overdraft)
+
+    with instrument.statement('transfers.transfer') as t, get_pool().connection() as conn:
+        t.acquired()
+        balances = _run(conn, backend, work, RETRIES)
+        t.executed(2)
+    search.invalidate_accounts((src, dst))
+    return balances
+
+
+def transfer_batch(transfers, chunk_size=CHUNK_SIZE, allow_overdraft=False, retries=RETRIES):
+    """Apply many transfers, committing every `chunk_size` transfers.
+
+    Invalid or rejected transfers (unknown account, insufficient funds,
+    unknown employee) are skipped without affecting the rest of the
+    chunk. A chunk that loses a lock conflict is rolled back and
+    retried; any other database error aborts the call.
+
+    Args:
+        transfers (iterable): ``(from_account, to_account, emp_id, amount)``
+            tuples.
+        chunk_size (int): transfers per database transaction.
+        allow_overdraft (bool): permit debited accounts to go below zero.
+        retries (int): attempts per chunk after the first.
+
+    Returns:
+        tuple: ``(balances, rejected)`` — `balances` lists the
+        ``(from_balance, to_balance)`` pair after each transfer (None
+        where rejected) in input order, and `rejected` maps the input
+        index of each rejected transfer to the reason.
+    """
+    backend = get_backend()
+    balances = []
+    rejected = {}
+    with instrument.statement('transfers.transfer_batch') as t, get_pool().connection() as conn:
+        t.acquired()
+        chunk = []
+        for item in transfers:
+            try:
+                chunk.append(clean_transfer(*item))
+            except (TypeError, ValueError, ArithmeticError) as e:
+                chunk.append(str(e))
+            if len(chunk) >= chunk_size:
+                _flush(conn, backend, chunk, balances, rejected, allow_overdraft, retries)
+                chunk = []
+        if chunk:
+            _flush(conn, backend, chunk, balances, rejected, allow_overdraft, retries)
+        t.executed(2 * (len(balances) - len(rejected)))
+    return balances, rejected
+
+
+def _flush(conn, backend, chunk, balances, rejected, allow_overdraft, retries):
+    # `chunk` holds cleaned tuples, or the error text of invalid input
+    offset = len(balances)
+    valid = [item for item in chunk if not isinstance(item, str)]
+
+    def work(conn):
+        found = _lock(conn, backend, [a for src, dst, _, _ in valid for a in (src, dst)])
+        results, errors = [], {}
+        for index, item in enumerate(chunk, offset):
+            if isinstance(item, str):
+                results.append(None)
+                errors[index] = item
+                continue
+            try:
+                results.append(_legs(conn, found, *item, allow_overdraft))
+            except PostingError as e:
+                if _is_deadlock(backend, e):
+                    raise
+                results.append(None)
+                errors[index] = str(e)
+        return results, errors
+
+    results, errors = _run(conn, backend, work, retries)
+    balances.extend(results)
+    rejected.update(errors)
+    search.invalidate_accounts(a for item, result in zip(chunk, results) if result is not None
+                               for a in item[:2])
+
+
+def _lock(conn, backend, account_ids):
+    # take the row locks in ascending id order; returns the ids that exist
+    ids = sorted(set(account_ids))
+    found = set()
+    cur = conn.cursor()
+    for start in range(0, len(ids), LOCK_CHUNK_SIZE):
+        chunk = ids[start:start + LOCK_CHUNK_SIZE]
+        marks = ','.join('?' * len(chunk))
+        cur.execute(backend.render(
+            f'SELECT AccountId FROM Account {{rowlock}} WHERE AccountId IN ({marks}) ORDER BY AccountId'),
+            chunk)
+        found.update(row[0] for row in cur.fetchall())
+    return found
+
+
+def _legs(conn, found, src, dst, emp, amount, allow_overdraft):
+    for account_id in (src, dst):
+        if account_id not in found:
+            raise PostingError(f'account {account_id} does not exist')
+    # a rejected debit undoes itself, so nothing is left to clean up
+    debit = _apply(conn, src, emp, -amount, allow_overdraft)
+    try:
+        credit = _apply(conn, dst, emp, amount, allow_overdraft)
+    except PostingError as e:
+        # the debit is already applied; only a rollback can undo it
+        raise RuntimeError(f'transfer {src} -> {dst}: credit failed after debit ({e})') from e
+    return debit, credit
+
+
+def _run(conn, backend, work, retries):
+    # run `work(conn)` as one transaction, retrying lost lock conflicts
+    attempt = 0
+    while True:
+        try:
+            result = work(conn)
+            conn.commit()
+            return result
+        except Exception as e:
+            conn.rollback()
+            if attempt >= retries or not _is_deadlock(backend, e):
+                raise
+        time.sleep(RETRY_DELAY * 2 ** attempt * random.uniform(0.5, 1.5))
+        attempt += 1
+
+
+def _is_deadlock(backend, exc):
+    # postings wrap driver errors, so look through the cause chain
+    while exc is not None:
+        if backend.is_deadlock(exc):
+            return True
+        exc = exc.__cause__
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Apply a file of transfers between accounts.')
+    parser.add_argument('path', help='CSV file with a header row, or .jsonl file')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE,
+                        help='transfers per transaction (default %(default)s)')
+    parser.add_argument('--allow-overdraft', action='store_true')
+    parser.add_argument('--rejects', help='reject file (default: <path>.rejects.jsonl)')
+    args = parser.parse_args(argv)
+
+    lines = []
+
+    def rows():
+        for line, row in read_rows(args.path):
+            lines.append((line, row))
+            yield (row.get('FromAccountId'), row.get('ToAccountId'), row.get('EmpId'), row.get('Amount'))
+
+    started = time.perf_counter()
+    balances, rejected = transfer_batch(rows(), args.chunk_size, args.allow_overdraft)
+    seconds = time.perf_counter() - started
+    print(f'applied {len(balances) - len(rejected):,}  rejected {len(rejected):,}  {seconds:.1f}s',
+          file=sys.stderr)
+    if rejected:
+        rejects_path = args.rejects or args.path + '.rejects.jsonl'
+        with open(rejects_path, 'w', encoding='utf-8') as fh:
+            for index in sorted(rejected):
+                line, row = lines[index]
+                fh.write(json.dumps({'line': line, 'error': rejected[index], 'row': row}, default=str) + '\n')
+        print(f'rejected transfers written to {rejects_path}', file=sys.stderr)
+    return 1 if rejected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
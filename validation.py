@@ -0,0 +1,103 @@
+"""Input validation rules shared by the forms and the bulk importer.
+
+Each `clean_<entity>` function takes raw text values (as typed into a
+form or read from a file), applies the same rules the UI enforces and
+returns the converted values. Invalid input raises `ValueError` with a
+message suitable for showing to the user.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+_CENT = Decimal('0.01')
+# DECIMAL(18,2) holds 16 digits before the point
+_LIMIT = Decimal(10) ** 16
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _amount(text, message):
+    # a finite Decimal rounded half up to cents, as stored in DECIMAL(18,2)
+    try:
+        value = Decimal(text)
+        if not value.is_finite():
+            raise ValueError(message)
+    except InvalidOperation:
+        raise ValueError(message)
+    # checked before rounding, which would overflow for huge values;
+    # anything from _LIMIT - 0.005 up rounds to _LIMIT
+    if abs(value) >= _LIMIT - _CENT / 2:
+        raise ValueError("Amount is too large.")
+    return value.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
+def clean_customer(ssn, job):
+    """Validate customer fields.
+
+    Returns:
+        tuple: ``(ssn, job)``.
+    """
+    ssn, job = _text(ssn), _text(job)
+    if not ssn:
+        raise ValueError("SSN is required.")
+    return ssn, job
+
+
+def clean_account(iban, customer_id, branch_id, balance):
+    """Validate account fields; an empty balance means 0.
+
+    Returns:
+        tuple: ``(iban, customer_id, branch_id, balance)``; the balance
+        is a `Decimal` rounded to cents.
+    """
+    iban, cust, branch, bal = _text(iban), _text(customer_id), _text(branch_id), _text(balance)
+    if not iban or not cust or not branch:
+        raise ValueError("IBAN, Customer ID and Branch ID are required.")
+    try:
+        cust_id = int(cust)
+        branch_id = int(branch)
+    except ValueError:
+        raise ValueError("Customer ID and Branch ID must be integers.")
+    balance = _amount(bal or '0', "Balance must be a number.")
+    return iban, cust_id, branch_id, balance
+
+
+def clean_transaction(account_id, emp_id, amount):
+    """Validate transaction fields.
+
+    Returns:
+        tuple: ``(account_id, emp_id, amount)``; the amount is a
+        `Decimal` rounded to cents.
+    """
+    acc, emp, amt = _text(account_id), _text(emp_id), _text(amount)
+    if not acc or not emp or not amt:
+        raise ValueError("Account ID, Employee ID and Amount are required.")
+    try:
+        acc_id = int(acc)
+        emp_id = int(emp)
+    except ValueError:
+        raise ValueError("Account ID and Employee ID must be integers.")
+    amount = _amount(amt, "Amount must be a number.")
+    return acc_id, emp_id, amount
+
+
+def clean_transfer(from_account, to_account, emp_id, amount):
+    """Validate transfer fields; the amount must be at least one cent.
+
+    Returns:
+        tuple: ``(from_account, to_account, emp_id, amount)``.
+    """
+    src, dst, emp, amt = _text(from_account), _text(to_account), _text(emp_id), _text(amount)
+    if not src or not dst or not emp or not amt:
+        raise ValueError("From account, To account, Employee ID and Amount are required.")
+    try:
+        src, dst, emp = int(src), int(dst), int(emp)
+    except ValueError:
+        raise ValueError("Account IDs and Employee ID must be integers.")
+    if src == dst:
+        raise ValueError("From and To accounts must differ.")
+    amount = _amount(amt, "Amount must be a number.")
+    if not amount > 0:
+        raise ValueError("Amount must be positive.")
+    return src, dst, emp, amount
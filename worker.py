@@ -0,0 +1,144 @@
+"""Background execution of database calls for the Tk UI.
+
+Tk is single-threaded: any blocking call made from an event handler
+freezes the whole window. `DBExecutor` runs such calls on a small thread
+pool and hands the results back to the UI thread, where the `on_done` /
+`on_error` callbacks are invoked from `root.after`, so callbacks may
+touch widgets freely.
+
+Tasks submitted with the same `key` supersede each other: when a newer
+task is submitted, the older one is skipped if it has not started yet,
+and its result is discarded if it has. This is used for table reloads,
+where only the latest request matters.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """Handle for a submitted call; `cancel()` drops its callbacks."""
+
+    __slots__ = ('key', 'on_done', 'on_error', 'busy', 'cancelled')
+
+    def __init__(self, key, on_done, on_error, busy):
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.busy = busy
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class DBExecutor:
+    """Thread pool whose results are delivered on the Tk main loop.
+
+    Args:
+        root: the Tk root (or any widget) used to schedule callbacks.
+        max_workers (int): worker threads; keep at or below the
+            connection pool size.
+        poll_interval (int): milliseconds between result-queue checks
+            while tasks are outstanding.
+        on_error (callable): default error callback, `on_error(exc)`.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=20, on_error=None):
+        self.root = root
+        self.poll_interval = poll_interval
+        self.on_error = on_error
+        self._threads = ThreadPoolExecutor(max_workers, thread_name_prefix='db')
+        self._results = queue.SimpleQueue()
+        self._latest = {}
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, busy=None, **kwargs):
+        """Run `fn(*args, **kwargs)` on a worker thread.
+
+        Must be called from the UI thread.
+
+        Args:
+            fn (callable): the blocking function to run.
+            on_done (callable): called on the UI thread with the result.
+            on_error (callable): called on the UI thread with the exception;
+                defaults to the executor's `on_error`.
+            key (hashable): supersession key; a newer task with the same
+                key cancels this one.
+            busy: optional indicator with `start()`/`stop()` methods, kept
+                running while the task is outstanding.
+
+        Returns:
+            Task: handle that can be cancelled.
+        """
+        task = Task(key, on_done, on_error or self.on_error, busy)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = task
+        if busy is not None:
+            busy.start()
+        self._pending += 1
+        self._threads.submit(self._run, task, fn, args, kwargs)
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._drain)
+        return task
+
+    def cancel(self, key):
+        """Cancel the outstanding task submitted under `key`, if any."""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def shutdown(self, wait=False):
+        """Stop accepting work; queued tasks that have not started are dropped."""
+        for task in self._latest.values():
+            task.cancel()
+        self._threads.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, task, fn, args, kwargs):
+        # worker thread: never touch Tk here
+        if task.cancelled:
+            self._results.put((task, None, None))
+            return
+        try:
+            self._results.put((task, fn(*args, **kwargs), None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    def _drain(self):
+        while True:
+            try:
+                task, value, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(task, value, error)
+        if self._pending:
+            self.root.after(self.poll_interval, self._drain)
+        else:
+            self._polling = False
+
+    def _finish(self, task, value, error):
+        self._pending -= 1
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        if task.busy is not None:
+            task.busy.stop()
+        if task.cancelled:
+            return
+        try:
+            if error is not None:
+                if task.on_error is not None:
+                    task.on_error(error)
+            elif task.on_done is not None:
+                task.on_done(value)
+        except Exception as e:
+            # a failing callback must not stop delivery of other results
+            if self.on_error is not None:
+                try:
+                    self.on_error(e)
+                except Exception:
+                    pass